@@ -3,9 +3,13 @@ Connection management API endpoints
 """
 from fastapi import APIRouter, HTTPException
 from models.schemas import (
-    ConnectionCreate, ConnectionTest, ConnectionResponse
+    ConnectionCreate, ConnectionTest, ConnectionResponse, PoolStatus
 )
 from services.connection_manager import connection_manager
+from services.executor import query_executor
+from services.engine_registry import engine_registry
+import asyncio
+import uuid
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,23 +19,21 @@ router = APIRouter()
 async def test_connection(connection: ConnectionTest):
     """Test a database connection without saving it"""
     try:
-        # Create temporary connection
-        temp_id = "temp_test"
-        service = connection_manager.create_connection(
-            connection_id=temp_id,
-            db_type=connection.db_type,
-            host=connection.host,
-            port=connection.port,
-            username=connection.username,
-            password=connection.password,
-            database=connection.database
-        )
-        
-        # Test it
-        is_connected = service.test_connection()
-        
-        # Clean up
-        connection_manager.close_connection(temp_id)
+        # Each test gets its own executor key and a private unpooled engine
+        test_id = f"test:{uuid.uuid4().hex}"
+        try:
+            is_connected = await query_executor.run(
+                test_id,
+                connection_manager.test_connection,
+                db_type=connection.db_type,
+                host=connection.host,
+                port=connection.port,
+                username=connection.username,
+                password=connection.password,
+                database=connection.database
+            )
+        finally:
+            query_executor.remove(test_id)
         
         if is_connected:
             return ConnectionResponse(
@@ -49,14 +51,23 @@ async def test_connection(connection: ConnectionTest):
 async def create_connection(connection: ConnectionCreate):
     """Create and save a new database connection"""
     try:
-        service = connection_manager.create_connection(
+        await query_executor.run(
+            connection.connection_id,
+            connection_manager.create_connection,
             connection_id=connection.connection_id,
             db_type=connection.db_type,
             host=connection.host,
             port=connection.port,
             username=connection.username,
             password=connection.password,
-            database=connection.database
+            database=connection.database,
+            pool_settings=connection.pool.model_dump(exclude_none=True) if connection.pool else None,
+            max_concurrency=connection.max_concurrency,
+            statement_timeout=connection.statement_timeout,
+            slow_query_threshold=connection.slow_query_threshold,
+            explain_slow_queries=connection.explain_slow_queries,
+            name=connection.name,
+            sqlite_mode=connection.sqlite_mode
         )
         
         return ConnectionResponse(
@@ -69,27 +80,49 @@ async def create_connection(connection: ConnectionCreate):
         logger.error(f"Failed to create connection: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.get("")
+async def list_connections():
+    """List saved connection profiles, without passwords"""
+    return await asyncio.to_thread(connection_manager.list_profiles)
+
+@router.get("/engines")
+async def list_shared_engines():
+    """List shared engines and how many connections use each"""
+    return engine_registry.get_stats()
+
 @router.delete("/{connection_id}", response_model=ConnectionResponse)
 async def close_connection(connection_id: str):
     """Close a database connection"""
     try:
-        connection_manager.close_connection(connection_id)
+        await query_executor.run(connection_id, connection_manager.close_connection, connection_id)
         return ConnectionResponse(
             status="success",
             message="Connection closed"
         )
-    except Exception as e:
+    except Exception:
         raise HTTPException(status_code=404, detail="Connection not found")
 
 @router.get("/{connection_id}/status")
 async def get_connection_status(connection_id: str):
-    """Check if connection is active"""
-    service = connection_manager.get_connection(connection_id)
+    """
+    Check if connection is active. Answers from the background health
+    monitor's last probe, so it never waits on an unreachable server
+    """
+    service = await connection_manager.get_connection_async(connection_id)
     if not service:
         raise HTTPException(status_code=404, detail="Connection not found")
     
-    is_active = service.test_connection()
+    health = connection_manager.get_health(connection_id) or {"active": False}
     return {
         "connection_id": connection_id,
-        "active": is_active
-    }
\ No newline at end of file
+        **health
+    }
+
+@router.get("/{connection_id}/pool", response_model=PoolStatus)
+async def get_pool_status(connection_id: str):
+    """Report connection pool usage and checkout wait times"""
+    service = await connection_manager.get_connection_async(connection_id)
+    if not service:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    
+    return PoolStatus(connection_id=connection_id, **service.get_pool_status())
\ No newline at end of file
@@ -4,6 +4,8 @@ Database operations API endpoints
 from fastapi import APIRouter, HTTPException
 from models.schemas import DatabaseInfo
 from services.connection_manager import connection_manager
+from services.executor import query_executor
+from services.health_monitor import CircuitOpenError
 from typing import List
 import logging
 
@@ -14,29 +16,18 @@ router = APIRouter()
 async def list_databases(connection_id: str):
     """Get list of all databases for a connection"""
     try:
-        service = connection_manager.get_connection(connection_id)
+        service = await connection_manager.get_connection_async(connection_id)
         if not service:
             raise HTTPException(status_code=404, detail="Connection not found")
         
-        databases = service.get_databases()
+        # Size and table count for every database in one catalog query
+        with connection_manager.guard(connection_id):
+            summaries = await query_executor.run(connection_id, service.get_database_summaries)
         
-        # Get additional info for each database
-        db_info_list = []
-        for db_name in databases:
-            try:
-                size = service.get_database_size(db_name)
-                table_count = service.get_table_count(db_name)
-                db_info_list.append(DatabaseInfo(
-                    name=db_name,
-                    size=size,
-                    tables_count=table_count
-                ))
-            except Exception as e:
-                logger.warning(f"Could not get info for database {db_name}: {e}")
-                db_info_list.append(DatabaseInfo(name=db_name))
-        
-        return db_info_list
+        return [DatabaseInfo(**summary) for summary in summaries]
         
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to list databases: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -45,11 +36,11 @@ async def list_databases(connection_id: str):
 async def create_database(connection_id: str, database_name: str):
     """Create a new database"""
     try:
-        service = connection_manager.get_connection(connection_id)
+        service = await connection_manager.get_connection_async(connection_id)
         if not service:
             raise HTTPException(status_code=404, detail="Connection not found")
         
-        service.create_database(database_name)
+        await query_executor.run(connection_id, service.create_database, database_name)
         
         return {
             "status": "success",
@@ -64,11 +55,11 @@ async def create_database(connection_id: str, database_name: str):
 async def drop_database(connection_id: str, database_name: str):
     """Drop a database"""
     try:
-        service = connection_manager.get_connection(connection_id)
+        service = await connection_manager.get_connection_async(connection_id)
         if not service:
             raise HTTPException(status_code=404, detail="Connection not found")
         
-        service.drop_database(database_name)
+        await query_executor.run(connection_id, service.drop_database, database_name)
         
         return {
             "status": "success",
@@ -0,0 +1,103 @@
+"""
+Background query job API endpoints
+"""
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any
+from services.job_queue import job_queue
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+class JobSubmitRequest(BaseModel):
+    connection_id: str
+    query: str
+    params: Optional[Dict[str, Any]] = None
+    limit: Optional[int] = Field(None, ge=1, description="Row limit; unlimited by default")
+    timeout: Optional[float] = Field(None, gt=0, description="Statement timeout in seconds")
+
+
+class JobInfo(BaseModel):
+    job_id: str
+    connection_id: str
+    query: str
+    status: str
+    columns: List[str]
+    rows_written: int
+    bytes_written: int
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    elapsed: float
+
+class JobResultPage(BaseModel):
+    job_id: str
+    status: str
+    columns: List[str]
+    rows: List[List[Any]]
+    offset: int
+    rows_written: int
+    next_offset: Optional[int] = None
+
+
+@router.post("", response_model=JobInfo)
+async def submit_job(job_request: JobSubmitRequest):
+    """Queue a query to run in the background and return its job id"""
+    try:
+        # Submitting evicts expired spools, which deletes files
+        job = await asyncio.to_thread(
+            job_queue.submit,
+            job_request.connection_id,
+            job_request.query,
+            params=job_request.params,
+            limit=job_request.limit,
+            timeout=job_request.timeout
+        )
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    return JobInfo(**job)
+
+@router.get("", response_model=List[JobInfo])
+async def list_jobs(connection_id: Optional[str] = None):
+    """List jobs with their status and progress"""
+    return [JobInfo(**job) for job in job_queue.list_jobs(connection_id)]
+
+@router.get("/{job_id}", response_model=JobInfo)
+async def get_job(job_id: str):
+    """Get a job's status and progress"""
+    job = job_queue.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobInfo(**job)
+
+@router.get("/{job_id}/results", response_model=JobResultPage)
+async def get_job_results(job_id: str, offset: int = Query(0, ge=0),
+                          limit: int = Query(1000, ge=1, le=50000)):
+    """Read a page of a job's spooled rows; available while the job is still running"""
+    try:
+        page = await asyncio.to_thread(job_queue.read_results, job_id, offset, limit)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job not found")
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    return JobResultPage(**page)
+
+@router.delete("/{job_id}")
+async def cancel_or_delete_job(job_id: str):
+    """Cancel a queued or running job, or delete a finished job's results"""
+    if not job_queue.get_job(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    try:
+        if await asyncio.to_thread(job_queue.cancel, job_id):
+            return {"status": "success", "message": f"Job {job_id} cancelled"}
+    except Exception as e:
+        logger.error(f"Failed to cancel job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    await asyncio.to_thread(job_queue.delete, job_id)
+    return {"status": "success", "message": f"Job {job_id} results deleted"}
\ No newline at end of file
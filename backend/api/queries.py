@@ -1,22 +1,60 @@
 """
-Query execution API endpoints (PHASE 2 Under <__DEV__>)
+Query execution API endpoints
 """
-from fastapi import APIRouter
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
-from api.tables import logger
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
+from typing import Optional, List, Dict, Any, AsyncIterator, Iterator, Literal
+from services.base_service import QueryTimeoutError, QueryCancelledError
 from services.connection_manager import connection_manager
-from sqlalchemy import text
+from services.executor import query_executor
+from services.table_pager import TablePager
+from services.query_cache import query_cache
+from services.metrics import rows_streamed, bytes_streamed
+from services.slow_query_log import slow_query_log
+from services.exporter import (
+    DEFAULT_EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_chunks, export_filename, format_available,
+    table_query
+)
+from utils.serialization import dumps, value_type
+import asyncio
+import threading
+import time
 import logging
 
-logger = logging.Logger(__name__)
+logger = logging.getLogger(__name__)
 router = APIRouter()
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+COLUMNAR_MEDIA_TYPE = "application/vnd.dbm.columnar+json"
+ARROW_MEDIA_TYPE = EXPORT_FORMATS["arrow"][0]
+
 
 class QueryExecuteRequest(BaseModel):
     connection_id: str
     query: str
     limit : Optional[int] = 1000
+    params: Optional[Dict[str, Any]] = None
+    chunk_size: int = Field(1000, ge=1, le=100000)
+    cache: bool = False
+    cache_ttl: Optional[float] = Field(None, gt=0, description="Seconds to keep a cached result")
+    timeout: Optional[float] = Field(None, gt=0, description="Statement timeout in seconds")
+    query_id: Optional[str] = Field(None, max_length=64, description="Client-chosen id for cancelling")
+
+
+class ExportRequest(BaseModel):
+    connection_id: str
+    query: Optional[str] = None
+    table_name: Optional[str] = None
+    params: Optional[Dict[str, Any]] = None
+    format: Literal["csv", "ndjson", "arrow", "parquet"] = "csv"
+    gzip: bool = False
+    delimiter: str = Field(",", min_length=1, max_length=1)
+    chunk_size: int = Field(DEFAULT_EXPORT_CHUNK_SIZE, ge=1, le=100000)
+    timeout: Optional[float] = Field(None, gt=0, description="Statement timeout in seconds")
+    query_id: Optional[str] = Field(None, max_length=64, description="Client-chosen id for cancelling")
+    filename: Optional[str] = Field(None, max_length=128)
 
 
 class QueryResult(BaseModel):
@@ -25,7 +63,448 @@ class QueryResult(BaseModel):
     rows_count: int
     excution_time: float
     query_type: str
+    cached: bool = False
+    query_id: Optional[str] = None
+
+class TableFilter(BaseModel):
+    column: str
+    op: Literal["eq", "ne", "lt", "lte", "gt", "gte", "like", "is_null", "not_null"] = "eq"
+    value: Any = None
 
 class TableDataRequest(BaseModel):
     connection_id : str
+    table_name: str
+    page_size: int = Field(100, ge=1, le=5000)
+    cursor: Optional[str] = None
+    sort_by: Optional[str] = None
+    descending: bool = False
+    filters: List[TableFilter] = []
+
+class TableDataPage(BaseModel):
+    columns: List[str]
+    rows: List[Dict]
+    rows_count: int
+    next_cursor: Optional[str] = None
+    pagination: str
+    key_columns: List[str]
+
+
+class _ResultStream:
+    """
+    A service stream shared by a response body and the background task that
+    cleans up after it. The body may never run if the client goes away
+    first, so closing is left to whichever gets there; calls are serialized
+    so a close waits for a fetch in progress instead of failing on it
+    """
+    
+    def __init__(self, connection_id: str, stream: Iterator, query_id: str = None):
+        self.connection_id = connection_id
+        self.stream = stream
+        self.query_id = query_id
+        self._lock = threading.Lock()
+        self._closed = False
+    
+    def _next(self, iterator: Iterator) -> Any:
+        with self._lock:
+            if self._closed:
+                return None
+            return next(iterator, None)
+    
+    def _close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            # Closing releases the server-side cursor and its pooled connection
+            self.stream.close()
+    
+    async def next(self, iterator: Iterator = None) -> Any:
+        """Next item of the stream, or of an iterator reading from it; None at the end"""
+        return await query_executor.run(self.connection_id, self._next, iterator or self.stream)
+    
+    async def close(self):
+        """Release the stream and its registry entry; safe to call more than once"""
+        try:
+            await query_executor.run(self.connection_id, self._close)
+        finally:
+            if self.query_id:
+                connection_manager.finish_query(self.query_id)
+
+async def _iterate_chunks(stream: _ResultStream) -> AsyncIterator[Dict[str, Any]]:
+    """Pull chunks from a service stream on the worker pool"""
+    try:
+        while True:
+            chunk = await stream.next()
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        await stream.close()
+
+async def _json_body(stream: _ResultStream, header: Dict[str, Any],
+                     query_type: str, started: float) -> AsyncIterator[str]:
+    """Stream a QueryResult-shaped JSON document, one row chunk at a time"""
+    connection_id = stream.connection_id
+    columns = header["columns"]
+    rows_count = header.get("rowcount", 0)
+    error = None
+    
+    yield '{"columns":' + dumps(columns) + ',"rows":['
+    first = True
+    try:
+        async for chunk in _iterate_chunks(stream):
+            rows = chunk["rows"]
+            if not rows:
+                continue
+            body = ",".join(dumps(dict(zip(columns, row))) for row in rows)
+            yield body if first else "," + body
+            first = False
+            rows_count += len(rows)
+            rows_streamed.inc(len(rows), connection_id=connection_id)
+            bytes_streamed.inc(len(body), connection_id=connection_id)
+    except Exception as e:
+        logger.error(f"Query stream failed: {e}")
+        error = str(e)
+    
+    tail = {
+        "rows_count": rows_count,
+        "excution_time": round(time.perf_counter() - started, 6),
+        "query_type": query_type,
+        "cached": header.get("cached", False),
+        "query_id": header.get("query_id"),
+    }
+    if error:
+        tail["error"] = error
+    yield "]," + dumps(tail)[1:]
+
+async def _ndjson_body(stream: _ResultStream, header: Dict[str, Any],
+                       query_type: str, started: float) -> AsyncIterator[str]:
+    """Stream a header line, one line per row chunk, then a summary line"""
+    connection_id = stream.connection_id
+    rows_count = header.get("rowcount", 0)
+    yield dumps({
+        "type": "columns",
+        "columns": header["columns"],
+        "query_type": query_type,
+        "query_id": header.get("query_id"),
+    }) + "\n"
+    try:
+        async for chunk in _iterate_chunks(stream):
+            rows = chunk["rows"]
+            rows_count += len(rows)
+            line = dumps({"type": "rows", "rows": [list(row) for row in rows]}) + "\n"
+            rows_streamed.inc(len(rows), connection_id=connection_id)
+            bytes_streamed.inc(len(line), connection_id=connection_id)
+            yield line
+    except Exception as e:
+        logger.error(f"Query stream failed: {e}")
+        yield dumps({"type": "error", "detail": str(e)}) + "\n"
+    
+    yield dumps({
+        "type": "summary",
+        "rows_count": rows_count,
+        "excution_time": round(time.perf_counter() - started, 6),
+        "query_type": query_type,
+        "cached": header.get("cached", False),
+    }) + "\n"
+
+async def _columnar_body(stream: _ResultStream, header: Dict[str, Any],
+                         query_type: str, started: float) -> AsyncIterator[str]:
+    """
+    Stream column names once, then each row chunk as one array per column,
+    with the column types detected from the data in the summary at the end
+    """
+    connection_id = stream.connection_id
+    columns = header["columns"]
+    types = [None] * len(columns)
+    rows_count = header.get("rowcount", 0)
+    error = None
+    
+    yield '{"columns":' + dumps(columns) + ',"chunks":['
+    first = True
+    try:
+        async for chunk in _iterate_chunks(stream):
+            rows = chunk["rows"]
+            if not rows:
+                continue
+            data = [list(values) for values in zip(*rows)]
+            for index, values in enumerate(data):
+                if types[index] is None:
+                    types[index] = next((value_type(value) for value in values if value is not None), None)
+            body = dumps({"length": len(rows), "data": data})
+            yield body if first else "," + body
+            first = False
+            rows_count += len(rows)
+            rows_streamed.inc(len(rows), connection_id=connection_id)
+            bytes_streamed.inc(len(body), connection_id=connection_id)
+    except Exception as e:
+        logger.error(f"Query stream failed: {e}")
+        error = str(e)
+    
+    tail = {
+        "types": types,
+        "rows_count": rows_count,
+        "excution_time": round(time.perf_counter() - started, 6),
+        "query_type": query_type,
+        "cached": header.get("cached", False),
+        "query_id": header.get("query_id"),
+    }
+    if error:
+        tail["error"] = error
+    yield "]," + dumps(tail)[1:]
+
+async def _export_body(stream: _ResultStream, encoded: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """Fetch, encode and compress each chunk on the worker pool, off the event loop"""
+    try:
+        while True:
+            data = await stream.next(encoded)
+            if data is None:
+                return
+            if data:
+                bytes_streamed.inc(len(data), connection_id=stream.connection_id)
+                yield data
+    except Exception as e:
+        # Headers are already sent; cutting the body short is all that is left
+        logger.error(f"Export stream failed: {e}")
+        raise
+    finally:
+        await stream.close()
+
+def _failure_status(error: Exception) -> int:
+    """Timed out and cancelled statements get their own status; anything else is a bad query"""
+    if isinstance(error, QueryTimeoutError):
+        return 504
+    if isinstance(error, QueryCancelledError):
+        return 409
+    return 400
+
+def _counted_rows(connection_id: str, stream: Iterator) -> Iterator[List[Any]]:
+    """Row chunks of a service stream, counted as they are read"""
+    for chunk in stream:
+        rows_streamed.inc(len(chunk["rows"]), connection_id=connection_id)
+        yield chunk["rows"]
+
+@router.post("/execute", response_model=QueryResult)
+async def execute_query(query_request: QueryExecuteRequest, request: Request):
+    """
+    Execute a query and stream its result. Responds with a QueryResult JSON
+    document, or by Accept header with NDJSON chunks, columnar JSON
+    (application/vnd.dbm.columnar+json) or an Arrow IPC stream. The query
+    id (client-chosen or generated) can be passed to DELETE /{query_id}
+    """
+    service = await connection_manager.get_connection_async(query_request.connection_id)
+    if not service:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    
+    try:
+        query_id = connection_manager.register_query(
+            query_request.connection_id, query_request.query, query_request.query_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    started = time.perf_counter()
+    stream = _ResultStream(query_request.connection_id, service.stream_query(
+        query_request.query,
+        params=query_request.params,
+        limit=query_request.limit,
+        chunk_size=query_request.chunk_size,
+        use_cache=query_request.cache,
+        cache_ttl=query_request.cache_ttl,
+        timeout=query_request.timeout,
+        query_id=query_id
+    ), query_id)
+    
+    # Run the statement before responding so SQL errors map to a status code
+    try:
+        header = await stream.next()
+    except Exception as e:
+        logger.error(f"Query failed: {e}")
+        await stream.close()
+        raise HTTPException(status_code=_failure_status(e), detail=str(e))
+    
+    header["query_id"] = query_id
+    query_type = service.get_query_type(query_request.query)
+    accept = request.headers.get("accept", "")
+    # Without pyarrow, Arrow clients get whatever else they accept
+    if ARROW_MEDIA_TYPE in accept and format_available("arrow"):
+        encoded = export_chunks(header["columns"], _counted_rows(query_request.connection_id, stream.stream), "arrow")
+        body = _export_body(stream, encoded)
+        media_type = ARROW_MEDIA_TYPE
+    elif COLUMNAR_MEDIA_TYPE in accept:
+        body = _columnar_body(stream, header, query_type, started)
+        media_type = COLUMNAR_MEDIA_TYPE
+    elif NDJSON_MEDIA_TYPE in accept:
+        body = _ndjson_body(stream, header, query_type, started)
+        media_type = NDJSON_MEDIA_TYPE
+    else:
+        body = _json_body(stream, header, query_type, started)
+        media_type = "application/json"
+    
+    # Runs after the body, or in its place when the client disconnects first
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"X-Accel-Buffering": "no", "X-Query-Id": query_id},
+        background=BackgroundTask(stream.close)
+    )
+
+@router.post("/export")
+async def export_query(export_request: ExportRequest):
+    """
+    Export a table or a read query as CSV, NDJSON, Arrow IPC or Parquet,
+    optionally gzipped. Rows come off a server-side cursor a chunk at a
+    time, so the export size does not affect the API's memory use
+    """
+    service = await connection_manager.get_connection_async(export_request.connection_id)
+    if not service:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    if bool(export_request.query) == bool(export_request.table_name):
+        raise HTTPException(status_code=400, detail="Give either a query or a table_name")
+    
+    connection_id = export_request.connection_id
+    try:
+        if export_request.table_name:
+            query = await query_executor.run(connection_id, table_query, service, export_request.table_name)
+        else:
+            query = export_request.query
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if not service.is_read_query(query):
+        raise HTTPException(status_code=400, detail="Only read queries can be exported")
+    
+    try:
+        query_id = connection_manager.register_query(connection_id, query, export_request.query_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    stream = _ResultStream(connection_id, service.stream_query(
+        query,
+        params=export_request.params,
+        chunk_size=export_request.chunk_size,
+        timeout=export_request.timeout,
+        query_id=query_id
+    ), query_id)
+    
+    try:
+        header = await stream.next()
+        encoded = export_chunks(
+            header["columns"], _counted_rows(connection_id, stream.stream), export_request.format,
+            export_request.gzip, export_request.delimiter
+        )
+    except Exception as e:
+        logger.error(f"Export failed: {e}")
+        await stream.close()
+        raise HTTPException(status_code=_failure_status(e), detail=str(e))
+    
+    filename = export_filename(
+        export_request.filename or export_request.table_name or "export",
+        export_request.format, export_request.gzip
+    )
+    return StreamingResponse(
+        _export_body(stream, encoded),
+        media_type="application/gzip" if export_request.gzip else EXPORT_FORMATS[export_request.format][0],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Accel-Buffering": "no",
+            "X-Query-Id": query_id,
+        },
+        background=BackgroundTask(stream.close)
+    )
+
+@router.get("/cache/stats")
+async def get_result_cache_stats():
+    """Report result cache hit ratio, size and evictions"""
+    return query_cache.get_stats()
+
+@router.delete("/cache")
+async def clear_result_cache(connection_id: Optional[str] = None):
+    """Drop cached results, for one connection or all of them"""
+    query_cache.clear(connection_id)
+    return {
+        "status": "success",
+        "message": "Result cache cleared"
+    }
+
+@router.get("/slow-log")
+async def get_slow_query_log(connection_id: str, limit: int = Query(100, ge=1, le=1000)):
+    """List the most recent statements over the connection's slow query threshold"""
+    if not await connection_manager.get_connection_async(connection_id):
+        raise HTTPException(status_code=404, detail="Connection not found")
+    return {
+        **slow_query_log.get_settings(connection_id),
+        "entries": slow_query_log.get_entries(connection_id, limit),
+    }
+
+@router.get("/slow-log/summary")
+async def get_slow_query_summary(connection_id: str):
+    """Aggregate slow statements by fingerprint with p50/p95/p99 durations"""
+    if not await connection_manager.get_connection_async(connection_id):
+        raise HTTPException(status_code=404, detail="Connection not found")
+    return {
+        **slow_query_log.get_settings(connection_id),
+        "statements": slow_query_log.summarize(connection_id),
+    }
+
+@router.delete("/slow-log")
+async def clear_slow_query_log(connection_id: str):
+    """Drop the logged slow statements of a connection"""
+    slow_query_log.clear(connection_id)
+    return {
+        "status": "success",
+        "message": "Slow query log cleared"
+    }
+
+@router.post("/table-data", response_model=TableDataPage)
+async def get_table_data(data_request: TableDataRequest):
+    """
+    Browse table rows a page at a time. Pages seek past the last primary or
+    unique key so deep pages cost the same as the first; tables without a
+    usable key fall back to OFFSET
+    """
+    service = await connection_manager.get_connection_async(data_request.connection_id)
+    if not service:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    
+    try:
+        page = await query_executor.run(
+            data_request.connection_id,
+            TablePager(service).get_page,
+            data_request.table_name,
+            page_size=data_request.page_size,
+            cursor=data_request.cursor,
+            sort_by=data_request.sort_by,
+            descending=data_request.descending,
+            filters=[item.model_dump() for item in data_request.filters]
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to fetch table data: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return TableDataPage(rows_count=len(page["rows"]), **page)
+
+@router.get("/running")
+async def list_running_queries(connection_id: Optional[str] = None):
+    """List in-flight statements with their elapsed time"""
+    return connection_manager.list_queries(connection_id)
+
+@router.delete("/{query_id}")
+async def cancel_query(query_id: str):
+    """Cancel a running statement server-side"""
+    try:
+        # Not via query_executor: the runaway query may hold the connection's whole cap
+        cancelled = await asyncio.to_thread(connection_manager.cancel_query, query_id)
+    except NotImplementedError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to cancel query {query_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
     
+    if not cancelled:
+        raise HTTPException(status_code=404, detail="Query not running")
+    return {
+        "status": "success",
+        "message": f"Query {query_id} cancelled"
+    }
\ No newline at end of file
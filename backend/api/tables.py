@@ -1,62 +1,471 @@
 """
 Table operations API endpoints
 """
-from fastapi import APIRouter, HTTPException
-from models.schemas import TableInfo, TableStructure, ColumnInfo
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from models.schemas import (
+    TableInfo, TableStructure, ColumnInfo, SchemaSnapshot, ForeignKeyEdge, TableCopyRequest,
+    StructureBatchRequest, StructureBatchResponse, StructureBatchError
+)
+from services.base_service import format_size, QueryTimeoutError, QueryCancelledError
 from services.connection_manager import connection_manager
-from typing import List
+from services.executor import query_executor
+from services.health_monitor import CircuitOpenError
+from services.bulk_loader import (
+    bulk_import, import_registry, ImportValidationError, IMPORT_FORMATS, DEFAULT_IMPORT_BATCH_SIZE
+)
+from services.table_copier import table_copier
+from services.schema_index import schema_index, SEARCH_MODES
+from services.column_profiler import get_profile, DEFAULT_PROFILE_SAMPLE_ROWS
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import hashlib
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+def _to_table_structure(structure: Dict[str, Any]) -> TableStructure:
+    """Convert inspector output to the response model"""
+    columns = [
+        ColumnInfo(
+            name=col['name'],
+            type=str(col['type']),
+            nullable=col.get('nullable', True),
+            key=col.get('key'),
+            default=str(col.get('default')) if col.get('default') is not None else None,
+            extra=str(col.get('autoincrement')) if col.get('autoincrement') is not None else None
+        )
+        for col in structure['columns']
+    ]
+    
+    return TableStructure(
+        columns=columns,
+        primary_keys=structure['primary_keys'],
+        indexes=structure['indexes'],
+        foreign_keys=structure['foreign_keys']
+    )
+
+async def _count_rows_within_budget(connection_id: str, service, table_infos: List[TableInfo],
+                                    budget: float):
+    """Replace estimates with COUNT(*) results for tables that finish within the budget"""
+    tasks = {
+        asyncio.ensure_future(
+            query_executor.run(connection_id, service.count_rows, info.name, timeout=budget)
+        ): info
+        for info in table_infos
+    }
+    if not tasks:
+        return
+    done, pending = await asyncio.wait(tasks, timeout=budget)
+    # Counts still queued are dropped; running ones stop at their statement timeout
+    for task in pending:
+        task.cancel()
+    for task in done:
+        if task.exception() is None:
+            tasks[task].row_count = task.result()
+            tasks[task].row_count_exact = True
+        else:
+            logger.warning(f"Could not count rows for {tasks[task].name}: {task.exception()}")
+
 @router.get("/{connection_id}/list", response_model=List[TableInfo])
-async def list_tables(connection_id: str):
-    """Get list of all tables in current database"""
+async def list_tables(connection_id: str, exact: bool = False,
+                      budget: float = Query(5.0, gt=0, le=300, description="Seconds allowed for exact counts")):
+    """
+    Get list of all tables in current database, with row counts and sizes
+    estimated from catalog statistics. With exact=true, row counts come from
+    COUNT(*) where they finish within the budget and stay estimates otherwise
+    """
     try:
-        service = connection_manager.get_connection(connection_id)
+        service = await connection_manager.get_connection_async(connection_id)
         if not service:
             raise HTTPException(status_code=404, detail="Connection not found")
         
-        tables = service.get_tables()
+        with connection_manager.guard(connection_id):
+            tables = await query_executor.run(connection_id, service.get_tables)
+        
+        try:
+            stats = await query_executor.run(connection_id, service.get_table_stats, exact=exact)
+        except Exception as e:
+            logger.warning(f"Could not read table statistics: {e}")
+            stats = {}
         
         # Return table info
-        return [TableInfo(name=table) for table in tables]
+        table_infos = []
+        for table in tables:
+            table_stats = stats.get(table, {})
+            table_infos.append(TableInfo(
+                name=table,
+                row_count=table_stats.get("row_count"),
+                size=format_size(table_stats.get("size_bytes"))
+            ))
+        
+        if exact:
+            await _count_rows_within_budget(connection_id, service, table_infos, budget)
+        
+        return table_infos
         
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"Failed to list tables: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _build_snapshot(service) -> Tuple[str, bytes]:
+    """Reflect the whole schema and encode it once, returning (etag, body)"""
+    snapshot = service.get_schema_snapshot()
+    tables = {name: _to_table_structure(structure) for name, structure in snapshot.items()}
+    edges = [
+        ForeignKeyEdge(
+            name=fk.get('name'),
+            table=name,
+            columns=fk['constrained_columns'],
+            referred_table=fk['referred_table'],
+            referred_columns=fk['referred_columns']
+        )
+        for name, structure in snapshot.items()
+        for fk in structure['foreign_keys']
+    ]
+    body = SchemaSnapshot(
+        table_count=len(tables),
+        tables=tables,
+        foreign_key_graph=edges
+    ).model_dump_json().encode()
+    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+    return etag, body
+
+@router.get("/{connection_id}/snapshot", response_model=SchemaSnapshot)
+async def get_schema_snapshot(connection_id: str, request: Request):
+    """
+    Get the structure of every table plus the foreign key graph in one
+    response. Supports If-None-Match, so unchanged schemas return 304
+    """
+    service = await connection_manager.get_connection_async(connection_id)
+    if not service:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    
+    try:
+        # The encoded snapshot is cached with the metadata, so DDL invalidates it
+        etag, body = await query_executor.run(
+            connection_id,
+            service.metadata_cache.get_or_load,
+            ("snapshot_response",),
+            lambda: _build_snapshot(service)
+        )
+    except Exception as e:
+        logger.error(f"Failed to build schema snapshot: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
 @router.get("/{connection_id}/{table_name}/structure", response_model=TableStructure)
 async def get_table_structure(connection_id: str, table_name: str):
     """Get table structure (columns, keys, indexes)"""
     try:
-        service = connection_manager.get_connection(connection_id)
+        service = await connection_manager.get_connection_async(connection_id)
         if not service:
             raise HTTPException(status_code=404, detail="Connection not found")
         
-        structure = service.get_table_structure(table_name)
+        structure = await query_executor.run(connection_id, service.get_table_structure, table_name)
         
         # Convert to response model
-        columns = [
-            ColumnInfo(
-                name=col['name'],
-                type=str(col['type']),
-                nullable=col.get('nullable', True),
-                key=col.get('key'),
-                default=str(col.get('default')) if col.get('default') is not None else None,
-                extra=col.get('autoincrement')
-            )
-            for col in structure['columns']
-        ]
-        
-        return TableStructure(
-            columns=columns,
-            primary_keys=structure['primary_keys'],
-            indexes=structure['indexes'],
-            foreign_keys=structure['foreign_keys']
-        )
+        return _to_table_structure(structure)
         
     except Exception as e:
         logger.error(f"Failed to get table structure: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{connection_id}/{table_name}/profile")
+async def get_table_profile(connection_id: str, table_name: str,
+                            columns: Optional[str] = Query(None, description="Comma-separated column names"),
+                            full: bool = Query(False, description="Scan every row instead of sampling large tables"),
+                            sample_rows: int = Query(DEFAULT_PROFILE_SAMPLE_ROWS, ge=1000),
+                            top_k: int = Query(10, ge=1, le=100),
+                            refresh: bool = False,
+                            timeout: Optional[float] = Query(None, gt=0)):
+    """
+    Null ratio, min/max, approximate distinct count and top values of every
+    column, from one scan of the table or of a random sample of it. Served
+    from cache until the table changes
+    """
+    service = await connection_manager.get_connection_async(connection_id)
+    if not service:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    column_names = [name.strip() for name in columns.split(",") if name.strip()] if columns else None
+    
+    try:
+        with connection_manager.guard(connection_id):
+            return await query_executor.run(
+                connection_id, get_profile, service, table_name, column_names,
+                full=full, sample_rows=sample_rows, top_k=top_k, timeout=timeout, refresh=refresh
+            )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except CircuitOpenError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except QueryCancelledError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to profile {table_name}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _load_structure_batch(connection_id: str, table_names: List[str],
+                                timeout: float) -> Tuple[Dict[str, TableStructure], List[StructureBatchError]]:
+    """
+    Reflect one connection's tables together within the budget. If the
+    batch fails, each table is retried on its own so one bad table cannot
+    take the others down with it
+    """
+    def error(table_name: str, status: int, detail: str) -> StructureBatchError:
+        return StructureBatchError(connection_id=connection_id, table_name=table_name, status=status, detail=detail)
+    
+    service = await connection_manager.get_connection_async(connection_id)
+    if not service:
+        return {}, [error(name, 404, "Connection not found") for name in table_names]
+    
+    failures: Dict[str, BaseException] = {}
+    try:
+        with connection_manager.guard(connection_id):
+            structures = await asyncio.wait_for(
+                query_executor.run(connection_id, service.get_table_structures, table_names), timeout
+            )
+    except CircuitOpenError as e:
+        return {}, [error(name, 503, str(e)) for name in table_names]
+    except asyncio.TimeoutError:
+        return {}, [error(name, 504, f"No answer within {timeout}s") for name in table_names]
+    except Exception as e:
+        logger.warning(f"Batch structure lookup on {connection_id} failed, retrying per table: {e}")
+        outcomes = await asyncio.gather(*[
+            asyncio.wait_for(query_executor.run(connection_id, service.get_table_structure, name), timeout)
+            for name in table_names
+        ], return_exceptions=True)
+        structures = {}
+        for name, outcome in zip(table_names, outcomes):
+            if isinstance(outcome, BaseException):
+                failures[name] = outcome
+            else:
+                structures[name] = outcome
+    
+    results, errors = {}, []
+    for name in table_names:
+        if name in structures:
+            results[name] = _to_table_structure(structures[name])
+        elif isinstance(failures.get(name), asyncio.TimeoutError):
+            errors.append(error(name, 504, f"No answer within {timeout}s"))
+        elif name in failures:
+            errors.append(error(name, 500, str(failures[name])))
+        else:
+            errors.append(error(name, 404, f"Table '{name}' not found"))
+    return results, errors
+
+@router.get("/search")
+async def search_schema(q: str = Query(..., min_length=1, max_length=200),
+                        mode: str = Query("auto", description="auto, prefix, substring or fuzzy"),
+                        kind: Optional[str] = Query(None, description="table or column"),
+                        connection_id: Optional[str] = None,
+                        limit: int = Query(50, ge=1, le=1000)):
+    """
+    Find tables and columns by name across every open connection. Served
+    from an in-memory index that is built in the background and rebuilt
+    when a connection's schema changes
+    """
+    if mode not in SEARCH_MODES:
+        raise HTTPException(status_code=400, detail=f"Unsupported search mode '{mode}'")
+    if kind not in (None, "table", "column"):
+        raise HTTPException(status_code=400, detail=f"Unsupported kind '{kind}'")
+    
+    started = time.perf_counter()
+    results = schema_index.search(q, mode=mode, kind=kind, connection_id=connection_id, limit=limit)
+    return {
+        "query": q,
+        "mode": mode,
+        "results": results,
+        "took_ms": round((time.perf_counter() - started) * 1000, 3),
+        "index": schema_index.get_stats(),
+    }
+
+@router.post("/search/refresh")
+async def refresh_schema_index(connection_id: Optional[str] = None):
+    """Rebuild the search index for one connection, or all of them"""
+    schema_index.ensure_started()
+    schema_index.refresh(connection_id)
+    return {"status": "success", "message": "Schema index refresh scheduled"}
+
+@router.post("/structures", response_model=StructureBatchResponse)
+async def get_table_structures(batch_request: StructureBatchRequest):
+    """
+    Get the structure of many tables, across connections, in one request.
+    Connections are queried concurrently and each connection's tables are
+    reflected together; failures come back per table next to the results
+    """
+    tables_by_connection: Dict[str, List[str]] = {}
+    for item in batch_request.items:
+        names = tables_by_connection.setdefault(item.connection_id, [])
+        names.extend(name for name in item.tables if name not in names)
+    
+    outcomes = await asyncio.gather(*[
+        _load_structure_batch(connection_id, names, batch_request.timeout)
+        for connection_id, names in tables_by_connection.items()
+    ])
+    response = StructureBatchResponse(results={}, errors=[])
+    for connection_id, (results, errors) in zip(tables_by_connection, outcomes):
+        if results:
+            response.results[connection_id] = results
+        response.errors.extend(errors)
+    return response
+
+@router.post("/{connection_id}/metadata/refresh")
+async def refresh_metadata(connection_id: str):
+    """Drop cached table lists and structures so the next read hits the catalog"""
+    service = await connection_manager.get_connection_async(connection_id)
+    if not service:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    
+    service.invalidate_metadata()
+    return {
+        "status": "success",
+        "message": "Metadata cache cleared",
+        "cache": service.metadata_cache.get_stats()
+    }
+
+@router.get("/{connection_id}/metadata/stats")
+async def get_metadata_cache_stats(connection_id: str):
+    """Report metadata cache hit/miss counters"""
+    service = await connection_manager.get_connection_async(connection_id)
+    if not service:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    
+    return {
+        "connection_id": connection_id,
+        **service.metadata_cache.get_stats()
+    }
+
+@router.post("/{connection_id}/{table_name}/import")
+async def import_table_data(connection_id: str, table_name: str, request: Request,
+                            format: str = Query("csv", description="csv or ndjson"),
+                            header: bool = True,
+                            delimiter: str = Query(",", min_length=1, max_length=1),
+                            columns: Optional[str] = Query(None, description="Comma-separated target columns"),
+                            encoding: str = "utf-8",
+                            batch_size: int = Query(DEFAULT_IMPORT_BATCH_SIZE, ge=1, le=100000),
+                            import_id: Optional[str] = None):
+    """
+    Load a CSV or NDJSON request body into a table. The body is parsed as it
+    arrives and written in batches inside one transaction, using COPY on
+    PostgreSQL, multi-row INSERT on MySQL and executemany on SQLite
+    """
+    service = await connection_manager.get_connection_async(connection_id)
+    if not service:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    if format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported import format '{format}'")
+    
+    loop = asyncio.get_running_loop()
+    chunks = request.stream().__aiter__()
+    
+    async def _next_chunk() -> bytes:
+        try:
+            return await chunks.__anext__()
+        except StopAsyncIteration:
+            return b""
+    
+    def read_chunk() -> bytes:
+        # Called from the worker thread; pulls the next body chunk from the event loop
+        return asyncio.run_coroutine_threadsafe(_next_chunk(), loop).result()
+    
+    progress = import_registry.start(connection_id, table_name, format, import_id)
+    try:
+        await query_executor.run(
+            connection_id, bulk_import, service, table_name, read_chunk, progress,
+            fmt=format,
+            columns=[name.strip() for name in columns.split(",")] if columns else None,
+            header=header,
+            delimiter=delimiter,
+            batch_size=batch_size,
+            encoding=encoding
+        )
+    except ImportValidationError as e:
+        import_registry.finish(progress, str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Import into {table_name} failed: {e}")
+        import_registry.finish(progress, str(e))
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    import_registry.finish(progress)
+    return import_registry.snapshot(progress)
+
+@router.get("/{connection_id}/imports")
+async def list_imports(connection_id: str):
+    """Progress and throughput of running and recent imports"""
+    return import_registry.list(connection_id)
+
+async def _copy_services(source_connection_id: str, target_connection_id: str):
+    source = await connection_manager.get_connection_async(source_connection_id)
+    target = await connection_manager.get_connection_async(target_connection_id)
+    if not source or not target:
+        raise HTTPException(status_code=404, detail="Connection not found")
+    return source, target
+
+@router.post("/copy")
+async def copy_table(copy_request: TableCopyRequest):
+    """
+    Copy a table to another connection in the background. The target table is
+    created with portable column types, then primary key ranges are streamed
+    by parallel workers into the target's bulk load path
+    """
+    source, target = await _copy_services(copy_request.source_connection_id, copy_request.target_connection_id)
+    try:
+        return await query_executor.run(
+            copy_request.source_connection_id, table_copier.start, source, target,
+            copy_request.table_name,
+            target_table=copy_request.target_table,
+            workers=copy_request.workers,
+            batch_size=copy_request.batch_size,
+            create_table=copy_request.create_table
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to start copy of {copy_request.table_name}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/copies")
+async def list_copies(connection_id: Optional[str] = None):
+    """Progress and throughput of running and recent table copies"""
+    return table_copier.list(connection_id)
+
+@router.get("/copies/{copy_id}")
+async def get_copy(copy_id: str):
+    """Progress of one table copy, range by range"""
+    copy = table_copier.get(copy_id)
+    if not copy:
+        raise HTTPException(status_code=404, detail="Copy not found")
+    return copy
+
+@router.post("/copies/{copy_id}/resume")
+async def resume_copy(copy_id: str):
+    """Continue a failed or cancelled copy from its last committed batches"""
+    copy = table_copier.get(copy_id)
+    if not copy:
+        raise HTTPException(status_code=404, detail="Copy not found")
+    source, target = await _copy_services(copy["source_connection_id"], copy["target_connection_id"])
+    try:
+        return table_copier.resume(copy_id, source, target)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.delete("/copies/{copy_id}")
+async def cancel_copy(copy_id: str):
+    """Stop a running copy; it keeps its progress and can be resumed"""
+    if not table_copier.get(copy_id):
+        raise HTTPException(status_code=404, detail="Copy not found")
+    if not table_copier.cancel(copy_id):
+        raise HTTPException(status_code=409, detail="Copy already finished")
+    return {"status": "success", "message": f"Copy {copy_id} cancelled"}
\ No newline at end of file
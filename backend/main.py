@@ -5,8 +5,14 @@ Serves both API and static frontend files
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import (
+    FileResponse,
+    JSONResponse,
+    ORJSONResponse,
+    PlainTextResponse,
+)
 from fastapi.middleware.cors import CORSMiddleware
+from utils.serialization import orjson
 import os
 import logging
 
@@ -20,6 +26,8 @@ app = FastAPI(
     title="Database Manager API",
     description="Universal database management tool API",
     version="1.0.0",
+    # orjson is optional; it serializes large structures several times faster
+    default_response_class=ORJSONResponse if orjson else JSONResponse,
 )
 
 # CORS middleware
@@ -31,14 +39,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency metrics
+from utils.middleware import MetricsMiddleware
+
+app.add_middleware(MetricsMiddleware)
+
+# Negotiated response compression, outermost so it sees the final body
+from utils.middleware import CompressionMiddleware
+
+app.add_middleware(CompressionMiddleware)
+
 # Import routers
-from api import connections, databases, tables, queries
+from api import connections, databases, tables, queries, jobs
 
 # Include API routers
 app.include_router(connections.router, prefix="/api/connections", tags=["Connections"])
 app.include_router(databases.router, prefix="/api/databases", tags=["Databases"])
 app.include_router(tables.router, prefix="/api/tables", tags=["Tables"])
 app.include_router(queries.router, prefix="/api/queries", tags=["Queries"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["Jobs"])
 
 # Serve frontend static files
 frontend_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frontend")
@@ -67,12 +86,38 @@ async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
 
 
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    from services.metrics import render_metrics
+
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+# Start indexing schemas so the first search finds them
+@app.on_event("startup")
+async def startup_event():
+    from services.schema_index import schema_index
+
+    schema_index.ensure_started()
+
+
 # Cleanup on shutdown
 @app.on_event("shutdown")
 async def shutdown_event():
     from services.connection_manager import connection_manager
-
+    from services.executor import query_executor
+    from services.job_queue import job_queue
+    from services.slow_query_log import slow_query_log
+    from services.table_copier import table_copier
+    from services.schema_index import schema_index
+
+    schema_index.shutdown()
+    table_copier.shutdown()
+    job_queue.shutdown()
     connection_manager.close_all()
+    query_executor.shutdown()
+    slow_query_log.shutdown()
     logging.info("All connections closed")
 
 
@@ -2,7 +2,7 @@
 Pydantic models for request/response validation
 """
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 from enum import Enum
 
 class DatabaseType(str, Enum):
@@ -10,6 +10,15 @@ class DatabaseType(str, Enum):
     postgresql = "postgresql"
     sqlite = "sqlite"
 
+class PoolSettings(BaseModel):
+    """Connection pool options; unset fields use the dialect default"""
+    pool_size: Optional[int] = Field(None, ge=0, description="0 disables pooling")
+    max_overflow: Optional[int] = Field(None, ge=0)
+    pool_recycle: Optional[int] = Field(None, description="Seconds before a connection is recycled")
+    pool_pre_ping: Optional[bool] = None
+    pool_timeout: Optional[float] = Field(None, gt=0, description="Seconds to wait for a free connection")
+    idle_timeout: Optional[int] = Field(None, gt=0, description="Seconds a connection may sit idle in the pool")
+
 class ConnectionCreate(BaseModel):
     connection_id: str
     name: str
@@ -20,6 +29,14 @@ class ConnectionCreate(BaseModel):
     password: Optional[str] = None
     database: Optional[str] = None
     ssl: bool = False
+    pool: Optional[PoolSettings] = None
+    max_concurrency: Optional[int] = Field(None, ge=1, description="Concurrent calls allowed on this connection")
+    statement_timeout: Optional[float] = Field(None, gt=0, description="Default statement timeout in seconds")
+    slow_query_threshold: Optional[float] = Field(None, ge=0, description="Log statements slower than this many seconds")
+    explain_slow_queries: Optional[bool] = Field(None, description="Capture the plan of logged slow statements")
+    sqlite_mode: Optional[Literal["readwrite", "readonly", "immutable"]] = Field(
+        None, description="Open SQLite files read-only, or immutable when nothing else writes to them"
+    )
 
 class ConnectionTest(BaseModel):
     db_type: DatabaseType
@@ -34,6 +51,21 @@ class ConnectionResponse(BaseModel):
     message: str
     connection_id: Optional[str] = None
 
+class PoolStatus(BaseModel):
+    connection_id: str
+    pool_class: str
+    size: int
+    checked_out: int
+    idle: int
+    overflow: int
+    checkouts: int
+    total_wait_ms: float
+    avg_wait_ms: float
+    max_wait_ms: float
+    settings: Dict[str, Any]
+    engine_id: Optional[str] = None
+    shared_by: int = 1
+
 class DatabaseInfo(BaseModel):
     name: str
     size: Optional[str] = None
@@ -43,6 +75,7 @@ class TableInfo(BaseModel):
     name: str
     row_count: Optional[int] = None
     size: Optional[str] = None
+    row_count_exact: bool = False
 
 class ColumnInfo(BaseModel):
     name: str
@@ -57,4 +90,42 @@ class TableStructure(BaseModel):
     primary_keys: List[str]
     indexes: List[Dict[str, Any]]
     foreign_keys: List[Dict[str, Any]]
-    
\ No newline at end of file
+
+class ForeignKeyEdge(BaseModel):
+    name: Optional[str] = None
+    table: str
+    columns: List[str]
+    referred_table: str
+    referred_columns: List[str]
+
+class SchemaSnapshot(BaseModel):
+    table_count: int
+    tables: Dict[str, TableStructure]
+    foreign_key_graph: List[ForeignKeyEdge]
+
+class TableCopyRequest(BaseModel):
+    source_connection_id: str
+    target_connection_id: str
+    table_name: str
+    target_table: Optional[str] = Field(None, description="Defaults to the source table name")
+    workers: int = Field(4, ge=1, le=32, description="Key ranges copied in parallel")
+    batch_size: int = Field(5000, ge=1, le=100000)
+    create_table: bool = Field(True, description="Create the target table when it does not exist")
+
+class StructureBatchItem(BaseModel):
+    connection_id: str
+    tables: List[str] = Field(..., min_length=1, max_length=1000)
+
+class StructureBatchRequest(BaseModel):
+    items: List[StructureBatchItem] = Field(..., min_length=1, max_length=50)
+    timeout: float = Field(10.0, gt=0, le=120, description="Seconds each connection's lookup may take")
+
+class StructureBatchError(BaseModel):
+    connection_id: str
+    table_name: str
+    status: int
+    detail: str
+
+class StructureBatchResponse(BaseModel):
+    results: Dict[str, Dict[str, TableStructure]]
+    errors: List[StructureBatchError]
\ No newline at end of file
@@ -1,74 +1,697 @@
 """
 Base database service with common functionality
 """
-from sqlalchemy import create_engine, text, inspect
+from sqlalchemy import create_engine, text, inspect, event, exc, select, insert, func, table, column
 from sqlalchemy.pool import NullPool
-from typing import List, Dict, Any
+from sqlalchemy.engine import make_url
+from services.metadata_cache import MetadataCache
+from services.query_cache import query_cache, is_cacheable, estimate_size, written_table
+from services.metrics import db_statement_seconds
+from services.slow_query_log import slow_query_log
+from services.engine_registry import engine_registry, WriteVersions
+from contextlib import contextmanager
+from typing import List, Dict, Any, Callable, Iterator, Tuple
+import json
+import re
+import threading
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
+ROW_RETURNING_STATEMENTS = ("SELECT", "WITH", "VALUES", "TABLE")
+DDL_STATEMENTS = ("CREATE", "ALTER", "DROP", "RENAME", "COMMENT")
+DML_KEYWORDS = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+TRAILING_LIMIT = re.compile(r"\blimit\s+\d+(\s*(,|offset)\s*\d+)?\s*$", re.IGNORECASE)
+TRAILING_FETCH = re.compile(r"\bfetch\s+(first|next)\s+\d*\s*rows?\s+only\s*$", re.IGNORECASE)
+TRAILING_OFFSET = re.compile(r"\s+offset\s+\d+(\s+rows?)?\s*$", re.IGNORECASE)
+# Row locking clauses come after LIMIT: FOR UPDATE/SHARE [OF ...] [NOWAIT | SKIP LOCKED], or MySQL's older form
+LOCKING_CLAUSE = re.compile(
+    r"(\s+for\s+(update|no\s+key\s+update|share|key\s+share)(\s+of\s+[\w$.\"`]+(\s*,\s*[\w$.\"`]+)*)?"
+    r"(\s+(nowait|skip\s+locked))?)+\s*$|\s+lock\s+in\s+share\s+mode\s*$",
+    re.IGNORECASE
+)
+
+def format_size(size_bytes: int) -> str:
+    """Format a byte count the way database sizes are reported"""
+    if size_bytes is None:
+        return None
+    return f"{size_bytes / (1024 * 1024):.2f} MB"
+
+class QueryInterruptedError(RuntimeError):
+    """Raised when a statement is stopped before it finishes"""
+
+class QueryTimeoutError(QueryInterruptedError):
+    """Raised when a statement runs past its timeout"""
+
+class QueryCancelledError(QueryInterruptedError):
+    """Raised when a statement is cancelled by query id"""
+
 class BaseDatabaseService:
-    def __init__(self, connection_string: str):
+    # Statement prefix that returns a plan without running the query
+    explain_prefix: str = None
+    
+    # Pool defaults, overridden per dialect and per connection
+    default_pool_settings: Dict[str, Any] = {
+        "pool_size": 5,
+        "max_overflow": 10,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "pool_timeout": 30,
+        "idle_timeout": None,
+    }
+    
+    def __init__(self, connection_string: str, pool_settings: Dict[str, Any] = None,
+                 connection_id: str = None, statement_timeout: float = None):
         self.connection_string = connection_string
+        self.connection_id = connection_id
+        self.pool_settings = {**self.default_pool_settings, **(pool_settings or {})}
+        self.statement_timeout = statement_timeout
         self.engine = None
+        self.engine_id = None
+        self._engine_key = None
+        self.metadata_cache = MetadataCache()
+        self._control_engine = None
+        self._wait_lock = threading.Lock()
+        self._wait_stats = {"checkouts": 0, "total": 0.0, "max": 0.0}
+        self._running_lock = threading.Lock()
+        self._running: Dict[str, Any] = {}
+        self._cancelled = set()
+        self.write_versions = WriteVersions()
     
-    def connect(self):
-        """Create database engine connection"""
+    def get_engine_options(self) -> Dict[str, Any]:
+        """Build create_engine() pool arguments from the pool settings"""
+        settings = self.pool_settings
+        if not settings.get("pool_size"):
+            return {"poolclass": NullPool}
+        
+        recycle = settings.get("pool_recycle")
+        return {
+            "pool_size": settings["pool_size"],
+            "max_overflow": settings.get("max_overflow") or 0,
+            "pool_recycle": recycle if recycle else -1,
+            "pool_pre_ping": bool(settings.get("pool_pre_ping")),
+            "pool_timeout": settings.get("pool_timeout") or 30,
+        }
+    
+    @property
+    def database_key(self) -> str:
+        """
+        Identifies the database itself, whichever credentials, pool or URL
+        options reach it, so a write through one connection reaches the others
+        """
+        url = make_url(self.connection_string)
+        return f"{url.get_backend_name()}://{(url.host or '').lower()}:{url.port or ''}/{url.database or ''}"
+    
+    def can_share_engine(self) -> bool:
+        """Whether other logical connections may reuse this connection's engine"""
+        return True
+    
+    def connect(self, shared: bool = True, verify: bool = True):
+        """
+        Create database engine connection. Shared connections reuse the
+        engine and catalog cache of any connection with the same URL and pool
+        options; unshared ones get a private engine. Without verify no
+        connection is opened until the engine is first used
+        """
         try:
-            self.engine = create_engine(
-                self.connection_string,
-                poolclass=NullPool,
-                echo=False
-            )
+            options = self.get_engine_options()
+            if shared and self.can_share_engine():
+                self._engine_key = engine_registry.make_key(self.connection_string, self.pool_settings, options)
+                entry = engine_registry.acquire(
+                    self._engine_key, lambda: self._create_engine(options), self.database_key
+                )
+                self.engine = entry["engine"]
+                self.engine_id = entry["engine_id"]
+                self.metadata_cache = entry["metadata_cache"]
+                self.write_versions = entry["write_versions"]
+            else:
+                self.engine = self._create_engine(options)
             # Test connection
-            with self.engine.connect() as conn:
-                conn.execute(text("SELECT 1"))
+            if verify:
+                self.ping()
             return True
         except Exception as e:
             logger.error(f"Connection failed: {e}")
+            self.disconnect()
             raise
     
+    def _create_engine(self, options: Dict[str, Any]):
+        engine = create_engine(self.connection_string, echo=False, **options)
+        self._install_pool_events(engine, self.pool_settings.get("idle_timeout"))
+        self._install_statement_timing(engine)
+        return engine
+    
+    @staticmethod
+    def _install_pool_events(engine, idle_timeout: float = None):
+        """Discard pooled connections that sat idle longer than idle_timeout"""
+        if not idle_timeout:
+            return
+        
+        @event.listens_for(engine, "checkin")
+        def _on_checkin(dbapi_connection, connection_record):
+            connection_record.info["last_checkin"] = time.monotonic()
+        
+        @event.listens_for(engine, "checkout")
+        def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+            last_checkin = connection_record.info.pop("last_checkin", None)
+            if last_checkin is not None and time.monotonic() - last_checkin > idle_timeout:
+                # The pool invalidates this connection and retries with a fresh one
+                raise exc.DisconnectionError("Pooled connection exceeded idle_timeout")
+    
+    @staticmethod
+    def _install_statement_timing(engine):
+        """
+        Record how long each statement spends on the database, attributed to
+        the logical connection that checked it out since engines are shared
+        """
+        @event.listens_for(engine, "before_cursor_execute")
+        def _before_execute(conn, cursor, statement, parameters, context, executemany):
+            conn.info["statement_start"] = time.perf_counter()
+        
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after_execute(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info.pop("statement_start", None)
+            if started is None:
+                return
+            duration = time.perf_counter() - started
+            options = context.execution_options if context is not None else {}
+            service = options.get("dbm_service")
+            db_statement_seconds.observe(duration, connection_id=(service and service.connection_id) or "")
+            # User statements are logged by their caller, with fetch time and row counts
+            if service is not None and not options.get("user_statement"):
+                slow_query_log.record(
+                    service, statement, parameters, duration, cursor.rowcount,
+                    source="internal", driver_sql=True
+                )
+    
+    @contextmanager
+    def connection(self):
+        """Check a connection out of the pool, recording how long it took"""
+        start = time.perf_counter()
+        conn = self.engine.connect()
+        waited = time.perf_counter() - start
+        conn.execution_options(dbm_service=self)
+        with self._wait_lock:
+            self._wait_stats["checkouts"] += 1
+            self._wait_stats["total"] += waited
+            self._wait_stats["max"] = max(self._wait_stats["max"], waited)
+        with conn:
+            yield conn
+    
+    def get_pool_status(self) -> Dict[str, Any]:
+        """Report pool occupancy and checkout wait times"""
+        pool = self.engine.pool
+        
+        def _stat(name: str) -> int:
+            method = getattr(pool, name, None)
+            return max(method(), 0) if callable(method) else 0
+        
+        with self._wait_lock:
+            stats = dict(self._wait_stats)
+        checkouts = stats["checkouts"]
+        return {
+            "pool_class": type(pool).__name__,
+            "size": _stat("size"),
+            "checked_out": _stat("checkedout"),
+            "idle": _stat("checkedin"),
+            "overflow": _stat("overflow"),
+            "checkouts": checkouts,
+            "total_wait_ms": round(stats["total"] * 1000, 3),
+            "avg_wait_ms": round(stats["total"] * 1000 / checkouts, 3) if checkouts else 0.0,
+            "max_wait_ms": round(stats["max"] * 1000, 3),
+            "settings": dict(self.pool_settings),
+            "engine_id": self.engine_id,
+            "shared_by": engine_registry.get_refs(self._engine_key) if self._engine_key else 1,
+        }
+    
     def disconnect(self):
         """Close database connection"""
-        if self.engine:
+        if self._engine_key:
+            engine_registry.release(self._engine_key)
+            self._engine_key = None
+            self.engine_id = None
+        elif self.engine:
             self.engine.dispose()
-            self.engine = None
+        self.engine = None
+        if self._control_engine:
+            self._control_engine.dispose()
+            self._control_engine = None
+    
+    @contextmanager
+    def control_connection(self):
+        """Unpooled connection for out-of-band commands, so a full pool cannot block them"""
+        if self._control_engine is None:
+            self._control_engine = create_engine(self.connection_string, poolclass=NullPool)
+        with self._control_engine.connect() as conn:
+            yield conn
+    
+    def get_backend_handle(self, conn) -> Any:
+        """Identify the server session behind a connection - overridden per dialect"""
+        return None
+    
+    def cancel_backend(self, handle: Any):
+        """Cancel the statement running in a server session - overridden per dialect"""
+        raise NotImplementedError("Query cancellation is not supported for this database")
+    
+    @contextmanager
+    def with_statement_timeout(self, conn, seconds: float = None):
+        """Apply a native statement timeout for the block - overridden per dialect"""
+        yield
+    
+    def is_interrupted(self, error: exc.DBAPIError) -> bool:
+        """Whether a driver error means the statement was timed out or cancelled - overridden per dialect"""
+        return False
+    
+    @contextmanager
+    def write_lock(self, is_read: bool = False):
+        """Serialize writers where the database allows only one at a time - overridden per dialect"""
+        yield
+    
+    @contextmanager
+    def _track_statement(self, conn, query_id: str = None, timeout: float = None):
+        """
+        Make the running statement cancellable by query id and apply its
+        timeout. Interrupted statements raise QueryTimeoutError or
+        QueryCancelledError, whatever the dialect reports them as
+        """
+        timeout = timeout or self.statement_timeout
+        if query_id:
+            handle = self.get_backend_handle(conn)
+            with self._running_lock:
+                self._running[query_id] = handle
+        try:
+            with self.with_statement_timeout(conn, timeout):
+                yield
+        except exc.DBAPIError as e:
+            if not self.is_interrupted(e):
+                raise
+            with self._running_lock:
+                cancelled = query_id in self._cancelled
+            if cancelled or not timeout:
+                raise QueryCancelledError(f"Query {query_id} was cancelled" if query_id else "Query was cancelled") from e
+            raise QueryTimeoutError(f"Statement exceeded its timeout of {timeout:g}s") from e
+        finally:
+            if query_id:
+                # Waits for an in-progress cancel, so it never hits the next statement
+                with self._running_lock:
+                    self._running.pop(query_id, None)
+                    self._cancelled.discard(query_id)
+    
+    def cancel_query(self, query_id: str) -> bool:
+        """Cancel a running statement server-side; False if it is not running"""
+        with self._running_lock:
+            handle = self._running.get(query_id)
+            if handle is None:
+                return False
+            self.cancel_backend(handle)
+            self._cancelled.add(query_id)
+        return True
+    
+    def explain_query(self, query: str, params: Any = None, driver_sql: bool = False) -> Any:
+        """Capture a statement's plan on a side connection, without executing it"""
+        if not self.explain_prefix:
+            raise NotImplementedError("Plan capture is not supported for this database")
+        
+        statement = self.explain_prefix + query.strip().rstrip(";")
+        with self.control_connection() as conn:
+            if driver_sql:
+                if isinstance(params, list):
+                    params = params[0] if params else None
+                result = conn.exec_driver_sql(statement, params or ())
+            else:
+                result = conn.execute(text(statement), params or {})
+            rows = result.fetchall()
+        
+        # JSON plans come back as a single value, tabular plans as rows
+        if len(rows) == 1 and len(rows[0]) == 1:
+            plan = rows[0][0]
+            return json.loads(plan) if isinstance(plan, str) else plan
+        return [dict(row._mapping) for row in rows]
+    
+    def ping(self, unpooled: bool = False):
+        """
+        Run a trivial statement, raising if the server cannot be reached.
+        Unpooled pings never wait behind a busy pool
+        """
+        with self.control_connection() if unpooled else self.connection() as conn:
+            conn.execute(text("SELECT 1"))
     
     def test_connection(self) -> bool:
         """Test if connection is valid"""
         try:
-            with self.engine.connect() as conn:
-                conn.execute(text("SELECT 1"))
+            self.ping()
             return True
         except:
             return False
     
-    def execute_query(self, query: str, params: Dict = None):
+    @staticmethod
+    def get_query_type(query: str) -> str:
+        """Return the leading SQL keyword of a statement"""
+        words = query.lstrip().split(None, 1)
+        return words[0].upper() if words else ""
+    
+    def apply_limit(self, query: str, limit: int = None) -> str:
+        """
+        Push a row limit into a read query unless it already has one. The
+        limit goes in ahead of a trailing OFFSET or row locking clause
+        """
+        query = query.strip().rstrip(";").rstrip()
+        if not limit or not self.is_read_query(query):
+            return query
+        lock = LOCKING_CLAUSE.search(query)
+        body, tail = (query[:lock.start()], query[lock.start():]) if lock else (query, "")
+        if TRAILING_LIMIT.search(body) or TRAILING_FETCH.search(body):
+            return query
+        offset = TRAILING_OFFSET.search(body)
+        if offset:
+            body, tail = body[:offset.start()], body[offset.start():] + tail
+        return f"{body}\nLIMIT {int(limit)}{tail}"
+    
+    def invalidate_metadata(self, query: str = None):
+        """Drop cached catalog data, or only if the given statement is DDL"""
+        if query is None or self.get_query_type(query) in DDL_STATEMENTS:
+            self.metadata_cache.invalidate()
+    
+    def is_read_query(self, query: str) -> bool:
+        """Whether a statement only reads data"""
+        query_type = self.get_query_type(query)
+        if query_type == "WITH":
+            # Data-modifying CTEs must commit, take the write lock and invalidate like any write
+            return not DML_KEYWORDS.search(query)
+        return query_type in ROW_RETURNING_STATEMENTS
+    
+    def _after_write(self, query: str):
+        """Drop cached metadata and results a write statement may have changed"""
+        self.invalidate_metadata(query)
+        query_cache.invalidate(self.database_key, query)
+        self.write_versions.bump(written_table(query))
+    
+    def get_write_version(self, table_name: str) -> Tuple[int, int, int]:
+        """
+        Writes made to a table through any connection to this database, and
+        to tables that could not be told apart; either changing means the
+        table may have changed
+        """
+        return self.write_versions.get(table_name)
+    
+    def random_predicate(self, fraction: float) -> str:
+        """Condition true for about the given fraction of rows - overridden per dialect"""
+        raise NotImplementedError("Row sampling is not supported for this database")
+    
+    def select_sample(self, table_name: str, columns: List[str], fraction: float = None) -> str:
+        """SELECT of some columns over a random fraction of the rows, or all of them without one"""
+        quote = self.engine.dialect.identifier_preparer.quote
+        sql = f"SELECT {', '.join(quote(name) for name in columns)} FROM {quote(table_name)}"
+        if fraction is None or fraction >= 1:
+            return sql
+        return f"{sql} WHERE {self.random_predicate(fraction)}"
+    
+    def execute_query(self, query: str, params: Dict = None, limit: int = None,
+                      use_cache: bool = False, cache_ttl: float = None,
+                      timeout: float = None, query_id: str = None):
         """Execute a query and return results"""
-        with self.engine.connect() as conn:
-            result = conn.execute(text(query), params or {})
-            if result.returns_rows:
-                return result.fetchall()
-            return result.rowcount
+        is_read = self.is_read_query(query)
+        use_cache = use_cache and is_read and is_cacheable(query)
+        cache_key = query_cache.make_key(self.database_key, self.connection_id, query, params, limit)
+        if use_cache:
+            cached = query_cache.get(cache_key)
+            if cached is not None:
+                return cached[1]
+        
+        sql = self.apply_limit(query, limit)
+        started = time.perf_counter()
+        rows_returned = None
+        try:
+            with self.write_lock(is_read), self.connection() as conn, \
+                    self._track_statement(conn, query_id, timeout):
+                result = conn.execute(text(sql), params or {}, execution_options={"user_statement": True})
+                if not is_read:
+                    rows = result.fetchall() if result.returns_rows else result.rowcount
+                    rows_returned = len(rows) if result.returns_rows else rows
+                    conn.commit()
+                    self._after_write(query)
+                    return rows
+                
+                rows = [tuple(row) for row in (result.fetchmany(limit) if limit else result.fetchall())]
+                rows_returned = len(rows)
+                if use_cache:
+                    query_cache.put(cache_key, list(result.keys()), rows, estimate_size(rows), cache_ttl)
+                return rows
+        finally:
+            slow_query_log.record(self, sql, params, time.perf_counter() - started, rows_returned)
+    
+    def stream_query(self, query: str, params: Dict = None, limit: int = None,
+                     chunk_size: int = 1000, use_cache: bool = False,
+                     cache_ttl: float = None, timeout: float = None,
+                     query_id: str = None) -> Iterator[Dict[str, Any]]:
+        """
+        Execute a query on a server-side cursor, yielding its columns first
+        and then lists of row tuples of at most chunk_size rows. With
+        use_cache, read results are served from and stored in the result cache
+        """
+        is_read = self.is_read_query(query)
+        use_cache = use_cache and is_read and is_cacheable(query)
+        cache_key = query_cache.make_key(self.database_key, self.connection_id, query, params, limit)
+        if use_cache:
+            cached = query_cache.get(cache_key)
+            if cached is not None:
+                columns, rows = cached
+                yield {"columns": columns, "cached": True}
+                for start in range(0, len(rows), chunk_size):
+                    yield {"rows": rows[start:start + chunk_size]}
+                return
+        
+        sql = self.apply_limit(query, limit)
+        started = time.perf_counter()
+        rows_returned = 0
+        try:
+            with self.write_lock(is_read), self.connection() as conn, \
+                    self._track_statement(conn, query_id, timeout):
+                options = {"user_statement": True}
+                if is_read:
+                    options["yield_per"] = chunk_size
+                result = conn.execute(text(sql), params or {}, execution_options=options)
+                if not is_read:
+                    # Writes, including RETURNING ones, are committed before replying
+                    rows = result.fetchall() if result.returns_rows else []
+                    columns = list(result.keys()) if result.returns_rows else []
+                    conn.commit()
+                    self._after_write(query)
+                    rows_returned = len(rows) if result.returns_rows else result.rowcount
+                    yield {"columns": columns, "rowcount": 0 if result.returns_rows else result.rowcount}
+                    if rows:
+                        yield {"rows": rows}
+                    return
+                
+                columns = list(result.keys())
+                collected, collected_size = ([], 0) if use_cache else (None, 0)
+                remaining = limit or None
+                try:
+                    yield {"columns": columns}
+                    for partition in result.partitions(chunk_size):
+                        if remaining is not None:
+                            partition = partition[:remaining]
+                            remaining -= len(partition)
+                        if collected is not None:
+                            partition = [tuple(row) for row in partition]
+                            collected.extend(partition)
+                            collected_size += estimate_size(partition)
+                            # Stop collecting once the result could never fit
+                            if collected_size > query_cache.max_entry_bytes:
+                                collected = None
+                        rows_returned += len(partition)
+                        yield {"rows": partition}
+                        if remaining == 0:
+                            break
+                finally:
+                    # Release the cursor before the timeout is reset on this session
+                    result.close()
+                
+                # Only results read to the end are cached
+                if collected is not None:
+                    query_cache.put(cache_key, columns, collected, collected_size, cache_ttl)
+        finally:
+            # Wall time until the last row was read, so slow consumers count too
+            slow_query_log.record(self, sql, params, time.perf_counter() - started, rows_returned)
+    
+    @contextmanager
+    def bulk_load_session(self, conn):
+        """Session settings for the duration of a bulk load - overridden per dialect"""
+        yield
+    
+    def adapt_value(self, value: Any) -> Any:
+        """Turn a value the driver cannot bind into one it can - overridden per dialect"""
+        return value
+    
+    def bind_processors(self, dialect, types: List[Any]) -> List[Callable[[Any], Any]]:
+        """
+        Per column, a function giving the value the driver should bind: the
+        column type's own bind processing, as an ORM insert would apply it,
+        for values of the type's Python type, and adapt_value for the rest
+        """
+        adapt = self.adapt_value
+        processors = []
+        for type_ in types:
+            process = type_.dialect_impl(dialect).bind_processor(dialect) if type_ is not None else None
+            try:
+                python_type = type_.python_type if process else None
+            except NotImplementedError:
+                python_type = None
+            if python_type is None:
+                processors.append(adapt)
+                continue
+            # JSON documents may be arrays as well
+            accepted = (dict, list) if python_type is dict else python_type
+            processors.append(
+                lambda value, process=process, accepted=accepted:
+                    process(value) if isinstance(value, accepted) else adapt(value)
+            )
+        return processors
+    
+    def bulk_insert(self, conn, table_name: str, columns: List[str], rows: List[tuple],
+                    types: List[Any] = None):
+        """
+        Insert a batch of row tuples with one executemany. Values are bound
+        for the target column types when they are given. PyMySQL rewrites
+        it into multi-row INSERT statements - overridden per dialect
+        """
+        types = types or [None] * len(columns)
+        marker = {"qmark": "?", "format": "%s", "pyformat": "%s"}.get(conn.dialect.paramstyle)
+        if marker is None:
+            tbl = table(table_name, *[column(name, type_) for name, type_ in zip(columns, types)])
+            conn.execute(insert(tbl), [dict(zip(columns, row)) for row in rows])
+            return
+        processors = self.bind_processors(conn.dialect, types)
+        quote = conn.dialect.identifier_preparer.quote
+        conn.exec_driver_sql(
+            f"INSERT INTO {quote(table_name)} ({', '.join(quote(name) for name in columns)}) "
+            f"VALUES ({', '.join([marker] * len(columns))})",
+            [tuple(process(value) for process, value in zip(processors, row)) for row in rows]
+        )
+    
+    def after_bulk_load(self, table_name: str):
+        """Drop cached results that read a table that was just loaded"""
+        self._after_write(f"INSERT INTO {table_name}")
     
     def get_databases(self) -> List[str]:
         """Get list of databases - must be implemented by subclass"""
         raise NotImplementedError
     
+    def get_database_summaries(self) -> List[Dict[str, Any]]:
+        """
+        Get name, size and table count for every database. Subclasses
+        override this with a single catalog query; this fallback asks per database
+        """
+        summaries = []
+        for db_name in self.get_databases():
+            try:
+                summaries.append({
+                    "name": db_name,
+                    "size": self.get_database_size(db_name),
+                    "tables_count": self.get_table_count(db_name)
+                })
+            except Exception as e:
+                logger.warning(f"Could not get info for database {db_name}: {e}")
+                summaries.append({"name": db_name})
+        return summaries
+    
     def get_tables(self, database: str = None) -> List[str]:
         """Get list of tables in database"""
-        inspector = inspect(self.engine)
-        return inspector.get_table_names()
+        return self.metadata_cache.get_or_load(
+            ("tables", database), lambda: self._load_tables(database)
+        )
     
     def get_table_structure(self, table_name: str) -> Dict[str, Any]:
         """Get table structure details"""
-        inspector = inspect(self.engine)
+        return self.metadata_cache.get_or_load(
+            ("structure", table_name), lambda: self._load_table_structure(table_name)
+        )
+    
+    def get_table_structures(self, table_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the structure of several tables: cached ones as they are, the rest
+        reflected together. Tables that do not exist are left out
+        """
+        structures = {}
+        missing = []
+        for table_name in table_names:
+            structure = self.metadata_cache.get(("structure", table_name))
+            if structure is None:
+                missing.append(table_name)
+            else:
+                structures[table_name] = structure
+        if missing:
+            structures.update(self._load_table_structures(missing))
+        return structures
+    
+    def get_table_stats(self, table_names: List[str] = None, exact: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Get estimated row count and size in bytes per table from catalog
+        statistics. The listing of every table is cached next to the table
+        list; named tables are always looked up, and only those
+        """
+        if table_names is not None:
+            return self._load_table_stats(table_names, exact)
+        return self.metadata_cache.get_or_load(("table_stats", exact), lambda: self._load_table_stats(None, exact))
+    
+    def _load_table_stats(self, table_names: List[str] = None, exact: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Read statistics for the given tables or all of them in one query; exact
+        allows sizes that take a full read to compute - overridden per dialect
+        """
+        return {}
+    
+    def count_rows(self, table_name: str, timeout: float = None) -> int:
+        """Get the exact row count of a table"""
+        with self.connection() as conn, self.with_statement_timeout(conn, timeout):
+            return conn.execute(select(func.count()).select_from(table(table_name))).scalar()
+    
+    def get_schema_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Get the structure of every table, keyed by table name"""
+        return self.metadata_cache.get_or_load(("snapshot",), self._load_schema_snapshot)
+    
+    def _load_schema_snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Reflect all tables with four multi-table catalog queries"""
+        return self._load_table_structures()
+    
+    def _load_table_structures(self, table_names: List[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Reflect the given tables, or all of them, with four multi-table catalog queries"""
+        with self.connection() as conn:
+            inspector = inspect(conn)
+            columns = inspector.get_multi_columns(filter_names=table_names)
+            pk_constraints = inspector.get_multi_pk_constraint(filter_names=table_names)
+            indexes = inspector.get_multi_indexes(filter_names=table_names)
+            foreign_keys = inspector.get_multi_foreign_keys(filter_names=table_names)
+        
+        structures = {}
+        for key, table_columns in columns.items():
+            pk_constraint = pk_constraints.get(key) or {}
+            structures[key[1]] = {
+                "columns": table_columns,
+                "primary_keys": pk_constraint.get('constrained_columns', []),
+                "indexes": indexes.get(key, []),
+                "foreign_keys": foreign_keys.get(key, [])
+            }
         
-        columns = inspector.get_columns(table_name)
-        pk_constraint = inspector.get_pk_constraint(table_name)
-        indexes = inspector.get_indexes(table_name)
-        foreign_keys = inspector.get_foreign_keys(table_name)
+        # Seed the per-table cache so later structure requests are free
+        for table_name, structure in structures.items():
+            self.metadata_cache.put(("structure", table_name), structure)
+        return structures
+    
+    def _load_tables(self, database: str = None) -> List[str]:
+        """Read table names from the catalog"""
+        with self.connection() as conn:
+            return inspect(conn).get_table_names()
+    
+    def _load_table_structure(self, table_name: str) -> Dict[str, Any]:
+        """Read table structure from the catalog"""
+        with self.connection() as conn:
+            inspector = inspect(conn)
+            columns = inspector.get_columns(table_name)
+            pk_constraint = inspector.get_pk_constraint(table_name)
+            indexes = inspector.get_indexes(table_name)
+            foreign_keys = inspector.get_foreign_keys(table_name)
         
         return {
             "columns": columns,
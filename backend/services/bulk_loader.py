@@ -0,0 +1,295 @@
+"""
+Streaming bulk import of CSV and NDJSON into tables
+"""
+from collections import OrderedDict
+from datetime import date, datetime, time as time_of_day
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import csv
+import io
+import json
+import os
+import threading
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IMPORT_BATCH_SIZE = int(os.getenv("DBM_IMPORT_BATCH_SIZE", "5000"))
+IMPORT_FORMATS = ("csv", "ndjson")
+TRUE_VALUES = ("1", "true", "t", "yes", "y")
+FALSE_VALUES = ("0", "false", "f", "no", "n")
+
+class ImportValidationError(ValueError):
+    """Raised when an input row does not fit the target table"""
+
+class BodyReader(io.RawIOBase):
+    """File-like view over a chunk source, reading only as much as the parser asks for"""
+    
+    def __init__(self, read_chunk: Callable[[], bytes]):
+        self._read_chunk = read_chunk
+        self._buffer = memoryview(b"")
+        self._eof = False
+        self.bytes_read = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, target) -> int:
+        while not self._buffer and not self._eof:
+            chunk = self._read_chunk()
+            if not chunk:
+                self._eof = True
+                break
+            self.bytes_read += len(chunk)
+            self._buffer = memoryview(chunk)
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+def _column_converter(column: Dict[str, Any], from_text: bool) -> Callable[[Any], Any]:
+    """Build a function that coerces one input value to the column's Python type"""
+    type_ = column["type"]
+    try:
+        python_type = type_.python_type
+    except (NotImplementedError, AttributeError):
+        python_type = None
+    length = getattr(type_, "length", None)
+    
+    def convert(value):
+        if value is None or (from_text and value == "" and python_type is not str):
+            return None
+        if python_type is bool:
+            if isinstance(value, bool):
+                return value
+            text_value = str(value).strip().lower()
+            if text_value in TRUE_VALUES:
+                return True
+            if text_value in FALSE_VALUES:
+                return False
+            raise ValueError(f"not a boolean: {value!r}")
+        if python_type is int:
+            if isinstance(value, float) and not value.is_integer():
+                raise ValueError(f"not an integer: {value!r}")
+            return int(value)
+        if python_type is float:
+            return float(value)
+        if python_type is Decimal:
+            try:
+                return Decimal(str(value))
+            except InvalidOperation:
+                raise ValueError(f"not a number: {value!r}")
+        if python_type in (datetime, date, time_of_day):
+            return python_type.fromisoformat(value) if isinstance(value, str) else value
+        if python_type is bytes:
+            if isinstance(value, str):
+                return bytes.fromhex(value[2:]) if value.startswith("\\x") else value.encode()
+            return value
+        if python_type in (dict, list) and from_text and isinstance(value, str):
+            return json.loads(value)
+        if python_type is str:
+            if isinstance(value, (dict, list)):
+                value = json.dumps(value)
+            elif not isinstance(value, str):
+                value = str(value)
+            if length and len(value) > length:
+                raise ValueError(f"longer than {length} characters")
+        return value
+    
+    return convert
+
+def _required_columns(structure: Dict[str, Any]) -> set:
+    """Columns that reject NULL and have nothing to fill them in"""
+    # A lone primary key may be generated (SQLite rowid aliases, identity columns)
+    generated = set(structure["primary_keys"]) if len(structure["primary_keys"]) == 1 else set()
+    return {
+        col["name"] for col in structure["columns"]
+        if not col.get("nullable", True) and col.get("default") is None
+        and col.get("autoincrement") is not True and col.get("computed") is None
+        and col["name"] not in generated
+    }
+
+def _parse_csv(text: io.TextIOBase, columns: Optional[List[str]], header: bool,
+               delimiter: str) -> Tuple[List[str], Iterator[Tuple[int, List[Any]]]]:
+    reader = csv.reader(text, delimiter=delimiter)
+    if header:
+        first = next(reader, None)
+        if first is None:
+            return columns or [], iter(())
+        columns = columns or first
+    if not columns:
+        raise ImportValidationError("CSV input needs a header row or explicit columns")
+    width = len(columns)
+    
+    def rows():
+        for values in reader:
+            if not values:
+                continue
+            if len(values) != width:
+                raise ImportValidationError(
+                    f"Line {reader.line_num}: expected {width} fields, got {len(values)}"
+                )
+            yield reader.line_num, values
+    return columns, rows()
+
+def _parse_ndjson(text: io.TextIOBase,
+                  columns: Optional[List[str]]) -> Tuple[List[str], Iterator[Tuple[int, List[Any]]]]:
+    lines = enumerate(text, start=1)
+    first = None
+    for line_num, line in lines:
+        if line.strip():
+            first = (line_num, line)
+            break
+    if first is None:
+        return columns or [], iter(())
+    
+    def load(line_num: int, line: str) -> Dict[str, Any]:
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ImportValidationError(f"Line {line_num}: invalid JSON ({e})")
+        if not isinstance(record, dict):
+            raise ImportValidationError(f"Line {line_num}: expected a JSON object")
+        return record
+    
+    first_record = load(*first)
+    columns = columns or list(first_record)
+    known = set(columns)
+    
+    def rows():
+        yield first[0], [first_record.get(name) for name in columns]
+        for line_num, line in lines:
+            if not line.strip():
+                continue
+            record = load(line_num, line)
+            extra = set(record) - known
+            if extra:
+                raise ImportValidationError(f"Line {line_num}: unexpected fields {sorted(extra)}")
+            yield line_num, [record.get(name) for name in columns]
+    return columns, rows()
+
+class ImportRegistry:
+    """Progress of running and recently finished imports"""
+    
+    def __init__(self, max_finished: int = 100):
+        self.max_finished = max_finished
+        self._imports: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def start(self, connection_id: str, table_name: str, fmt: str, import_id: str = None) -> Dict[str, Any]:
+        progress = {
+            "import_id": import_id or uuid.uuid4().hex,
+            "connection_id": connection_id,
+            "table": table_name,
+            "format": fmt,
+            "status": "running",
+            "rows_loaded": 0,
+            "bytes_read": 0,
+            "batches": 0,
+            "started_at": time.time(),
+            "finished_at": None,
+            "error": None,
+        }
+        with self._lock:
+            self._imports[progress["import_id"]] = progress
+            finished = [key for key, entry in self._imports.items() if entry["status"] != "running"]
+            for key in finished[:max(len(finished) - self.max_finished, 0)]:
+                del self._imports[key]
+        return progress
+    
+    def finish(self, progress: Dict[str, Any], error: str = None):
+        progress["status"] = "failed" if error else "completed"
+        progress["error"] = error
+        progress["finished_at"] = time.time()
+    
+    def snapshot(self, progress: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of a progress record with elapsed time and throughput"""
+        entry = dict(progress)
+        elapsed = (entry["finished_at"] or time.time()) - entry["started_at"]
+        entry["elapsed"] = round(elapsed, 3)
+        entry["rows_per_second"] = round(entry["rows_loaded"] / elapsed, 1) if elapsed > 0 else 0.0
+        entry["mb_per_second"] = round(entry["bytes_read"] / elapsed / (1024 * 1024), 3) if elapsed > 0 else 0.0
+        return entry
+    
+    def list(self, connection_id: str = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = list(self._imports.values())
+        return [
+            self.snapshot(entry) for entry in entries
+            if connection_id is None or entry["connection_id"] == connection_id
+        ]
+    
+    def get(self, import_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._imports.get(import_id)
+        return self.snapshot(entry) if entry else None
+
+def bulk_import(service, table_name: str, read_chunk: Callable[[], bytes], progress: Dict[str, Any],
+                fmt: str = "csv", columns: List[str] = None, header: bool = True,
+                delimiter: str = ",", batch_size: int = DEFAULT_IMPORT_BATCH_SIZE,
+                encoding: str = "utf-8") -> Dict[str, Any]:
+    """
+    Parse an input stream incrementally and load it into a table in one
+    transaction, batch by batch through the dialect's bulk path. Memory use
+    is bounded by the batch size, not the input size
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format '{fmt}'")
+    structure = service.get_table_structure(table_name)
+    table_columns = {col["name"]: col for col in structure["columns"]}
+    
+    body = BodyReader(read_chunk)
+    # utf-8-sig tolerates the byte order mark spreadsheet exports add
+    if encoding.lower().replace("-", "").replace("_", "") == "utf8":
+        encoding = "utf-8-sig"
+    text = io.TextIOWrapper(io.BufferedReader(body, buffer_size=256 * 1024), encoding=encoding, newline="")
+    
+    if fmt == "csv":
+        columns, rows = _parse_csv(text, columns, header, delimiter)
+    else:
+        columns, rows = _parse_ndjson(text, columns)
+    
+    unknown = [name for name in columns if name not in table_columns]
+    if unknown:
+        raise ImportValidationError(f"Unknown columns for table '{table_name}': {unknown}")
+    required = _required_columns(structure)
+    missing = required - set(columns)
+    if missing:
+        raise ImportValidationError(f"Required columns missing from input: {sorted(missing)}")
+    converters = [_column_converter(table_columns[name], from_text=fmt == "csv") for name in columns]
+    types = [table_columns[name]["type"] for name in columns]
+    not_null = [name in required for name in columns]
+    
+    def batches() -> Iterator[List[tuple]]:
+        batch = []
+        for line_num, values in rows:
+            try:
+                row = tuple(convert(value) for convert, value in zip(converters, values))
+            except (ValueError, TypeError) as e:
+                raise ImportValidationError(f"Line {line_num}: {e}")
+            for name, value, required in zip(columns, row, not_null):
+                if required and value is None:
+                    raise ImportValidationError(f"Line {line_num}: column '{name}' cannot be null")
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    with service.connection() as conn, service.bulk_load_session(conn), conn.begin():
+        for batch in batches():
+            service.bulk_insert(conn, table_name, columns, batch, types)
+            progress["rows_loaded"] += len(batch)
+            progress["batches"] += 1
+            progress["bytes_read"] = body.bytes_read
+    
+    progress["bytes_read"] = body.bytes_read
+    # Cached results and table statistics for this table are now stale
+    service.after_bulk_load(table_name)
+    return progress
+
+# Global import progress registry
+import_registry = ImportRegistry()
\ No newline at end of file
@@ -4,21 +4,47 @@ Manages active database connections
 from services.mysql_service import MySQLService
 from services.postgresql_service import PostgreSQLService
 from services.sqlite_service import SQLiteService
+from services.executor import query_executor
+from services.query_cache import query_cache
+from services.slow_query_log import slow_query_log
+from services.health_monitor import HealthMonitor, is_connectivity_error
+from services.connection_store import ConnectionStore, DEFAULT_CONNECTION_DB
 from models.schemas import DatabaseType
-from typing import Dict, Optional
+from contextlib import contextmanager
+from typing import Dict, Optional, Any, List
+from urllib.parse import quote
+import asyncio
+import os
+import threading
+import time
+import uuid
 import logging
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_PROFILE_RECHECK = float(os.getenv("DBM_PROFILE_RECHECK", "5"))
+
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, store: ConnectionStore = None, profile_recheck: float = DEFAULT_PROFILE_RECHECK):
         self.connections: Dict[str, any] = {}
+        self.running_queries: Dict[str, Dict[str, Any]] = {}
+        self._queries_lock = threading.Lock()
+        self._open_lock = threading.RLock()
+        self.health_monitor = HealthMonitor()
+        # Saved profiles let any worker process open a connection on first use
+        self.store = store
+        self.profile_recheck = profile_recheck
     
     def create_connection_string(self, db_type: DatabaseType, host: str, port: int, 
-                                  username: str, password: str, database: str = None) -> str:
+                                  username: str, password: str, database: str = None,
+                                  sqlite_mode: str = None) -> str:
         """Create database connection string"""
         
         if db_type == DatabaseType.sqlite:
+            if sqlite_mode in ("readonly", "immutable"):
+                # immutable=1 also skips locking, for files nothing else writes to
+                flags = "mode=ro&immutable=1" if sqlite_mode == "immutable" else "mode=ro"
+                return f"sqlite:///file:{quote(os.path.abspath(database))}?{flags}&uri=true"
             return f"sqlite:///{database}"
         
         # Set default ports
@@ -46,12 +72,41 @@ class ConnectionManager:
     
     def create_connection(self, connection_id: str, db_type: DatabaseType, 
                           host: str, port: int, username: str, password: str, 
-                          database: str = None):
-        """Create and store a new connection"""
+                          database: str = None, pool_settings: Dict[str, Any] = None,
+                          max_concurrency: int = None, statement_timeout: float = None,
+                          slow_query_threshold: float = None, explain_slow_queries: bool = None,
+                          name: str = None, sqlite_mode: str = None, persist: bool = True):
+        """Create and store a new connection, saving its profile for other workers"""
+        profile = {
+            'name': name,
+            'db_type': DatabaseType(db_type).value,
+            'host': host,
+            'port': port,
+            'username': username,
+            'database': database,
+            'pool_settings': pool_settings,
+            'max_concurrency': max_concurrency,
+            'statement_timeout': statement_timeout,
+            'slow_query_threshold': slow_query_threshold,
+            'explain_slow_queries': explain_slow_queries,
+            'sqlite_mode': sqlite_mode,
+        }
+        with self._open_lock:
+            service = self._open(connection_id, profile, password)
+            if persist and self.store:
+                self.connections[connection_id]['version'] = self.store.save(connection_id, profile, password)
+        return service
+    
+    def _open(self, connection_id: str, profile: Dict[str, Any], password: str,
+              verify: bool = True, version: float = None):
+        """Build the service for a profile; without verify no I/O happens until first use"""
         try:
+            db_type = DatabaseType(profile['db_type'])
+            
             # Create connection string
             conn_string = self.create_connection_string(
-                db_type, host, port, username, password, database
+                db_type, profile['host'], profile['port'], profile['username'], password, profile['database'],
+                profile.get('sqlite_mode')
             )
             
             # Get service class
@@ -60,43 +115,218 @@ class ConnectionManager:
                 raise ValueError(f"Unsupported database type: {db_type}")
             
             # Create service instance
-            service = service_class(conn_string)
-            service.connect()
+            service = service_class(
+                conn_string, profile.get('pool_settings'),
+                connection_id=connection_id,
+                statement_timeout=profile.get('statement_timeout')
+            )
+            slow_query_log.configure(
+                connection_id, profile.get('slow_query_threshold'), profile.get('explain_slow_queries')
+            )
+            service.connect(verify=verify)
+            
+            # Cap concurrent calls at what the pool can actually serve; a shared
+            # pool is capped once for all the connections using it
+            max_concurrency = profile.get('max_concurrency')
+            if max_concurrency:
+                query_executor.set_limit(connection_id, max_concurrency)
+            else:
+                settings = service.pool_settings
+                pool_capacity = (settings.get("pool_size") or 0) + (settings.get("max_overflow") or 0)
+                query_executor.set_limit(
+                    connection_id,
+                    pool_capacity or query_executor.default_limit,
+                    group=service.engine_id and f"engine:{service.engine_id}"
+                )
             
-            # Store connection
+            # Store connection, releasing the engine of any connection it replaces
+            previous = self.connections.get(connection_id)
             self.connections[connection_id] = {
                 'service': service,
+                'name': profile.get('name'),
                 'db_type': db_type,
-                'host': host,
-                'port': port,
-                'username': username,
-                'database': database
+                'host': profile['host'],
+                'port': profile['port'],
+                'username': profile['username'],
+                'database': profile['database'],
+                'pool_settings': service.pool_settings,
+                'engine_id': service.engine_id,
+                'version': version,
+                'checked_at': time.monotonic()
             }
             
-            logger.info(f"Connection {connection_id} created successfully")
+            if previous and previous['service'] is not service:
+                previous['service'].disconnect()
+            self.health_monitor.track(connection_id, service, verified=verify)
+            
+            logger.info(f"Connection {connection_id} {'created' if verify else 'restored'} successfully")
             return service
             
         except Exception as e:
             logger.error(f"Failed to create connection {connection_id}: {e}")
+            slow_query_log.remove(connection_id)
             raise
     
+    def test_connection(self, db_type: DatabaseType, host: str, port: int, username: str,
+                        password: str, database: str = None) -> bool:
+        """Open an isolated, unpooled connection, run a probe and close it again"""
+        conn_string = self.create_connection_string(db_type, host, port, username, password, database)
+        service_class = self.get_service_class(db_type)
+        if not service_class:
+            raise ValueError(f"Unsupported database type: {db_type}")
+        
+        service = service_class(conn_string, {"pool_size": 0})
+        try:
+            service.connect(shared=False)
+            return service.test_connection()
+        finally:
+            service.disconnect()
+    
     def get_connection(self, connection_id: str) -> Optional[any]:
-        """Get an existing connection"""
+        """
+        Get an existing connection. Connections saved by another worker or
+        before a restart are opened from their profile on first use, and
+        local ones are dropped or rebuilt once their profile is deleted or changed
+        """
+        conn = self.connections.get(connection_id)
+        if self._is_fresh(connection_id):
+            return conn['service'] if conn else None
+        
+        with self._open_lock:
+            conn = self.connections.get(connection_id)
+            version = self.store.get_version(connection_id)
+            if conn and version is not None and version == conn['version']:
+                conn['checked_at'] = time.monotonic()
+                return conn['service']
+            if conn:
+                self.close_connection(connection_id, forget=False)
+            if version is None:
+                return None
+            
+            profile = self.store.load(connection_id)
+            if profile is None:
+                return None
+            # Building the engine does no I/O; the first query connects
+            return self._open(
+                connection_id, profile, profile.pop('password'),
+                verify=False, version=profile.pop('version')
+            )
+    
+    def _is_fresh(self, connection_id: str) -> bool:
+        """Whether get_connection can answer without reading the profile store"""
+        if self.store is None:
+            return True
         conn = self.connections.get(connection_id)
-        return conn['service'] if conn else None
+        return conn is not None and time.monotonic() - conn['checked_at'] < self.profile_recheck
+    
+    async def get_connection_async(self, connection_id: str) -> Optional[any]:
+        """get_connection for request handlers; profile store reads run on a worker thread"""
+        if self._is_fresh(connection_id):
+            return self.get_connection(connection_id)
+        return await asyncio.to_thread(self.get_connection, connection_id)
+    
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """Saved connection profiles, or the open connections when nothing is persisted"""
+        if self.store is not None:
+            profiles = self.store.list_profiles()
+        else:
+            profiles = [
+                {
+                    'connection_id': connection_id,
+                    **{key: value for key, value in conn.items()
+                       if key not in ('service', 'version', 'checked_at', 'engine_id')}
+                }
+                for connection_id, conn in self.connections.items()
+            ]
+        for profile in profiles:
+            profile['open'] = profile['connection_id'] in self.connections
+        return profiles
+    
+    def get_health(self, connection_id: str) -> Optional[Dict[str, Any]]:
+        """Cached liveness and circuit breaker state from the health monitor"""
+        return self.health_monitor.get_status(connection_id)
+    
+    @contextmanager
+    def guard(self, connection_id: str):
+        """
+        Fail fast with CircuitOpenError while a connection's breaker is open,
+        and feed the outcome of the guarded call back into the breaker
+        """
+        self.health_monitor.check(connection_id)
+        try:
+            yield
+        except Exception as e:
+            if is_connectivity_error(e):
+                self.health_monitor.record_failure(connection_id, e)
+            else:
+                self.health_monitor.record_success(connection_id)
+            raise
+        self.health_monitor.record_success(connection_id)
     
-    def close_connection(self, connection_id: str):
-        """Close and remove a connection"""
+    def close_connection(self, connection_id: str, forget: bool = True):
+        """Close a connection; with forget, also delete its saved profile"""
+        if forget and self.store is not None:
+            self.store.delete(connection_id)
         if connection_id in self.connections:
             conn = self.connections[connection_id]
+            # Stop probing through this service before its engine goes away
+            self.health_monitor.untrack(connection_id)
             conn['service'].disconnect()
             del self.connections[connection_id]
+            query_executor.remove(connection_id)
+            query_cache.clear(connection_id)
+            slow_query_log.remove(connection_id)
             logger.info(f"Connection {connection_id} closed")
     
+    def register_query(self, connection_id: str, query: str, query_id: str = None) -> str:
+        """Record an in-flight statement and return the id used to cancel it"""
+        query_id = query_id or uuid.uuid4().hex
+        with self._queries_lock:
+            if query_id in self.running_queries:
+                raise ValueError(f"Query {query_id} is already running")
+            self.running_queries[query_id] = {
+                'query_id': query_id,
+                'connection_id': connection_id,
+                'query': query,
+                'started_at': time.time()
+            }
+        return query_id
+    
+    def finish_query(self, query_id: str):
+        """Remove a statement from the registry once it completes"""
+        with self._queries_lock:
+            self.running_queries.pop(query_id, None)
+    
+    def list_queries(self, connection_id: str = None) -> List[Dict[str, Any]]:
+        """List in-flight statements, optionally for one connection"""
+        now = time.time()
+        with self._queries_lock:
+            queries = list(self.running_queries.values())
+        return [
+            {**entry, 'elapsed': round(now - entry['started_at'], 3)}
+            for entry in queries
+            if connection_id is None or entry['connection_id'] == connection_id
+        ]
+    
+    def cancel_query(self, query_id: str) -> bool:
+        """Cancel an in-flight statement server-side"""
+        with self._queries_lock:
+            entry = self.running_queries.get(query_id)
+        if not entry:
+            return False
+        service = self.get_connection(entry['connection_id'])
+        if not service:
+            return False
+        cancelled = service.cancel_query(query_id)
+        if cancelled:
+            logger.info(f"Query {query_id} on {entry['connection_id']} cancelled")
+        return cancelled
+    
     def close_all(self):
         """Close all connections"""
         for conn_id in list(self.connections.keys()):
-            self.close_connection(conn_id)
+            self.close_connection(conn_id, forget=False)
+        self.health_monitor.shutdown()
 
-# Global connection manager instance
-connection_manager = ConnectionManager()
\ No newline at end of file
+# Global connection manager instance; connections stay in memory unless DBM_CONNECTION_DB is set
+connection_manager = ConnectionManager(ConnectionStore(DEFAULT_CONNECTION_DB) if DEFAULT_CONNECTION_DB else None)
\ No newline at end of file
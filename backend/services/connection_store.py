@@ -0,0 +1,126 @@
+"""
+Persistent registry of connection profiles, shared by all worker processes
+"""
+from cryptography.fernet import Fernet, InvalidToken
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from utils.serialization import dumps
+import json
+import os
+import sqlite3
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Profiles and encrypted passwords are only written to disk when this is set
+DEFAULT_CONNECTION_DB = os.getenv("DBM_CONNECTION_DB") or None
+DEFAULT_SECRET_KEY = os.getenv("DBM_SECRET_KEY") or None
+
+class ConnectionStore:
+    """
+    Stores connection profiles in a local SQLite file, with passwords
+    encrypted at rest. Every call opens its own short-lived connection, so
+    any number of worker processes can share the file
+    """
+    
+    def __init__(self, path: str, secret_key: str = DEFAULT_SECRET_KEY):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._fernet = Fernet(secret_key.encode() if secret_key else self._load_key(path + ".key"))
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS connection_profiles ("
+                "connection_id TEXT PRIMARY KEY, profile TEXT NOT NULL, secret BLOB, "
+                "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+    
+    @staticmethod
+    def _load_key(key_path: str) -> bytes:
+        """Read the key file, creating it exactly once if several workers race"""
+        try:
+            fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            for _ in range(50):
+                with open(key_path, "rb") as key_file:
+                    key = key_file.read().strip()
+                if key:
+                    return key
+                # Another worker created the file and is still writing it
+                time.sleep(0.01)
+            raise RuntimeError(f"Secret key file {key_path} is empty")
+        key = Fernet.generate_key()
+        with os.fdopen(fd, "wb") as key_file:
+            key_file.write(key)
+        logger.info(f"Generated connection secret key at {key_path}")
+        return key
+    
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        db = sqlite3.connect(self.path, timeout=10)
+        db.row_factory = sqlite3.Row
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+    
+    def save(self, connection_id: str, profile: Dict[str, Any], password: str = None) -> float:
+        """Insert or replace a profile; returns its version"""
+        now = time.time()
+        secret = self._fernet.encrypt(password.encode()) if password else None
+        with self._connect() as db:
+            db.execute(
+                "INSERT INTO connection_profiles (connection_id, profile, secret, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT (connection_id) DO UPDATE SET "
+                "profile = excluded.profile, secret = excluded.secret, updated_at = excluded.updated_at",
+                (connection_id, dumps(profile), secret, now, now)
+            )
+        return now
+    
+    def load(self, connection_id: str) -> Optional[Dict[str, Any]]:
+        """Return a profile with its decrypted password and version, or None"""
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT profile, secret, updated_at FROM connection_profiles WHERE connection_id = ?",
+                (connection_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            password = self._fernet.decrypt(row["secret"]).decode() if row["secret"] else None
+        except InvalidToken:
+            raise ValueError(f"Stored password for {connection_id} cannot be decrypted with the current key")
+        return {**json.loads(row["profile"]), "password": password, "version": row["updated_at"]}
+    
+    def get_version(self, connection_id: str) -> Optional[float]:
+        """Cheap check of whether a profile still exists and when it last changed"""
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT updated_at FROM connection_profiles WHERE connection_id = ?", (connection_id,)
+            ).fetchone()
+        return row["updated_at"] if row else None
+    
+    def delete(self, connection_id: str) -> bool:
+        with self._connect() as db:
+            cursor = db.execute("DELETE FROM connection_profiles WHERE connection_id = ?", (connection_id,))
+        return cursor.rowcount > 0
+    
+    def list_profiles(self) -> List[Dict[str, Any]]:
+        """All saved profiles, without secrets"""
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT connection_id, profile, created_at, updated_at FROM connection_profiles "
+                "ORDER BY created_at"
+            ).fetchall()
+        return [
+            {
+                "connection_id": row["connection_id"],
+                **json.loads(row["profile"]),
+                "created_at": row["created_at"],
+                "updated_at": row["updated_at"],
+            }
+            for row in rows
+        ]
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""
+Shared, reference-counted engines for logical connections
+"""
+from sqlalchemy.engine import make_url
+from services.metadata_cache import MetadataCache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import hashlib
+import itertools
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+_epochs = itertools.count(1)
+
+class WriteVersions:
+    """
+    Writes seen per table of one database (None for writes to tables that
+    could not be told apart). The epoch tells counters that restarted from
+    zero apart from the ones before them
+    """
+    
+    def __init__(self):
+        self.epoch = next(_epochs)
+        self._counts: Dict[Optional[str], int] = {}
+        self._lock = threading.Lock()
+    
+    def bump(self, table_name: Optional[str]):
+        with self._lock:
+            self._counts[table_name] = self._counts.get(table_name, 0) + 1
+    
+    def get(self, table_name: str) -> Tuple[int, int, int]:
+        with self._lock:
+            return self.epoch, self._counts.get(table_name.lower(), 0), self._counts.get(None, 0)
+
+class EngineRegistry:
+    """
+    Hands out one engine per normalized connection string and pool options,
+    so logical connections to the same database share its pool and catalog cache
+    """
+    
+    def __init__(self):
+        self._entries: Dict[Tuple, Dict[str, Any]] = {}
+        # Shared by every engine on the same database, whatever its pool options
+        self._write_versions: Dict[str, WriteVersions] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(connection_string: str, pool_settings: Dict[str, Any],
+                 engine_options: Dict[str, Any]) -> Tuple:
+        """Key equivalent URLs and identical pool options to the same engine"""
+        url = make_url(connection_string)
+        if url.host:
+            url = url.set(host=url.host.lower())
+        if url.query:
+            url = url.set(query=dict(sorted(url.query.items())))
+        return (
+            url.render_as_string(hide_password=False),
+            tuple(sorted((name, repr(value)) for name, value in pool_settings.items())),
+            tuple(sorted((name, repr(value)) for name, value in engine_options.items())),
+        )
+    
+    def acquire(self, key: Tuple, factory: Callable[[], Any], database_key: str = None) -> Dict[str, Any]:
+        """Return the registry entry for key, creating its engine on first use"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                engine = factory()
+                entry = self._entries[key] = {
+                    # Safe to show: derived from the key, never the credentials themselves
+                    "engine_id": hashlib.sha1(repr(key).encode()).hexdigest()[:12],
+                    "engine": engine,
+                    "metadata_cache": MetadataCache(),
+                    "database_key": database_key,
+                    "write_versions": (
+                        self._write_versions.setdefault(database_key, WriteVersions())
+                        if database_key else WriteVersions()
+                    ),
+                    "refs": 0,
+                }
+                logger.info(f"Created shared engine {entry['engine_id']} for {engine.url.render_as_string()}")
+            entry["refs"] += 1
+            return entry
+    
+    def release(self, key: Tuple) -> bool:
+        """Drop a reference; disposes the engine and returns True on the last one"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            entry["refs"] -= 1
+            if entry["refs"] > 0:
+                return False
+            del self._entries[key]
+            database_key = entry["database_key"]
+            if database_key and not any(
+                other["database_key"] == database_key for other in self._entries.values()
+            ):
+                self._write_versions.pop(database_key, None)
+        entry["engine"].dispose()
+        logger.info(f"Disposed shared engine {entry['engine_id']}")
+        return True
+    
+    def get_refs(self, key: Tuple) -> int:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry["refs"] if entry else 0
+    
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """List shared engines and how many logical connections use each"""
+        with self._lock:
+            entries = list(self._entries.values())
+        return [
+            {
+                "engine_id": entry["engine_id"],
+                "url": entry["engine"].url.render_as_string(),
+                "refs": entry["refs"],
+                "pool_class": type(entry["engine"].pool).__name__,
+            }
+            for entry in entries
+        ]
+
+# Global engine registry instance
+engine_registry = EngineRegistry()
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+Runs blocking database calls off the event loop
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+import asyncio
+import functools
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = int(os.getenv("DBM_EXECUTOR_WORKERS", "32"))
+DEFAULT_CONNECTION_CONCURRENCY = int(os.getenv("DBM_CONNECTION_CONCURRENCY", "4"))
+
+class QueryExecutor:
+    """Shared worker thread pool with a concurrency cap per connection"""
+    
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS,
+                 default_limit: int = DEFAULT_CONNECTION_CONCURRENCY):
+        self.max_workers = max_workers
+        self.default_limit = default_limit
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-worker")
+        self._limits: Dict[str, int] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._active: Dict[str, int] = {}
+        self._groups: Dict[str, str] = {}
+    
+    def set_limit(self, key: str, limit: int, group: str = None):
+        """
+        Set how many calls may run at once for a connection. Connections in
+        the same group, such as those sharing an engine, share one cap
+        """
+        self._groups.pop(key, None)
+        if group:
+            self._groups[key] = group
+            if group in self._limits:
+                # The group's pool is already capped; keep its semaphore
+                return
+            key = group
+        self._limits[key] = max(1, limit)
+        # Picked up by the next call; calls already waiting keep the old cap
+        self._semaphores.pop(key, None)
+    
+    def remove(self, key: str):
+        """Forget the limit for a closed connection"""
+        group = self._groups.pop(key, None)
+        if group and group not in self._groups.values():
+            self._limits.pop(group, None)
+            self._semaphores.pop(group, None)
+        self._limits.pop(key, None)
+        self._semaphores.pop(key, None)
+        self._active.pop(key, None)
+    
+    def _semaphore(self, key: str) -> asyncio.Semaphore:
+        key = self._groups.get(key, key)
+        semaphore = self._semaphores.get(key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._limits.get(key, self.default_limit))
+            self._semaphores[key] = semaphore
+        return semaphore
+    
+    async def run(self, key: str, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking call on the worker pool within the connection's cap"""
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+        async with self._semaphore(key):
+            self._active[key] = self._active.get(key, 0) + 1
+            try:
+                return await loop.run_in_executor(self._pool, call)
+            finally:
+                self._active[key] = self._active.get(key, 1) - 1
+    
+    def get_stats(self, key: str) -> Dict[str, int]:
+        """Report in-flight calls and the cap for a connection"""
+        return {
+            "active": self._active.get(key, 0),
+            "limit": self._limits.get(self._groups.get(key, key), self.default_limit),
+        }
+    
+    def shutdown(self):
+        """Stop the worker pool, dropping calls that have not started"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        logger.info("Query executor shut down")
+
+# Global executor instance
+query_executor = QueryExecutor()
\ No newline at end of file
@@ -0,0 +1,177 @@
+"""
+Streaming export of query results to CSV, NDJSON, Arrow IPC and Parquet
+"""
+from typing import Any, Iterator, List, Sequence
+from utils.serialization import dumps, json_default
+import csv
+import io
+import os
+import zlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXPORT_CHUNK_SIZE = int(os.getenv("DBM_EXPORT_CHUNK_SIZE", "10000"))
+# Format name -> (media type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+COLUMNAR_FORMATS = ("arrow", "parquet")
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back whatever was written since the last drain"""
+    
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        # Parquet records absolute offsets in its footer
+        return self._position
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def _import_pyarrow(fmt: str):
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        if fmt == "parquet":
+            import pyarrow.parquet
+    except ImportError:
+        raise ValueError(f"The {fmt} export format requires the pyarrow package")
+    return pyarrow
+
+def format_available(fmt: str) -> bool:
+    """Whether the libraries a format needs are installed"""
+    if fmt not in COLUMNAR_FORMATS:
+        return fmt in EXPORT_FORMATS
+    try:
+        _import_pyarrow(fmt)
+    except ValueError:
+        return False
+    return True
+
+def _text(value: Any) -> Any:
+    """Leave values csv writes well alone and render the rest as JSON would"""
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    if isinstance(value, (dict, list)):
+        return dumps(value)
+    return json_default(value)
+
+def _encode_csv(columns: List[str], chunks: Iterator[Sequence], delimiter: str) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator="\n")
+    writer.writerow(columns)
+    for rows in chunks:
+        writer.writerows([_text(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode()
+
+def _encode_ndjson(columns: List[str], chunks: Iterator[Sequence]) -> Iterator[bytes]:
+    for rows in chunks:
+        yield "".join(dumps(dict(zip(columns, row))) + "\n" for row in rows).encode()
+
+def _arrow_array(pa, values: Sequence, type_=None):
+    """Convert one column of a chunk, falling back to text for values Arrow cannot type"""
+    sample = next((value for value in values if value is not None), None)
+    if type_ is None and isinstance(sample, (dict, list)):
+        type_ = pa.string()
+    if type_ is None or type_ != pa.string():
+        try:
+            return pa.array(values, type=type_)
+        except pa.ArrowException:
+            if type_ is not None:
+                raise
+    return pa.array([None if value is None else str(_text(value)) for value in values], type=pa.string())
+
+def _encode_columnar(fmt: str, columns: List[str], chunks: Iterator[Sequence]) -> Iterator[bytes]:
+    """
+    One record batch (Arrow) or row group (Parquet) per chunk. The schema is
+    fixed by the first chunk; columns that were all NULL there become text
+    """
+    pa = _import_pyarrow(fmt)
+    sink = _ChunkSink()
+    schema = writer = None
+    
+    def open_writer(schema):
+        if fmt == "parquet":
+            return pa.parquet.ParquetWriter(sink, schema)
+        return pa.ipc.new_stream(sink, schema)
+    
+    for rows in chunks:
+        if not rows:
+            continue
+        values = list(zip(*rows))
+        if schema is None:
+            arrays = [_arrow_array(pa, column) for column in values]
+            arrays = [array.cast(pa.string()) if array.type == pa.null() else array for array in arrays]
+            schema = pa.schema([pa.field(name, array.type) for name, array in zip(columns, arrays)])
+            writer = open_writer(schema)
+        else:
+            try:
+                arrays = [_arrow_array(pa, column, field.type) for column, field in zip(values, schema)]
+            except pa.ArrowException as e:
+                raise ValueError(f"Column types changed during the export: {e}")
+        writer.write_batch(pa.record_batch(arrays, schema=schema))
+        yield sink.drain()
+    
+    if writer is None:
+        writer = open_writer(pa.schema([pa.field(name, pa.string()) for name in columns]))
+    writer.close()
+    yield sink.drain()
+
+def gzip_chunks(chunks: Iterator[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a byte stream into a single gzip member as it goes"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for data in chunks:
+        compressed = compressor.compress(data)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def export_chunks(columns: List[str], chunks: Iterator[Sequence], fmt: str = "csv",
+                  compress: bool = False, delimiter: str = ",") -> Iterator[bytes]:
+    """
+    Encode row chunks into a byte stream in the given format. Only one chunk
+    is held at a time, so memory use is bounded by the chunk size
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'")
+    if fmt in COLUMNAR_FORMATS:
+        # Fail before anything is sent rather than halfway through the body
+        _import_pyarrow(fmt)
+        encoded = _encode_columnar(fmt, columns, chunks)
+    elif fmt == "ndjson":
+        encoded = _encode_ndjson(columns, chunks)
+    else:
+        encoded = _encode_csv(columns, chunks, delimiter)
+    return gzip_chunks(encoded) if compress else encoded
+
+def export_filename(name: str, fmt: str, compress: bool = False) -> str:
+    safe_name = "".join(char if (char.isascii() and char.isalnum()) or char in "-_." else "_" for char in name) or "export"
+    filename = f"{safe_name}.{EXPORT_FORMATS[fmt][1]}"
+    return filename + ".gz" if compress else filename
+
+def table_query(service, table_name: str) -> str:
+    """SELECT for a whole table, after checking the table exists"""
+    if table_name not in service.get_tables():
+        raise LookupError(f"Table '{table_name}' not found")
+    return f"SELECT * FROM {service.engine.dialect.identifier_preparer.quote(table_name)}"
\ No newline at end of file
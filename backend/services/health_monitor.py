@@ -0,0 +1,254 @@
+"""
+Background liveness probes and per-connection circuit breakers
+"""
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import exc
+from typing import Any, Dict, Optional
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEALTH_INTERVAL = float(os.getenv("DBM_HEALTH_INTERVAL", "15"))
+DEFAULT_HEALTH_MAX_INTERVAL = float(os.getenv("DBM_HEALTH_MAX_INTERVAL", "120"))
+DEFAULT_HEALTH_RETRY_INTERVAL = float(os.getenv("DBM_HEALTH_RETRY_INTERVAL", "2"))
+DEFAULT_BREAKER_FAILURES = int(os.getenv("DBM_BREAKER_FAILURES", "3"))
+DEFAULT_BREAKER_RESET = float(os.getenv("DBM_BREAKER_RESET", "30"))
+DEFAULT_HEALTH_WORKERS = int(os.getenv("DBM_HEALTH_WORKERS", "4"))
+
+class CircuitOpenError(RuntimeError):
+    """Raised when calls to a connection are refused after repeated failures"""
+
+def is_connectivity_error(error: Exception) -> bool:
+    """Whether an error means the server is unreachable rather than the SQL being wrong"""
+    if not isinstance(error, exc.DBAPIError):
+        return False
+    # Errors raised while connecting carry no statement
+    return error.connection_invalidated or error.statement is None
+
+class HealthMonitor:
+    """
+    Probes connections in the background and keeps their last result, so
+    status reads never touch the database. Connections sharing an engine
+    share one probe and one breaker
+    """
+    
+    def __init__(self, interval: float = DEFAULT_HEALTH_INTERVAL,
+                 max_interval: float = DEFAULT_HEALTH_MAX_INTERVAL,
+                 retry_interval: float = DEFAULT_HEALTH_RETRY_INTERVAL,
+                 failure_threshold: int = DEFAULT_BREAKER_FAILURES,
+                 reset_timeout: float = DEFAULT_BREAKER_RESET,
+                 max_workers: int = DEFAULT_HEALTH_WORKERS):
+        self.interval = interval
+        self.max_interval = max_interval
+        self.retry_interval = retry_interval
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_workers = max_workers
+        self._targets: Dict[str, Dict[str, Any]] = {}
+        self._connection_targets: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._probes = None
+    
+    @staticmethod
+    def _target_key(connection_id: str, service) -> str:
+        engine_id = getattr(service, "engine_id", None)
+        return f"engine:{engine_id}" if engine_id else f"connection:{connection_id}"
+    
+    def track(self, connection_id: str, service, verified: bool = True):
+        """
+        Start monitoring a connection. Unverified ones, restored without
+        connecting, report unknown liveness until their first probe
+        """
+        key = self._target_key(connection_id, service)
+        now = time.monotonic()
+        with self._lock:
+            self.untrack(connection_id, locked=True)
+            target = self._targets.get(key)
+            if target is None:
+                target = self._targets[key] = {
+                    # Service per connection; any of them can probe the shared engine
+                    "connections": {},
+                    "active": True if verified else None,
+                    "state": "closed",
+                    "failures": 0,
+                    "successes": 1,
+                    "interval": self.interval,
+                    "next_probe": now + self.interval if verified else now,
+                    "probing": False,
+                    "opened_at": None,
+                    "open_for": self.reset_timeout,
+                    "trial": False,
+                    "last_checked": time.time(),
+                    "latency_ms": None,
+                    "last_error": None,
+                }
+            target["connections"][connection_id] = service
+            self._connection_targets[connection_id] = key
+        self._ensure_started()
+        self._wake.set()
+    
+    def untrack(self, connection_id: str, locked: bool = False):
+        """Stop monitoring a closed connection"""
+        if not locked:
+            with self._lock:
+                return self.untrack(connection_id, locked=True)
+        key = self._connection_targets.pop(connection_id, None)
+        target = self._targets.get(key) if key else None
+        if target is None:
+            return
+        target["connections"].pop(connection_id, None)
+        if not target["connections"]:
+            del self._targets[key]
+    
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None or self._stopped.is_set():
+                return
+            self._probes = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="db-health")
+            self._thread = threading.Thread(target=self._loop, name="db-health-monitor", daemon=True)
+            self._thread.start()
+    
+    def _loop(self):
+        while not self._stopped.is_set():
+            now = time.monotonic()
+            next_due = now + self.max_interval
+            with self._lock:
+                for key, target in self._targets.items():
+                    if target["probing"]:
+                        continue
+                    if target["next_probe"] <= now:
+                        try:
+                            self._probes.submit(self._probe, key, target)
+                        except RuntimeError:
+                            # Shutting down
+                            return
+                        target["probing"] = True
+                    else:
+                        next_due = min(next_due, target["next_probe"])
+            self._wake.wait(max(next_due - time.monotonic(), 0.05))
+            self._wake.clear()
+    
+    def _probe(self, key: str, target: Dict[str, Any]):
+        # Closed connections leave the target, so this is always a live service
+        with self._lock:
+            service = next(iter(target["connections"].values()), None)
+        if service is None:
+            target["probing"] = False
+            return
+        started = time.perf_counter()
+        try:
+            # Outside the pool, so a pool busy with slow queries does not look like an outage
+            service.ping(unpooled=True)
+        except Exception as e:
+            if is_connectivity_error(e):
+                self._record(target, False, error=str(e))
+            else:
+                # Pool timeouts and the like say nothing about the server; try again later
+                logger.debug(f"Probe of {sorted(target['connections'])} skipped: {e}")
+                self._skip(target)
+        else:
+            self._record(target, True, latency=time.perf_counter() - started)
+        finally:
+            target["probing"] = False
+    
+    def _skip(self, target: Dict[str, Any]):
+        """Schedule the next probe without counting this one either way"""
+        with self._lock:
+            target["next_probe"] = time.monotonic() + target["interval"]
+        self._wake.set()
+    
+    def _record(self, target: Dict[str, Any], ok: bool, latency: float = None, error: str = None):
+        """Update liveness, the breaker and the next probe time from one outcome"""
+        now = time.monotonic()
+        with self._lock:
+            target["last_checked"] = time.time()
+            target["trial"] = False
+            if ok:
+                if target["state"] != "closed":
+                    logger.info(f"Connection {sorted(target['connections'])} is reachable again")
+                target.update(active=True, state="closed", failures=0, opened_at=None,
+                              open_for=self.reset_timeout, last_error=None)
+                target["successes"] += 1
+                if latency is not None:
+                    target["latency_ms"] = round(latency * 1000, 3)
+                # Stable connections are probed less and less often
+                target["interval"] = min(target["interval"] * 1.5, self.max_interval) \
+                    if target["successes"] > 1 else self.interval
+            else:
+                target.update(active=False, successes=0, last_error=error)
+                target["failures"] += 1
+                if target["state"] == "half_open":
+                    target["open_for"] = min(target["open_for"] * 2, self.max_interval)
+                if target["failures"] >= self.failure_threshold and target["state"] != "open":
+                    logger.warning(f"Circuit opened for {sorted(target['connections'])}: {error}")
+                if target["failures"] >= self.failure_threshold:
+                    target["state"] = "open"
+                    target["opened_at"] = now
+                # Failing connections are retried quickly at first, then backed off
+                target["interval"] = min(
+                    self.retry_interval * 2 ** (target["failures"] - 1), self.max_interval
+                )
+            target["next_probe"] = now + target["interval"]
+        self._wake.set()
+    
+    def _target(self, connection_id: str) -> Optional[Dict[str, Any]]:
+        key = self._connection_targets.get(connection_id)
+        return self._targets.get(key) if key else None
+    
+    def check(self, connection_id: str):
+        """Raise CircuitOpenError while the breaker is open; lets one trial through after the reset timeout"""
+        with self._lock:
+            target = self._target(connection_id)
+            if target is None or target["state"] == "closed":
+                return
+            now = time.monotonic()
+            if target["state"] == "open" and now - target["opened_at"] >= target["open_for"]:
+                target["state"] = "half_open"
+            if target["state"] == "half_open" and not target["trial"]:
+                target["trial"] = True
+                return
+            retry_in = max(target["opened_at"] + target["open_for"] - now, 0)
+        raise CircuitOpenError(
+            f"Connection is unavailable after {target['failures']} failed attempts "
+            f"(last error: {target['last_error']}); retry in {retry_in:.0f}s"
+        )
+    
+    def record_success(self, connection_id: str):
+        with self._lock:
+            target = self._target(connection_id)
+        if target is not None and (target["state"] != "closed" or target["failures"]):
+            self._record(target, True)
+    
+    def record_failure(self, connection_id: str, error: Exception):
+        with self._lock:
+            target = self._target(connection_id)
+        if target is not None:
+            self._record(target, False, error=str(error))
+    
+    def get_status(self, connection_id: str) -> Optional[Dict[str, Any]]:
+        """Last probe result and breaker state, without touching the database"""
+        with self._lock:
+            target = self._target(connection_id)
+            if target is None:
+                return None
+            return {
+                "active": target["active"],
+                "state": target["state"],
+                "last_checked": target["last_checked"],
+                "latency_ms": target["latency_ms"],
+                "consecutive_failures": target["failures"],
+                "last_error": target["last_error"],
+                "next_probe_in": round(max(target["next_probe"] - time.monotonic(), 0), 3),
+            }
+    
+    def shutdown(self):
+        self._stopped.set()
+        self._wake.set()
+        if self._probes is not None:
+            self._probes.shutdown(wait=False, cancel_futures=True)
\ No newline at end of file
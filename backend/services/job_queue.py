@@ -0,0 +1,309 @@
+"""
+Background query jobs with results spooled to disk
+"""
+from collections import deque
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from services.connection_manager import connection_manager
+from utils.serialization import dumps
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_WORKERS = int(os.getenv("DBM_JOB_WORKERS", "4"))
+DEFAULT_JOB_CONNECTION_LIMIT = int(os.getenv("DBM_JOB_CONNECTION_LIMIT", "2"))
+DEFAULT_SPOOL_DIR = os.getenv("DBM_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "dbm_spool"))
+DEFAULT_SPOOL_QUOTA = int(os.getenv("DBM_SPOOL_QUOTA", str(1024 * 1024 * 1024)))
+DEFAULT_RESULT_TTL = float(os.getenv("DBM_JOB_RESULT_TTL", "3600"))
+
+OFFSET_FORMAT = struct.Struct("<Q")
+FINISHED_STATES = ("completed", "failed", "cancelled")
+
+class SpoolWriter:
+    """
+    Appends rows as compact JSON arrays, one per line, to a data file, and
+    each row's start offset as a fixed-width integer to an index file
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._data = open(os.path.join(path, "rows.jsonl"), "wb")
+        self._index = open(os.path.join(path, "rows.idx"), "wb")
+        self.rows = 0
+        self.bytes = 0
+    
+    def write_rows(self, rows: List[tuple]):
+        index = bytearray()
+        lines = []
+        for row in rows:
+            line = (dumps(list(row)) + "\n").encode()
+            index += OFFSET_FORMAT.pack(self.bytes)
+            lines.append(line)
+            self.bytes += len(line)
+        # Data is flushed before the index so readers never see an offset past the data
+        self._data.write(b"".join(lines))
+        self._data.flush()
+        self._index.write(index)
+        self._index.flush()
+        self.rows += len(rows)
+    
+    def close(self):
+        self._data.close()
+        self._index.close()
+
+class SpoolReader:
+    """Reads row ranges from a spool through memory maps, without loading the file"""
+    
+    def __init__(self, path: str):
+        self.path = path
+    
+    def read(self, offset: int, limit: int) -> List[list]:
+        data_path = os.path.join(self.path, "rows.jsonl")
+        index_path = os.path.join(self.path, "rows.idx")
+        total = os.path.getsize(index_path) // OFFSET_FORMAT.size
+        if offset >= total or os.path.getsize(data_path) == 0:
+            return []
+        end = min(offset + limit, total)
+        
+        with open(index_path, "rb") as index_file, open(data_path, "rb") as data_file:
+            with mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ) as index, \
+                    mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                start_byte = OFFSET_FORMAT.unpack_from(index, offset * OFFSET_FORMAT.size)[0]
+                if end < total:
+                    end_byte = OFFSET_FORMAT.unpack_from(index, end * OFFSET_FORMAT.size)[0]
+                else:
+                    end_byte = len(data)
+                chunk = data[start_byte:end_byte]
+        # While a job is still writing, the data file can run ahead of the index
+        return [json.loads(line) for line in chunk.splitlines()[:end - offset]]
+
+class JobQueue:
+    """Runs query jobs on a worker pool, at most a few per connection at a time"""
+    
+    def __init__(self, max_workers: int = DEFAULT_JOB_WORKERS,
+                 connection_limit: int = DEFAULT_JOB_CONNECTION_LIMIT,
+                 spool_dir: str = DEFAULT_SPOOL_DIR,
+                 spool_quota: int = DEFAULT_SPOOL_QUOTA,
+                 result_ttl: float = DEFAULT_RESULT_TTL):
+        self.max_workers = max_workers
+        self.connection_limit = connection_limit
+        # Workers may share the spool root, so each process spools to and removes only its own directory
+        self.spool_dir = os.path.join(spool_dir, f"{os.getpid()}-{uuid.uuid4().hex[:8]}")
+        self.spool_quota = spool_quota
+        self.result_ttl = result_ttl
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._pending: deque = deque()
+        self._running_per_connection: Dict[str, int] = {}
+        self._running = 0
+        self._lock = threading.RLock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-job")
+    
+    def submit(self, connection_id: str, query: str,
+               params: Dict = None, limit: int = None, timeout: float = None) -> Dict[str, Any]:
+        """Queue a query and return its job record"""
+        if not connection_manager.get_connection(connection_id):
+            raise KeyError(connection_id)
+        
+        self.evict_expired()
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "connection_id": connection_id,
+            "query": query,
+            "params": params,
+            "limit": limit,
+            "timeout": timeout,
+            "status": "queued",
+            "columns": [],
+            "rows_written": 0,
+            "bytes_written": 0,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        with self._lock:
+            self.jobs[job_id] = job
+            self._pending.append(job_id)
+            self._dispatch()
+        return self.get_job(job_id)
+    
+    def _dispatch(self):
+        """Start queued jobs whose connection has a free slot; call with the lock held"""
+        for job_id in list(self._pending):
+            if self._running >= self.max_workers:
+                return
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] != "queued":
+                self._pending.remove(job_id)
+                continue
+            connection_id = job["connection_id"]
+            if self._running_per_connection.get(connection_id, 0) >= self.connection_limit:
+                continue
+            self._pending.remove(job_id)
+            self._running += 1
+            self._running_per_connection[connection_id] = self._running_per_connection.get(connection_id, 0) + 1
+            job["status"] = "running"
+            job["started_at"] = time.time()
+            self._pool.submit(self._run, job)
+    
+    def _run(self, job: Dict[str, Any]):
+        """Execute a job, spooling its rows to disk as they arrive"""
+        job_id, connection_id = job["job_id"], job["connection_id"]
+        path = os.path.join(self.spool_dir, job_id)
+        writer = None
+        try:
+            service = connection_manager.get_connection(connection_id)
+            if not service:
+                raise RuntimeError("Connection not found")
+            
+            os.makedirs(path, exist_ok=True)
+            writer = SpoolWriter(path)
+            connection_manager.register_query(connection_id, job["query"], job_id)
+            try:
+                if job["status"] == "cancelled":
+                    return
+                stream = service.stream_query(
+                    job["query"],
+                    params=job["params"],
+                    limit=job["limit"],
+                    chunk_size=5000,
+                    timeout=job["timeout"],
+                    query_id=job_id
+                )
+                with closing(stream):
+                    for chunk in stream:
+                        if "columns" in chunk:
+                            job["columns"] = chunk["columns"]
+                            continue
+                        writer.write_rows(chunk["rows"])
+                        job["rows_written"] = writer.rows
+                        job["bytes_written"] = writer.bytes
+                        if job["status"] == "cancelled":
+                            break
+                        if self._spool_usage() > self.spool_quota:
+                            raise RuntimeError("Spool disk quota exceeded")
+            finally:
+                connection_manager.finish_query(job_id)
+            
+            if job["status"] != "cancelled":
+                job["status"] = "completed"
+        except Exception as e:
+            if job["status"] != "cancelled":
+                logger.error(f"Job {job_id} failed: {e}")
+                job["status"] = "failed"
+                job["error"] = str(e)
+        finally:
+            if writer:
+                writer.close()
+            job["finished_at"] = time.time()
+            with self._lock:
+                self._running -= 1
+                self._running_per_connection[connection_id] -= 1
+                self._dispatch()
+            self.evict_expired()
+    
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of a job record with its elapsed time"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            job = {key: value for key, value in job.items() if key != "params"}
+        end = job["finished_at"] or time.time()
+        job["elapsed"] = round(end - job["started_at"], 3) if job["started_at"] else 0.0
+        return job
+    
+    def list_jobs(self, connection_id: str = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            job_ids = list(self.jobs)
+        jobs = [self.get_job(job_id) for job_id in job_ids]
+        return [job for job in jobs if job and (connection_id is None or job["connection_id"] == connection_id)]
+    
+    def read_results(self, job_id: str, offset: int = 0, limit: int = 1000) -> Dict[str, Any]:
+        """Read a page of spooled rows; works while the job is still running"""
+        job = self.get_job(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        path = os.path.join(self.spool_dir, job_id)
+        if not os.path.isdir(path):
+            raise FileNotFoundError("Job results are not available")
+        
+        rows = SpoolReader(path).read(offset, limit)
+        next_offset = offset + len(rows)
+        has_more = next_offset < job["rows_written"] or job["status"] in ("queued", "running")
+        return {
+            "job_id": job_id,
+            "status": job["status"],
+            "columns": job["columns"],
+            "rows": rows,
+            "offset": offset,
+            "rows_written": job["rows_written"],
+            "next_offset": next_offset if has_more else None,
+        }
+    
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; False if it already finished"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] in FINISHED_STATES:
+                return False
+            was_running = job["status"] == "running"
+            job["status"] = "cancelled"
+            if not was_running:
+                job["finished_at"] = time.time()
+        if was_running:
+            connection_manager.cancel_query(job_id)
+        return True
+    
+    def delete(self, job_id: str) -> bool:
+        """Forget a finished job and remove its spool"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] not in FINISHED_STATES:
+                return False
+            del self.jobs[job_id]
+        shutil.rmtree(os.path.join(self.spool_dir, job_id), ignore_errors=True)
+        return True
+    
+    @staticmethod
+    def _disk_bytes(job: Dict[str, Any]) -> int:
+        return job["bytes_written"] + job["rows_written"] * OFFSET_FORMAT.size
+    
+    def _spool_usage(self) -> int:
+        with self._lock:
+            return sum(self._disk_bytes(job) for job in self.jobs.values())
+    
+    def evict_expired(self):
+        """Remove finished jobs past their TTL, then oldest first while over quota"""
+        now = time.time()
+        with self._lock:
+            finished = sorted(
+                (job for job in self.jobs.values() if job["status"] in FINISHED_STATES),
+                key=lambda job: job["finished_at"] or 0
+            )
+        usage = self._spool_usage()
+        for job in finished:
+            expired = job["finished_at"] and now - job["finished_at"] > self.result_ttl
+            if expired or usage > self.spool_quota:
+                usage -= self._disk_bytes(job)
+                self.delete(job["job_id"])
+                logger.info(f"Evicted spooled results of job {job['job_id']}")
+    
+    def shutdown(self):
+        """Stop the worker pool and remove this process's spooled results"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+# Global job queue instance
+job_queue = JobQueue()
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Per-connection cache for catalog metadata
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_METADATA_TTL = float(os.getenv("DBM_METADATA_TTL", "300"))
+DEFAULT_METADATA_MAX_ENTRIES = int(os.getenv("DBM_METADATA_MAX_ENTRIES", "2000"))
+
+class MetadataCache:
+    """LRU cache with a per-entry TTL and a bound on the number of entries"""
+    
+    def __init__(self, ttl: float = DEFAULT_METADATA_TTL,
+                 max_entries: int = DEFAULT_METADATA_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._generation = 0
+    
+    @property
+    def generation(self) -> int:
+        """Bumped on every invalidation, so readers can tell the schema may have changed"""
+        return self._generation
+    
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return a cached value, calling loader on a miss or after expiry"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+        
+        # Load outside the lock so one slow catalog query does not block others
+        value = loader()
+        with self._lock:
+            # Skip storing if DDL invalidated the cache while we were loading
+            if generation != self._generation:
+                return value
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a cached value without loading it on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key: Hashable, value: Any):
+        """Store a value loaded by other means, such as a bulk reflection"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, key: Hashable = None):
+        """Drop one entry, or everything when no key is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self._generation += 1
+            self.invalidations += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Report cache size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""
+Lightweight Prometheus-style metrics
+"""
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+import threading
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+class Counter:
+    """Monotonic counter with labels"""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            lines.append(f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {value}")
+        return lines
+
+class Histogram:
+    """Cumulative-bucket histogram with labels; observe() is a bisect and two adds"""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (plus +Inf), then sum
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+    
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        for key, counts, total in snapshot:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': le})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+def render_samples(name: str, documentation: str, samples: Iterable[Tuple[Dict[str, str], float]],
+                   metric_type: str = "gauge") -> List[str]:
+    """Render a metric whose values are read at scrape time"""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {metric_type}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    return lines
+
+http_request_seconds = Histogram(
+    "dbm_http_request_duration_seconds",
+    "HTTP request latency until the response body is sent",
+    ("router", "method", "status")
+)
+db_statement_seconds = Histogram(
+    "dbm_db_statement_duration_seconds",
+    "Time spent executing statements on the database",
+    ("connection_id",)
+)
+rows_streamed = Counter(
+    "dbm_rows_streamed_total",
+    "Rows streamed to clients by the query API",
+    ("connection_id",)
+)
+bytes_streamed = Counter(
+    "dbm_bytes_streamed_total",
+    "Response bytes streamed to clients by the query API",
+    ("connection_id",)
+)
+
+def render_metrics() -> str:
+    """Render all metrics in the Prometheus text exposition format"""
+    from services.connection_manager import connection_manager
+    from services.executor import query_executor
+    
+    lines: List[str] = []
+    for metric in (http_request_seconds, db_statement_seconds, rows_streamed, bytes_streamed):
+        lines.extend(metric.render())
+    
+    connections = list(connection_manager.connections.items())
+    lines.extend(render_samples(
+        "dbm_active_connections", "Registered database connections", [({}, len(connections))]
+    ))
+    
+    pool_samples = {"size": [], "checked_out": [], "idle": [], "overflow": []}
+    wait_samples, executor_samples = [], []
+    for connection_id, conn in connections:
+        labels = {"connection_id": connection_id}
+        try:
+            status = conn['service'].get_pool_status()
+        except Exception:
+            continue
+        for field, samples in pool_samples.items():
+            samples.append((labels, status[field]))
+        wait_samples.append((labels, status["total_wait_ms"] / 1000))
+        executor_samples.append((labels, query_executor.get_stats(connection_id)["active"]))
+    
+    for field, samples in pool_samples.items():
+        lines.extend(render_samples(f"dbm_pool_{field}", f"Connection pool {field.replace('_', ' ')}", samples))
+    lines.extend(render_samples(
+        "dbm_pool_checkout_wait_seconds_total", "Time spent waiting for pooled connections",
+        wait_samples, metric_type="counter"
+    ))
+    lines.extend(render_samples(
+        "dbm_executor_active_calls", "Service calls running on the worker pool", executor_samples
+    ))
+    lines.extend(render_samples(
+        "dbm_running_queries", "Statements in the running-query registry",
+        [({}, len(connection_manager.running_queries))]
+    ))
+    return "\n".join(lines) + "\n"
\ No newline at end of file
@@ -2,31 +2,101 @@
 MySQL specific database operations
 """
 from services.base_service import BaseDatabaseService
-from sqlalchemy import text
-from typing import List
+from sqlalchemy import text, bindparam
+from contextlib import contextmanager
+from typing import List, Dict, Any
+
+SYSTEM_DATABASES = ('information_schema', 'mysql', 'performance_schema', 'sys')
 
 class MySQLService(BaseDatabaseService):
+    explain_prefix = "EXPLAIN FORMAT=JSON "
+    
+    # Recycle well inside wait_timeout; MySQL drops idle sessions silently
+    default_pool_settings = {
+        **BaseDatabaseService.default_pool_settings,
+        "pool_recycle": 3600,
+        "pool_pre_ping": True,
+    }
+    
+    def get_backend_handle(self, conn) -> int:
+        """Server thread id, known to the driver from the handshake"""
+        return conn.connection.dbapi_connection.thread_id()
+    
+    def cancel_backend(self, handle: int):
+        """Stop the thread's current statement, keeping its session"""
+        with self.control_connection() as conn:
+            conn.execute(text(f"KILL QUERY {int(handle)}"))
+    
+    @contextmanager
+    def with_statement_timeout(self, conn, seconds: float = None):
+        """
+        max_execution_time is session-wide and only covers SELECT, so it is
+        reset before the connection goes back to the pool
+        """
+        if not seconds:
+            yield
+            return
+        
+        conn.execute(text(f"SET SESSION max_execution_time = {int(seconds * 1000)}"))
+        try:
+            yield
+        finally:
+            try:
+                conn.execute(text("SET SESSION max_execution_time = DEFAULT"))
+            except Exception:
+                # Never hand a session with a leftover timeout to the next caller
+                conn.invalidate()
+    
+    def is_interrupted(self, error) -> bool:
+        """ER_QUERY_INTERRUPTED from KILL QUERY, or max_execution_time exceeded"""
+        args = getattr(error.orig, "args", None)
+        return bool(args) and args[0] in (1317, 3024)
     
     def get_databases(self) -> List[str]:
         """Get list of all databases"""
-        with self.engine.connect() as conn:
+        with self.connection() as conn:
             result = conn.execute(text("SHOW DATABASES"))
             databases = [row[0] for row in result.fetchall()]
             # Filter out system databases
-            system_dbs = ['information_schema', 'mysql', 'performance_schema', 'sys']
-            return [db for db in databases if db not in system_dbs]
+            return [db for db in databases if db not in SYSTEM_DATABASES]
+    
+    def get_database_summaries(self) -> List[Dict[str, Any]]:
+        """Get size and table count for every database in one grouped query"""
+        query = text("""
+            SELECT 
+                s.schema_name,
+                ROUND(SUM(t.data_length + t.index_length) / 1024 / 1024, 2) as size_mb,
+                SUM(t.table_type = 'BASE TABLE') as table_count
+            FROM information_schema.schemata s
+            LEFT JOIN information_schema.tables t ON t.table_schema = s.schema_name
+            GROUP BY s.schema_name
+            ORDER BY s.schema_name
+        """)
+        with self.connection() as conn:
+            rows = conn.execute(query).fetchall()
+        return [
+            {
+                "name": name,
+                "size": f"{size_mb} MB" if size_mb else "0 MB",
+                "tables_count": int(table_count or 0)
+            }
+            for name, size_mb, table_count in rows
+            if name not in SYSTEM_DATABASES
+        ]
     
     def create_database(self, database_name: str, charset: str = 'utf8mb4', collation: str = 'utf8mb4_unicode_ci'):
         """Create a new database"""
-        with self.engine.connect() as conn:
+        with self.connection() as conn:
             conn.execute(text(f"CREATE DATABASE `{database_name}` CHARACTER SET {charset} COLLATE {collation}"))
             conn.commit()
+        self.invalidate_metadata()
     
     def drop_database(self, database_name: str):
         """Drop a database"""
-        with self.engine.connect() as conn:
+        with self.connection() as conn:
             conn.execute(text(f"DROP DATABASE `{database_name}`"))
             conn.commit()
+        self.invalidate_metadata()
     
     def get_database_size(self, database_name: str) -> str:
         """Get database size"""
@@ -36,7 +106,7 @@ class MySQLService(BaseDatabaseService):
             FROM information_schema.tables 
             WHERE table_schema = :db_name
         """)
-        with self.engine.connect() as conn:
+        with self.connection() as conn:
             result = conn.execute(query, {"db_name": database_name}).fetchone()
             return f"{result[0]} MB" if result and result[0] else "0 MB"
     
@@ -47,6 +117,29 @@ class MySQLService(BaseDatabaseService):
             FROM information_schema.tables 
             WHERE table_schema = :db_name AND table_type = 'BASE TABLE'
         """)
-        with self.engine.connect() as conn:
+        with self.connection() as conn:
             result = conn.execute(query, {"db_name": database_name}).fetchone()
-            return result[0] if result else 0
\ No newline at end of file
+            return result[0] if result else 0
+    
+    def random_predicate(self, fraction: float) -> str:
+        """RAND() draws a fresh number per row"""
+        return f"RAND() < {float(fraction):.10f}"
+    
+    def _load_table_stats(self, table_names: List[str] = None, exact: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Get estimated row counts and sizes from information_schema.tables"""
+        sql = """
+            SELECT table_name, table_rows, data_length + index_length
+            FROM information_schema.tables 
+            WHERE table_schema = DATABASE() AND table_type = 'BASE TABLE'
+        """
+        params = {}
+        if table_names is not None:
+            sql += " AND table_name IN :names"
+            params["names"] = list(table_names)
+        query = text(sql).bindparams(bindparam("names", expanding=True)) if params else text(sql)
+        with self.connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return {
+            name: {"row_count": row_count, "size_bytes": size_bytes}
+            for name, row_count, size_bytes in rows
+        }
\ No newline at end of file
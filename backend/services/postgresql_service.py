@@ -2,14 +2,87 @@
 PostgreSQL specific database operations
 """
 from services.base_service import BaseDatabaseService
-from sqlalchemy import text
-from typing import List
+from sqlalchemy import text, bindparam
+from contextlib import contextmanager
+from datetime import date, datetime, time
+from typing import List, Dict, Any
+import io
+import json
 
 class PostgreSQLService(BaseDatabaseService):
+    explain_prefix = "EXPLAIN (FORMAT JSON) "
+    
+    # Each PostgreSQL session is a backend process, so keep the pool modest
+    default_pool_settings = {
+        **BaseDatabaseService.default_pool_settings,
+        "pool_size": 5,
+        "max_overflow": 5,
+        "pool_recycle": 1800,
+    }
+    
+    def get_backend_handle(self, conn) -> int:
+        """Backend process id, looked up once per pooled connection"""
+        info = conn.connection.info
+        if "backend_pid" not in info:
+            info["backend_pid"] = conn.exec_driver_sql("SELECT pg_backend_pid()").scalar()
+        return info["backend_pid"]
+    
+    def cancel_backend(self, handle: int):
+        """Cancel the backend's current statement with pg_cancel_backend"""
+        with self.control_connection() as conn:
+            conn.execute(text("SELECT pg_cancel_backend(:pid)"), {"pid": handle})
+    
+    @contextmanager
+    def with_statement_timeout(self, conn, seconds: float = None):
+        """SET LOCAL scopes statement_timeout to the current transaction"""
+        if seconds:
+            conn.execute(text(f"SET LOCAL statement_timeout = {int(seconds * 1000)}"))
+        yield
+    
+    def is_interrupted(self, error) -> bool:
+        """query_canceled covers both statement_timeout and pg_cancel_backend"""
+        return getattr(error.orig, "pgcode", None) == "57014"
+    
+    @staticmethod
+    def _copy_value(value: Any) -> str:
+        """Encode one value for COPY's text format"""
+        if value is None:
+            return "\\N"
+        if isinstance(value, bool):
+            text_value = "t" if value else "f"
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            text_value = "\\x" + bytes(value).hex()
+        elif isinstance(value, (dict, list)):
+            text_value = json.dumps(value)
+        elif isinstance(value, (datetime, date, time)):
+            text_value = value.isoformat()
+        else:
+            text_value = str(value)
+        return (text_value.replace("\\", "\\\\").replace("\t", "\\t")
+                .replace("\n", "\\n").replace("\r", "\\r"))
+    
+    def bulk_insert(self, conn, table_name: str, columns: List[str], rows: List[tuple],
+                    types: List[Any] = None):
+        """
+        Stream the batch through COPY FROM STDIN, the fastest load path
+        PostgreSQL has. The server parses each text value as its column's type
+        """
+        quote = conn.dialect.identifier_preparer.quote
+        statement = f"COPY {quote(table_name)} ({', '.join(quote(name) for name in columns)}) FROM STDIN"
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(self._copy_value(value) for value in row))
+            buffer.write("\n")
+        buffer.seek(0)
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.copy_expert(statement, buffer)
+        finally:
+            cursor.close()
     
     def get_databases(self) -> List[str]:
         """Get list of all databases"""
-        with self.engine.connect() as conn:
+        with self.connection() as conn:
             result = conn.execute(text(
                 "SELECT datname FROM pg_database WHERE datistemplate = false"
             ))
@@ -17,25 +90,54 @@ class PostgreSQLService(BaseDatabaseService):
             # Filter out postgres system database
             return [db for db in databases if db != 'postgres']
     
+    def get_database_summaries(self) -> List[Dict[str, Any]]:
+        """
+        Get size for every database in one projection over pg_database.
+        Table counts are only visible for the database we are connected to
+        """
+        query = text("""
+            SELECT 
+                d.datname,
+                CASE WHEN has_database_privilege(d.datname, 'CONNECT')
+                     THEN pg_size_pretty(pg_database_size(d.datname)) END,
+                CASE WHEN d.datname = current_database() THEN (
+                    SELECT COUNT(*) 
+                    FROM information_schema.tables 
+                    WHERE table_schema = 'public' 
+                    AND table_type = 'BASE TABLE'
+                ) END
+            FROM pg_database d
+            WHERE d.datistemplate = false AND d.datname != 'postgres'
+            ORDER BY d.datname
+        """)
+        with self.connection() as conn:
+            rows = conn.execute(query).fetchall()
+        return [
+            {"name": name, "size": size, "tables_count": table_count}
+            for name, size, table_count in rows
+        ]
+    
     def create_database(self, database_name: str):
         """Create a new database"""
         # PostgreSQL requires autocommit for CREATE DATABASE
-        with self.engine.connect() as conn:
+        with self.connection() as conn:
             conn.execution_options(isolation_level="AUTOCOMMIT")
             conn.execute(text(f'CREATE DATABASE "{database_name}"'))
+        self.invalidate_metadata()
     
     def drop_database(self, database_name: str):
         """Drop a database"""
-        with self.engine.connect() as conn:
+        with self.connection() as conn:
             conn.execution_options(isolation_level="AUTOCOMMIT")
             conn.execute(text(f'DROP DATABASE "{database_name}"'))
+        self.invalidate_metadata()
     
     def get_database_size(self, database_name: str) -> str:
         """Get database size"""
         query = text("""
             SELECT pg_size_pretty(pg_database_size(:db_name))
         """)
-        with self.engine.connect() as conn:
+        with self.connection() as conn:
             result = conn.execute(query, {"db_name": database_name}).fetchone()
             return result[0] if result else "0 bytes"
     
@@ -48,6 +150,37 @@ class PostgreSQLService(BaseDatabaseService):
             AND table_schema = 'public' 
             AND table_type = 'BASE TABLE'
         """)
-        with self.engine.connect() as conn:
+        with self.connection() as conn:
             result = conn.execute(query, {"db_name": database_name}).fetchone()
-            return result[0] if result else 0
\ No newline at end of file
+            return result[0] if result else 0
+    
+    def select_sample(self, table_name: str, columns: List[str], fraction: float = None) -> str:
+        """TABLESAMPLE SYSTEM reads only the sampled pages instead of filtering every row"""
+        if fraction is None or fraction >= 1:
+            return super().select_sample(table_name, columns)
+        quote = self.engine.dialect.identifier_preparer.quote
+        return (
+            f"SELECT {', '.join(quote(name) for name in columns)} FROM {quote(table_name)} "
+            f"TABLESAMPLE SYSTEM ({max(fraction * 100, 0.0001):.6f})"
+        )
+    
+    def _load_table_stats(self, table_names: List[str] = None, exact: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Get estimated row counts and sizes from pg_class"""
+        sql = """
+            SELECT c.relname, c.reltuples::bigint, pg_total_relation_size(c.oid)
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = current_schema() AND c.relkind IN ('r', 'p')
+        """
+        params = {}
+        if table_names is not None:
+            sql += " AND c.relname IN :names"
+            params["names"] = list(table_names)
+        query = text(sql).bindparams(bindparam("names", expanding=True)) if params else text(sql)
+        with self.connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        # reltuples is -1 until the table has been vacuumed or analyzed
+        return {
+            name: {"row_count": row_count if row_count >= 0 else None, "size_bytes": size_bytes}
+            for name, row_count, size_bytes in rows
+        }
\ No newline at end of file
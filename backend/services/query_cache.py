@@ -0,0 +1,165 @@
+"""
+Result cache for read-only queries
+"""
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from utils.serialization import dumps
+import os
+import re
+import sys
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESULT_CACHE_BYTES = int(os.getenv("DBM_RESULT_CACHE_BYTES", str(64 * 1024 * 1024)))
+DEFAULT_RESULT_CACHE_TTL = float(os.getenv("DBM_RESULT_CACHE_TTL", "30"))
+
+IDENTIFIER = r'(?:[`"\[]?[\w$]+[`"\]]?\.)*[`"\[]?([\w$]+)[`"\]]?'
+READ_TABLES = re.compile(r"\b(?:FROM|JOIN)\s+" + IDENTIFIER, re.IGNORECASE)
+WRITE_TABLES = re.compile(
+    r"^\s*(?:INSERT\s+(?:IGNORE\s+)?INTO|REPLACE\s+INTO|UPDATE|DELETE\s+FROM|"
+    r"TRUNCATE(?:\s+TABLE)?|ALTER\s+TABLE|DROP\s+TABLE(?:\s+IF\s+EXISTS)?)\s+" + IDENTIFIER,
+    re.IGNORECASE
+)
+# A comma inside a FROM clause may be an implicit join we cannot follow
+COMMA_FROM = re.compile(r"\bFROM\s+[^();]*,", re.IGNORECASE)
+WRITE_KEYWORDS = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|CREATE|ALTER|DROP|TRUNCATE)\b", re.IGNORECASE)
+
+def normalize_sql(query: str) -> str:
+    """Collapse whitespace and trailing semicolons so equivalent SQL shares a key"""
+    return " ".join(query.split()).rstrip(";").rstrip()
+
+def read_tables(query: str) -> Optional[FrozenSet[str]]:
+    """Tables a read query depends on, or None when they cannot be determined"""
+    if COMMA_FROM.search(query):
+        return None
+    tables = frozenset(name.lower() for name in READ_TABLES.findall(query))
+    return tables or None
+
+def written_table(query: str) -> Optional[str]:
+    """Table a write statement targets, or None when it cannot be determined"""
+    match = WRITE_TABLES.match(query)
+    return match.group(1).lower() if match else None
+
+def is_cacheable(query: str) -> bool:
+    """Only plain reads are cached; data-modifying CTEs and the like are not"""
+    return not WRITE_KEYWORDS.search(query)
+
+def estimate_size(rows: List[tuple]) -> int:
+    """Rough in-memory size of a list of row tuples"""
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+    return size
+
+class QueryResultCache:
+    """LRU result cache bounded by total bytes, with a TTL per entry"""
+    
+    def __init__(self, max_bytes: int = DEFAULT_RESULT_CACHE_BYTES,
+                 default_ttl: float = DEFAULT_RESULT_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_bytes // 4
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.invalidations = 0
+    
+    @staticmethod
+    def make_key(database: str, namespace: str, query: str, params: Dict = None, limit: int = None) -> Tuple:
+        """
+        Entries belong to one connection, since credentials decide what a query
+        may see, and are grouped by database so writes from any connection reach them
+        """
+        return (database, namespace, normalize_sql(query), dumps(params or {}), limit)
+    
+    def get(self, key: Tuple) -> Optional[Tuple[List[str], List[tuple]]]:
+        """Return (columns, rows) for a live entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry["expires"] <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["columns"], entry["rows"]
+    
+    def put(self, key: Tuple, columns: List[str], rows: List[tuple], size: int,
+            ttl: float = None) -> bool:
+        """Store a result, evicting least recently used entries to fit"""
+        if size > self.max_entry_bytes:
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted["size"]
+                self.evictions += 1
+                self.evicted_bytes += evicted["size"]
+            self._entries[key] = {
+                "columns": columns,
+                "rows": rows,
+                "size": size,
+                "tables": read_tables(key[2]),
+                "expires": time.monotonic() + (ttl or self.default_ttl),
+            }
+            self.current_bytes += size
+        return True
+    
+    def _remove(self, key: Tuple):
+        entry = self._entries.pop(key)
+        self.current_bytes -= entry["size"]
+    
+    def invalidate(self, database: str, query: str = None):
+        """
+        Drop entries of every connection to a database that a write may have
+        changed: those reading the written table or with unknown tables, or
+        every entry when the target is unknown
+        """
+        table = written_table(query) if query else None
+        with self._lock:
+            for key in list(self._entries):
+                if key[0] != database:
+                    continue
+                tables = self._entries[key]["tables"]
+                if table is None or tables is None or table in tables:
+                    self._remove(key)
+            self.invalidations += 1
+    
+    def clear(self, namespace: str = None):
+        """Drop all entries, or all for one connection"""
+        with self._lock:
+            for key in list(self._entries):
+                if namespace is None or key[1] == namespace:
+                    self._remove(key)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Report hit ratio and memory use for sizing the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "max_entry_bytes": self.max_entry_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "evicted_bytes": self.evicted_bytes,
+                "invalidations": self.invalidations,
+            }
+
+# Global result cache instance
+query_cache = QueryResultCache()
\ No newline at end of file
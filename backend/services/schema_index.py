@@ -0,0 +1,243 @@
+"""
+In-memory search index over table and column names of every open connection
+"""
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, List, Set
+from services.connection_manager import connection_manager
+from services.health_monitor import CircuitOpenError
+import os
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_POLL = float(os.getenv("DBM_SCHEMA_INDEX_POLL", "5"))
+DEFAULT_INDEX_REFRESH = float(os.getenv("DBM_SCHEMA_INDEX_REFRESH", "600"))
+DEFAULT_INDEX_RETRY = float(os.getenv("DBM_SCHEMA_INDEX_RETRY", "60"))
+DEFAULT_FUZZY_THRESHOLD = float(os.getenv("DBM_SCHEMA_FUZZY_THRESHOLD", "0.3"))
+SEARCH_MODES = ("auto", "prefix", "substring", "fuzzy")
+
+def trigrams(name: str, padded: bool = True) -> Set[str]:
+    """Three-character shingles; padding makes short names and word starts count"""
+    if padded:
+        name = f"  {name} "
+    return {name[i:i + 3] for i in range(len(name) - 2)}
+
+class ConnectionIndex:
+    """
+    Immutable index of one connection's schema. Each distinct lowercase
+    name is stored once, with the tables and columns that carry it
+    """
+    
+    def __init__(self, connection_id: str, snapshot: Dict[str, Dict[str, Any]], generation: int = None):
+        self.connection_id = connection_id
+        self.generation = generation
+        self.built_at = time.monotonic()
+        self.entries: Dict[str, List[Dict[str, Any]]] = {}
+        for table_name, structure in snapshot.items():
+            self._add(table_name, {"kind": "table", "table": table_name, "column": None, "type": None})
+            for col in structure["columns"]:
+                self._add(col["name"], {
+                    "kind": "column", "table": table_name, "column": col["name"], "type": str(col["type"])
+                })
+        self.names = sorted(self.entries)
+        self.postings: Dict[str, List[int]] = {}
+        self.gram_counts: List[int] = []
+        for position, name in enumerate(self.names):
+            grams = trigrams(name)
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(position)
+        self.tables = len(snapshot)
+        self.columns = sum(len(structure["columns"]) for structure in snapshot.values())
+    
+    def _add(self, name: str, entry: Dict[str, Any]):
+        entry["connection_id"] = self.connection_id
+        entry["name"] = name
+        self.entries.setdefault(name.lower(), []).append(entry)
+    
+    def prefix(self, query: str) -> Dict[str, float]:
+        matches = {}
+        position = bisect_left(self.names, query)
+        while position < len(self.names) and self.names[position].startswith(query):
+            name = self.names[position]
+            matches[name] = 1.0 if name == query else 0.9
+            position += 1
+        return matches
+    
+    def substring(self, query: str) -> Dict[str, float]:
+        if len(query) < 3:
+            candidates = self.names
+        else:
+            # Names containing the query contain all of its trigrams
+            postings = sorted((self.postings.get(gram, []) for gram in trigrams(query, padded=False)), key=len)
+            positions = set(postings[0])
+            for posting in postings[1:]:
+                positions.intersection_update(posting)
+            candidates = [self.names[position] for position in positions]
+        return {name: 0.8 for name in candidates if query in name}
+    
+    def fuzzy(self, query: str, threshold: float = DEFAULT_FUZZY_THRESHOLD) -> Dict[str, float]:
+        """Trigram similarity (shared over combined trigrams), as pg_trgm computes it"""
+        query_grams = trigrams(query)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self.postings.get(gram, ()))
+        matches = {}
+        for position, count in shared.items():
+            score = count / (len(query_grams) + self.gram_counts[position] - count)
+            if score >= threshold:
+                matches[self.names[position]] = round(score * 0.7, 4)
+        return matches
+
+class SchemaIndex:
+    """
+    Keeps a ConnectionIndex for every open connection, built in the
+    background from the cached schema snapshot and rebuilt when the
+    connection's metadata cache is invalidated or the index gets old
+    """
+    
+    def __init__(self, poll_interval: float = DEFAULT_INDEX_POLL,
+                 refresh_interval: float = DEFAULT_INDEX_REFRESH,
+                 retry_interval: float = DEFAULT_INDEX_RETRY):
+        self.poll_interval = poll_interval
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self._indexes: Dict[str, ConnectionIndex] = {}
+        # connection_id -> (error message, monotonic time of the failure)
+        self._errors: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+    
+    def ensure_started(self):
+        with self._lock:
+            if self._thread is not None or self._stopped.is_set():
+                return
+            self._thread = threading.Thread(target=self._loop, name="db-schema-index", daemon=True)
+            self._thread.start()
+    
+    def refresh(self, connection_id: str = None):
+        """Mark one or all connections for rebuilding on the next pass"""
+        with self._lock:
+            if connection_id is None:
+                self._indexes.clear()
+                self._errors.clear()
+            else:
+                self._indexes.pop(connection_id, None)
+                self._errors.pop(connection_id, None)
+        self._wake.set()
+    
+    def _loop(self):
+        while not self._stopped.is_set():
+            for connection_id in self._stale_connections():
+                if self._stopped.is_set():
+                    return
+                self._build(connection_id)
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+    
+    def _stale_connections(self) -> List[str]:
+        """Connections never indexed, invalidated since, or due for a refresh"""
+        open_ids = set(connection_manager.connections)
+        now = time.monotonic()
+        stale = []
+        with self._lock:
+            for connection_id in set(self._indexes) - open_ids:
+                del self._indexes[connection_id]
+                self._errors.pop(connection_id, None)
+            for connection_id in open_ids:
+                index = self._indexes.get(connection_id)
+                service = connection_manager.connections.get(connection_id, {}).get("service")
+                failed = self._errors.get(connection_id)
+                if service is None or (failed and now - failed[1] < self.retry_interval):
+                    continue
+                if (index is None or index.generation != service.metadata_cache.generation
+                        or now - index.built_at > self.refresh_interval):
+                    stale.append(connection_id)
+        return stale
+    
+    def _build(self, connection_id: str):
+        service = connection_manager.get_connection(connection_id)
+        if service is None:
+            return
+        try:
+            with connection_manager.guard(connection_id):
+                # Read the generation first so DDL during the build triggers another one
+                generation = service.metadata_cache.generation
+                index = ConnectionIndex(connection_id, service.get_schema_snapshot(), generation)
+        except CircuitOpenError:
+            return
+        except Exception as e:
+            logger.warning(f"Could not index schema of {connection_id}: {e}")
+            with self._lock:
+                self._errors[connection_id] = (str(e), time.monotonic())
+            return
+        with self._lock:
+            self._indexes[connection_id] = index
+            self._errors.pop(connection_id, None)
+        logger.info(f"Indexed {index.tables} tables and {index.columns} columns of {connection_id}")
+    
+    def search(self, query: str, mode: str = "auto", kind: str = None,
+               connection_id: str = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Match table and column names. auto ranks exact and prefix matches
+        first, then substrings, and falls back to fuzzy matching to fill
+        the limit
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unsupported search mode '{mode}'")
+        self.ensure_started()
+        query = query.strip().lower()
+        if not query:
+            return []
+        with self._lock:
+            indexes = [
+                index for key, index in self._indexes.items() if connection_id is None or key == connection_id
+            ]
+        
+        matches = []
+        for index in indexes:
+            scores: Dict[str, float] = {}
+            if mode in ("auto", "substring"):
+                scores.update(index.substring(query))
+            if mode in ("auto", "prefix"):
+                scores.update(index.prefix(query))
+            if mode == "fuzzy" or (mode == "auto" and len(scores) < limit):
+                for name, score in index.fuzzy(query).items():
+                    scores.setdefault(name, score)
+            matches.extend((-score, len(name), name, index.connection_id, index) for name, score in scores.items())
+        
+        # Rank distinct names first; a common name can stand for thousands of columns
+        matches.sort(key=lambda match: match[:4])
+        results = []
+        for negative_score, _, name, _, index in matches:
+            for entry in index.entries[name]:
+                if kind is None or entry["kind"] == kind:
+                    results.append({**entry, "score": -negative_score})
+                    if len(results) >= limit:
+                        return results
+        return results
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            indexes = list(self._indexes.values())
+            errors = {connection_id: error for connection_id, (error, _) in self._errors.items()}
+        return {
+            "connections": len(indexes),
+            "tables": sum(index.tables for index in indexes),
+            "columns": sum(index.columns for index in indexes),
+            "distinct_names": sum(len(index.names) for index in indexes),
+            "pending": sorted(set(connection_manager.connections) - {index.connection_id for index in indexes}),
+            "errors": errors,
+        }
+    
+    def shutdown(self):
+        self._stopped.set()
+        self._wake.set()
+
+# Global schema index instance
+schema_index = SchemaIndex()
\ No newline at end of file
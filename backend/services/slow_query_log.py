@@ -0,0 +1,226 @@
+"""
+Per-connection slow query log
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from utils.serialization import dumps
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOW_QUERY_THRESHOLD = float(os.getenv("DBM_SLOW_QUERY_THRESHOLD", "0.5"))
+DEFAULT_SLOW_QUERY_ENTRIES = int(os.getenv("DBM_SLOW_QUERY_ENTRIES", "500"))
+DEFAULT_SLOW_QUERY_EXPLAIN = os.getenv("DBM_SLOW_QUERY_EXPLAIN", "false").lower() in ("1", "true", "yes")
+DEFAULT_SLOW_QUERY_DB = os.getenv("DBM_SLOW_QUERY_DB") or None
+
+EXPLAINABLE_STATEMENTS = ("SELECT", "WITH", "VALUES", "TABLE", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b", re.IGNORECASE)
+BIND_PARAMETER = re.compile(r"%\(\w+\)s|%s|(?<![:\w]):\w+|\?|\$\d+")
+VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+def fingerprint(query: str) -> str:
+    """Reduce a statement to its shape: literals and bind parameters become ?"""
+    shape = STRING_LITERAL.sub("?", query)
+    shape = NUMBER_LITERAL.sub("?", shape)
+    shape = BIND_PARAMETER.sub("?", shape)
+    shape = " ".join(shape.split()).rstrip(";").rstrip()
+    # IN lists and multi-row VALUES of any length share one fingerprint
+    return VALUE_LIST.sub("(?+)", shape)
+
+def params_shape(params: Any) -> Any:
+    """Parameter names and value types, without the values"""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        if params and isinstance(params[0], (dict, list, tuple)):
+            # executemany: describe the first row and how many there were
+            return {"rows": len(params), "row": params_shape(params[0])}
+        return [type(value).__name__ for value in params]
+    return type(params).__name__
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+class SlowQueryLog:
+    """
+    Keeps the most recent statements over a per-connection threshold in a
+    ring buffer, optionally capturing their plans and copying them to SQLite
+    """
+    
+    def __init__(self, threshold: float = DEFAULT_SLOW_QUERY_THRESHOLD,
+                 max_entries: int = DEFAULT_SLOW_QUERY_ENTRIES,
+                 explain: bool = DEFAULT_SLOW_QUERY_EXPLAIN,
+                 db_path: str = DEFAULT_SLOW_QUERY_DB):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.explain = explain
+        self.db_path = db_path
+        self._settings: Dict[str, Dict[str, Any]] = {}
+        self._entries: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db = None
+        # Plans and persistence are handled off the query path, one at a time
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-log")
+    
+    def configure(self, connection_id: str, threshold: float = None, explain: bool = None):
+        """Override the threshold or plan capture for one connection"""
+        with self._lock:
+            self._settings[connection_id] = {
+                "threshold": self.threshold if threshold is None else threshold,
+                "explain": self.explain if explain is None else explain,
+            }
+    
+    def get_settings(self, connection_id: str) -> Dict[str, Any]:
+        return self._settings.get(connection_id) or {"threshold": self.threshold, "explain": self.explain}
+    
+    def record(self, service, query: str, params: Any, duration: float,
+               rows: Optional[int] = None, source: str = "user", driver_sql: bool = False):
+        """Log a statement if it ran longer than its connection's threshold"""
+        connection_id = service.connection_id or ""
+        settings = self.get_settings(connection_id)
+        if duration < settings["threshold"]:
+            return
+        
+        shape = fingerprint(query)
+        entry = {
+            "connection_id": connection_id,
+            "fingerprint": hashlib.sha1(shape.encode()).hexdigest()[:16],
+            "statement": shape,
+            "query": query,
+            "params_shape": params_shape(params),
+            "duration": round(duration, 6),
+            "rows": rows if rows is not None and rows >= 0 else None,
+            "source": source,
+            "recorded_at": time.time(),
+            "plan": None,
+            "plan_error": None,
+        }
+        with self._lock:
+            buffer = self._entries.get(connection_id)
+            if buffer is None:
+                buffer = self._entries[connection_id] = deque(maxlen=self.max_entries)
+            buffer.append(entry)
+        
+        explain = settings["explain"] and service.get_query_type(query) in EXPLAINABLE_STATEMENTS
+        if explain or self.db_path:
+            try:
+                self._worker.submit(self._finish_entry, service, entry, params, explain, driver_sql)
+            except RuntimeError:
+                # Shutting down
+                pass
+    
+    def _finish_entry(self, service, entry: Dict[str, Any], params: Any, explain: bool, driver_sql: bool):
+        if explain:
+            try:
+                entry["plan"] = service.explain_query(entry["query"], params, driver_sql=driver_sql)
+            except Exception as e:
+                entry["plan_error"] = str(e)
+        if self.db_path:
+            try:
+                self._persist(service, entry)
+            except Exception as e:
+                logger.warning(f"Could not persist slow query entry: {e}")
+    
+    def _persist(self, service, entry: Dict[str, Any]):
+        with self._db_lock:
+            if self._db is None:
+                self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS slow_queries ("
+                    "id INTEGER PRIMARY KEY AUTOINCREMENT, connection_id TEXT, database_name TEXT, "
+                    "fingerprint TEXT, statement TEXT, query TEXT, params_shape TEXT, duration REAL, "
+                    "rows INTEGER, source TEXT, plan TEXT, recorded_at REAL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS slow_queries_fingerprint ON slow_queries (fingerprint)")
+            database = service.engine.url.database if service.engine is not None else None
+            self._db.execute(
+                "INSERT INTO slow_queries (connection_id, database_name, fingerprint, statement, query, "
+                "params_shape, duration, rows, source, plan, recorded_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry["connection_id"], database, entry["fingerprint"], entry["statement"], entry["query"],
+                    dumps(entry["params_shape"]), entry["duration"], entry["rows"], entry["source"],
+                    dumps(entry["plan"]) if entry["plan"] is not None else None, entry["recorded_at"],
+                )
+            )
+            # The file keeps a bounded history as well
+            self._db.execute(
+                "DELETE FROM slow_queries WHERE id <= (SELECT MAX(id) FROM slow_queries) - ?",
+                (self.max_entries * 20,)
+            )
+            self._db.commit()
+    
+    def get_entries(self, connection_id: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent slow statements, newest first"""
+        with self._lock:
+            entries = list(self._entries.get(connection_id, ()))
+        return [dict(entry) for entry in reversed(entries[-limit:])]
+    
+    def summarize(self, connection_id: str) -> List[Dict[str, Any]]:
+        """Aggregate logged statements by fingerprint, slowest total time first"""
+        with self._lock:
+            entries = list(self._entries.get(connection_id, ()))
+        
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for entry in entries:
+            groups.setdefault(entry["fingerprint"], []).append(entry)
+        
+        summary = []
+        for key, group in groups.items():
+            durations = sorted(entry["duration"] for entry in group)
+            rows = [entry["rows"] for entry in group if entry["rows"] is not None]
+            latest = group[-1]
+            plans = [entry for entry in group if entry["plan"] is not None]
+            summary.append({
+                "fingerprint": key,
+                "statement": latest["statement"],
+                "source": latest["source"],
+                "count": len(group),
+                "total": round(sum(durations), 6),
+                "p50": percentile(durations, 0.50),
+                "p95": percentile(durations, 0.95),
+                "p99": percentile(durations, 0.99),
+                "max": durations[-1],
+                "avg_rows": round(sum(rows) / len(rows), 2) if rows else None,
+                "last_seen": latest["recorded_at"],
+                "plan": plans[-1]["plan"] if plans else None,
+            })
+        summary.sort(key=lambda item: item["total"], reverse=True)
+        return summary
+    
+    def clear(self, connection_id: str):
+        """Drop the in-memory entries of a connection"""
+        with self._lock:
+            self._entries.pop(connection_id, None)
+    
+    def remove(self, connection_id: str):
+        """Forget a closed connection's entries and settings"""
+        with self._lock:
+            self._entries.pop(connection_id, None)
+            self._settings.pop(connection_id, None)
+    
+    def shutdown(self):
+        self._worker.shutdown(wait=False, cancel_futures=True)
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+# Global slow query log instance
+slow_query_log = SlowQueryLog()
\ No newline at end of file
@@ -2,24 +2,211 @@
 SQLite specific database operations
 """
 from services.base_service import BaseDatabaseService
-from sqlalchemy import text
-from typing import List
+from sqlalchemy import text, event, bindparam
+from sqlalchemy.engine import make_url
+from contextlib import contextmanager
+from datetime import time
+from decimal import Decimal
+from typing import List, Dict, Any, Optional
+from urllib.parse import unquote
+from utils.serialization import dumps
 import os
+import threading
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SQLITE_MMAP_SIZE = int(os.getenv("DBM_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+DEFAULT_SQLITE_CACHE_KB = int(os.getenv("DBM_SQLITE_CACHE_KB", "65536"))
+DEFAULT_SQLITE_BUSY_TIMEOUT = int(os.getenv("DBM_SQLITE_BUSY_TIMEOUT", "5000"))
+# dbstat reads every page it reports on, so estimates skip it above this file size
+DEFAULT_SQLITE_DBSTAT_MAX_BYTES = int(os.getenv("DBM_SQLITE_DBSTAT_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Larger page cache and in-memory temp storage while a load transaction runs
+BULK_LOAD_PRAGMAS = {"cache_size": -262144, "temp_store": 2}
+
+# One writer lock per database file, shared by every connection to it
+_write_locks: Dict[str, threading.Lock] = {}
+_write_locks_guard = threading.Lock()
+
+def _write_lock_for(path: str) -> threading.Lock:
+    key = os.path.realpath(path)
+    with _write_locks_guard:
+        return _write_locks.setdefault(key, threading.Lock())
 
 class SQLiteService(BaseDatabaseService):
+    explain_prefix = "EXPLAIN QUERY PLAN "
+    
+    # Local file connections are cheap to keep and never go stale. Under WAL
+    # every pooled connection can read concurrently with the single writer
+    default_pool_settings = {
+        **BaseDatabaseService.default_pool_settings,
+        "pool_size": 8,
+        "max_overflow": 0,
+        "pool_recycle": None,
+        "pool_pre_ping": False,
+    }
+    
+    @property
+    def database_path(self) -> Optional[str]:
+        """Path of the database file, or None for in-memory databases"""
+        database = make_url(self.connection_string).database
+        if not database or database == ":memory:":
+            return None
+        return unquote(database[len("file:"):]) if database.startswith("file:") else database
+    
+    @property
+    def database_key(self) -> str:
+        """The database file, however it was named or opened"""
+        path = self.database_path
+        # Every in-memory connection is a database of its own
+        return f"sqlite://{os.path.realpath(path)}" if path else f"sqlite://memory/{id(self)}"
+    
+    @property
+    def read_only(self) -> bool:
+        """Opened through a mode=ro URI, as for browsing shared files"""
+        return make_url(self.connection_string).query.get("mode") == "ro"
+    
+    def get_pragmas(self) -> Dict[str, Any]:
+        """Tuning applied to every new connection to a database file"""
+        pragmas = {
+            "busy_timeout": DEFAULT_SQLITE_BUSY_TIMEOUT,
+            "cache_size": -DEFAULT_SQLITE_CACHE_KB,
+            "mmap_size": DEFAULT_SQLITE_MMAP_SIZE,
+        }
+        if not self.read_only:
+            # WAL lets readers run alongside a writer; NORMAL sync is safe under WAL
+            pragmas["journal_mode"] = "WAL"
+            pragmas["synchronous"] = "NORMAL"
+        return pragmas
+    
+    def _create_engine(self, options: Dict[str, Any]):
+        engine = super()._create_engine(options)
+        if self.database_path is None:
+            return engine
+        pragmas = self.get_pragmas()
+        
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            for name, value in pragmas.items():
+                dbapi_connection.execute(f"PRAGMA {name} = {value}")
+        return engine
+    
+    def get_engine_options(self):
+        """In-memory databases keep SQLAlchemy's single-connection pool"""
+        if self.connection_string in ("sqlite://", "sqlite:///:memory:"):
+            return {}
+        return super().get_engine_options()
+    
+    def can_share_engine(self) -> bool:
+        """Each in-memory connection is its own database, so never share those"""
+        return self.connection_string not in ("sqlite://", "sqlite:///:memory:")
+    
+    def get_backend_handle(self, conn):
+        """The sqlite3 connection itself; interrupt() is safe from other threads"""
+        return conn.connection.dbapi_connection
+    
+    def cancel_backend(self, handle):
+        """Abort the statement running on a sqlite3 connection"""
+        handle.interrupt()
+    
+    @contextmanager
+    def with_statement_timeout(self, conn, seconds: float = None):
+        """SQLite has no statement timeout, so interrupt from a timer instead"""
+        if not seconds:
+            yield
+            return
+        
+        handle = conn.connection.dbapi_connection
+        lock = threading.Lock()
+        finished = False
+        
+        def interrupt():
+            # A timer firing as the block exits must not stop the connection's next statement
+            with lock:
+                if not finished:
+                    handle.interrupt()
+        
+        timer = threading.Timer(seconds, interrupt)
+        timer.daemon = True
+        timer.start()
+        try:
+            yield
+        finally:
+            with lock:
+                finished = True
+            timer.cancel()
+    
+    def is_interrupted(self, error) -> bool:
+        """Timeouts and cancels both stop the statement through interrupt()"""
+        return str(error.orig) == "interrupted"
+    
+    def adapt_value(self, value: Any) -> Any:
+        """sqlite3 binds neither Decimal, time, UUID nor JSON documents"""
+        if isinstance(value, Decimal):
+            return str(value)
+        if isinstance(value, time):
+            return value.isoformat()
+        if isinstance(value, (dict, list)):
+            return dumps(value)
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        return value
+    
+    @contextmanager
+    def write_lock(self, is_read: bool = False):
+        """
+        SQLite allows one writer per file, so writers queue here rather than
+        spinning on busy_timeout and failing with "database is locked"
+        """
+        path = self.database_path
+        if is_read or path is None:
+            yield
+            return
+        with _write_lock_for(path):
+            yield
+    
+    @contextmanager
+    def bulk_load_session(self, conn):
+        """Tune pragmas for the load and restore them before the connection goes back to the pool"""
+        with self.write_lock(), self._bulk_pragmas(conn):
+            yield
+    
+    @contextmanager
+    def _bulk_pragmas(self, conn):
+        dbapi_connection = conn.connection.dbapi_connection
+        previous = {
+            name: dbapi_connection.execute(f"PRAGMA {name}").fetchone()[0] for name in BULK_LOAD_PRAGMAS
+        }
+        for name, value in BULK_LOAD_PRAGMAS.items():
+            dbapi_connection.execute(f"PRAGMA {name} = {int(value)}")
+        try:
+            yield
+        finally:
+            for name, value in previous.items():
+                dbapi_connection.execute(f"PRAGMA {name} = {int(value)}")
     
     def get_databases(self) -> List[str]:
         """SQLite has only one database per file"""
         return ["main"]
     
-    def get_tables(self, database: str = None) -> List[str]:
+    def _load_tables(self, database: str = None) -> List[str]:
         """Get list of tables"""
-        with self.engine.connect() as conn:
+        with self.connection() as conn:
             result = conn.execute(text(
                 "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'"
             ))
             return [row[0] for row in result.fetchall()]
     
+    def get_database_summaries(self) -> List[Dict[str, Any]]:
+        """SQLite has a single database; summarize it directly"""
+        return [{
+            "name": "main",
+            "size": self.get_database_size(),
+            "tables_count": self.get_table_count()
+        }]
+    
     def create_database(self, database_name: str):
         """SQLite creates database when connecting to a file"""
         raise NotImplementedError("SQLite databases are file-based")
@@ -30,9 +217,8 @@ class SQLiteService(BaseDatabaseService):
     
     def get_database_size(self, database_name: str = None) -> str:
         """Get database file size"""
-        # Extract file path from connection string
-        db_path = self.connection_string.replace('sqlite:///', '')
-        if os.path.exists(db_path):
+        db_path = self.database_path
+        if db_path and os.path.exists(db_path):
             size_bytes = os.path.getsize(db_path)
             size_mb = size_bytes / (1024 * 1024)
             return f"{size_mb:.2f} MB"
@@ -40,4 +226,60 @@ class SQLiteService(BaseDatabaseService):
     
     def get_table_count(self, database_name: str = None) -> int:
         """Get number of tables"""
-        return len(self.get_tables())
\ No newline at end of file
+        return len(self.get_tables())
+    
+    def random_predicate(self, fraction: float) -> str:
+        """random() is a signed 64-bit integer; keep 31 bits to compare uniformly"""
+        return f"(random() & 2147483647) < {int(fraction * 2147483648)}"
+    
+    def _load_table_stats(self, table_names: List[str] = None, exact: bool = False) -> Dict[str, Dict[str, Any]]:
+        """
+        Get row counts from sqlite_stat1 and sizes from the dbstat virtual
+        table; either may be missing depending on the build and whether
+        ANALYZE has run. dbstat reads every page of the tables it measures,
+        so estimates leave sizes out on files over DBM_SQLITE_DBSTAT_MAX_BYTES
+        """
+        tables = self.get_tables()
+        names = tables if table_names is None else [name for name in table_names if name in tables]
+        stats = {name: {"row_count": None, "size_bytes": None} for name in names}
+        if not stats:
+            return stats
+        
+        def fetch(conn, sql: str):
+            # Restricting to named tables lets dbstat walk only their b-trees
+            if table_names is None:
+                return conn.execute(text(sql.format(where=""))).fetchall()
+            statement = text(sql.format(where="WHERE m.tbl_name IN :names"))
+            return conn.execute(statement.bindparams(bindparam("names", expanding=True)), {"names": names}).fetchall()
+        
+        with self.connection() as conn:
+            page_count = conn.execute(text("PRAGMA page_count")).scalar()
+            page_size = conn.execute(text("PRAGMA page_size")).scalar()
+            if exact or page_count * page_size <= DEFAULT_SQLITE_DBSTAT_MAX_BYTES:
+                try:
+                    rows = fetch(conn, """
+                        SELECT m.tbl_name, SUM(d.pgsize)
+                        FROM sqlite_master m JOIN dbstat d ON d.name = m.name
+                        {where}
+                        GROUP BY m.tbl_name
+                    """)
+                    for name, size_bytes in rows:
+                        if name in stats:
+                            stats[name]["size_bytes"] = size_bytes
+                except Exception as e:
+                    logger.debug(f"dbstat unavailable: {e}")
+            
+            try:
+                # The first number of every stat row is the table's row count
+                rows = fetch(conn, """
+                    SELECT m.tbl_name, MAX(CAST(s.stat AS INTEGER))
+                    FROM sqlite_stat1 s JOIN sqlite_master m ON m.name = s.tbl
+                    {where}
+                    GROUP BY m.tbl_name
+                """)
+                for name, row_count in rows:
+                    if name in stats:
+                        stats[name]["row_count"] = row_count
+            except Exception as e:
+                logger.debug(f"sqlite_stat1 unavailable: {e}")
+        return stats
\ No newline at end of file
@@ -0,0 +1,303 @@
+"""
+Copies tables between connections, in primary key ranges copied in parallel
+"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from sqlalchemy import MetaData, Table, Column, Text, String, JSON, Enum, text
+from typing import Any, Dict, List, Optional
+from utils.serialization import dumps
+import math
+import os
+import threading
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COPY_WORKERS = int(os.getenv("DBM_COPY_WORKERS", "4"))
+DEFAULT_COPY_BATCH_SIZE = int(os.getenv("DBM_COPY_BATCH_SIZE", "5000"))
+RANGES_PER_WORKER = 4
+FINISHED_STATES = ("completed", "failed", "cancelled")
+
+def map_column_type(type_, primary_key: bool = False):
+    """Portable equivalent of a reflected column type, for creating it on another dialect"""
+    try:
+        generic = type_.as_generic()
+    except NotImplementedError:
+        try:
+            python_type = type_.python_type
+        except NotImplementedError:
+            python_type = None
+        generic = JSON() if python_type in (dict, list) else Text()
+    if isinstance(generic, Enum):
+        # PostgreSQL needs a named type for enums; plain strings work everywhere
+        generic = String(max((len(value) for value in generic.enums), default=0) or 255)
+    if isinstance(generic, String) and not generic.length:
+        # MySQL needs a length for VARCHAR and cannot index unbounded TEXT
+        generic = String(255) if primary_key else Text()
+    return generic
+
+def build_target_table(structure: Dict[str, Any], table_name: str) -> Table:
+    primary_keys = set(structure["primary_keys"])
+    return Table(table_name, MetaData(), *[
+        Column(
+            col["name"],
+            map_column_type(col["type"], col["name"] in primary_keys),
+            nullable=col.get("nullable", True),
+            primary_key=col["name"] in primary_keys,
+            # Key values are copied as they are, never generated
+            autoincrement=False
+        )
+        for col in structure["columns"]
+    ])
+
+def _portable(value: Any) -> Any:
+    """
+    JSON documents travel as text; other values are bound by the target
+    for the portable column types
+    """
+    if isinstance(value, (dict, list)):
+        return dumps(value)
+    return value
+
+def _pool_capacity(service) -> Optional[int]:
+    settings = service.pool_settings
+    if not settings.get("pool_size"):
+        return None
+    return settings["pool_size"] + (settings.get("max_overflow") or 0)
+
+class TableCopier:
+    """Runs table copies in the background and keeps their progress for resuming"""
+    
+    def __init__(self, max_finished: int = 100):
+        self.max_finished = max_finished
+        self._copies: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="db-copy")
+    
+    def start(self, source, target, source_table: str, target_table: str = None,
+              workers: int = DEFAULT_COPY_WORKERS, batch_size: int = DEFAULT_COPY_BATCH_SIZE,
+              create_table: bool = True) -> Dict[str, Any]:
+        """Create the target table, plan the key ranges and start copying in the background"""
+        target_table = target_table or source_table
+        structure = source.get_table_structure(source_table)
+        columns = [col["name"] for col in structure["columns"]]
+        key = list(structure["primary_keys"])
+        
+        if create_table:
+            with target.connection() as conn:
+                build_target_table(structure, target_table).create(conn, checkfirst=True)
+                conn.commit()
+            target.invalidate_metadata()
+        elif target_table not in target.get_tables():
+            raise LookupError(f"Table '{target_table}' not found on the target")
+        
+        ranges = self._plan_ranges(source, source_table, structure, max(workers, 1) * RANGES_PER_WORKER)
+        copy = {
+            "copy_id": uuid.uuid4().hex,
+            "source_connection_id": source.connection_id,
+            "target_connection_id": target.connection_id,
+            "source_table": source_table,
+            "target_table": target_table,
+            "columns": columns,
+            "key": key,
+            "batch_size": batch_size,
+            "workers": workers,
+            "status": "running",
+            "rows_copied": 0,
+            "ranges": ranges,
+            "started_at": time.time(),
+            "run_started_at": time.time(),
+            "run_start_rows": 0,
+            "finished_at": None,
+            "error": None,
+        }
+        with self._lock:
+            self._copies[copy["copy_id"]] = copy
+            finished = [copy_id for copy_id, entry in self._copies.items() if entry["status"] in FINISHED_STATES]
+            for copy_id in finished[:max(len(finished) - self.max_finished, 0)]:
+                del self._copies[copy_id]
+        self._pool.submit(self._run, copy, source, target)
+        return self.snapshot(copy)
+    
+    @staticmethod
+    def _plan_ranges(source, table_name: str, structure: Dict[str, Any], count: int) -> List[Dict[str, Any]]:
+        """
+        Split a single integer key into contiguous ranges. Other tables are
+        copied as one range, still ordered by their key so they can resume
+        """
+        whole = [{"index": 0, "low": None, "high": None, "last_key": None, "rows": 0, "status": "pending"}]
+        key = structure["primary_keys"]
+        if len(key) != 1:
+            return whole
+        key_column = next(col for col in structure["columns"] if col["name"] == key[0])
+        try:
+            if key_column["type"].python_type is not int:
+                return whole
+        except NotImplementedError:
+            return whole
+        
+        quote = source.engine.dialect.identifier_preparer.quote
+        with source.connection() as conn:
+            low, high = conn.execute(text(
+                f"SELECT MIN({quote(key[0])}), MAX({quote(key[0])}) FROM {quote(table_name)}"
+            )).one()
+        if low is None:
+            return whole
+        step = max(math.ceil((high - low + 1) / count), 1)
+        return [
+            {"index": index, "low": start, "high": min(start + step - 1, high),
+             "last_key": None, "rows": 0, "status": "pending"}
+            for index, start in enumerate(range(low, high + 1, step))
+        ]
+    
+    def _run(self, copy: Dict[str, Any], source, target):
+        pending = [range_ for range_ in copy["ranges"] if range_["status"] != "done"]
+        # Every worker holds one connection on each side
+        capacities = [capacity for capacity in (_pool_capacity(source), _pool_capacity(target)) if capacity]
+        workers = max(min([copy["workers"], len(pending) or 1, *capacities]), 1)
+        try:
+            # The types the target table is created with, so values are bound the way that table stores them
+            structure = source.get_table_structure(copy["source_table"])
+            types = [column.type for column in build_target_table(structure, copy["target_table"]).columns]
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db-copy-range") as pool:
+                futures = [
+                    pool.submit(self._copy_range, copy, range_, source, target, types) for range_ in pending
+                ]
+                errors = []
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        # Stop the other ranges at their next batch
+                        errors.append(e)
+                        if copy["status"] == "running":
+                            copy["status"] = "failing"
+            if errors:
+                raise errors[0]
+            if copy["status"] == "running":
+                copy["status"] = "completed"
+        except Exception as e:
+            logger.error(f"Copy {copy['copy_id']} failed: {e}")
+            copy["status"] = "failed"
+            copy["error"] = str(e)
+        finally:
+            copy["finished_at"] = time.time()
+            # Cached results and table statistics on the target are now stale
+            target.after_bulk_load(copy["target_table"])
+    
+    def _copy_range(self, copy: Dict[str, Any], range_: Dict[str, Any], source, target,
+                    types: List[Any] = None):
+        """Stream one key range off the source and write it to the target batch by batch"""
+        if copy["status"] != "running":
+            return
+        columns, key = copy["columns"], copy["key"]
+        if not key and range_["rows"]:
+            raise RuntimeError("Tables without a primary key cannot resume a partial copy")
+        
+        quote = source.engine.dialect.identifier_preparer.quote
+        conditions, params = [], {}
+        if range_["low"] is not None:
+            conditions.append(f"{quote(key[0])} BETWEEN :low AND :high")
+            params.update(low=range_["low"], high=range_["high"])
+        if range_["last_key"] is not None:
+            # Row value comparison resumes after the last committed key
+            names = [f"last_{index}" for index in range(len(key))]
+            conditions.append(
+                f"({', '.join(quote(name) for name in key)}) > ({', '.join(':' + name for name in names)})"
+            )
+            params.update(zip(names, range_["last_key"]))
+        sql = f"SELECT {', '.join(quote(name) for name in columns)} FROM {quote(copy['source_table'])}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if key:
+            sql += " ORDER BY " + ", ".join(quote(name) for name in key)
+        key_positions = [columns.index(name) for name in key]
+        
+        range_["status"] = "running"
+        stream = source.stream_query(sql, params=params, chunk_size=copy["batch_size"])
+        with closing(stream), target.connection() as conn, target.bulk_load_session(conn):
+            for chunk in stream:
+                rows = chunk.get("rows")
+                if not rows:
+                    continue
+                with conn.begin():
+                    target.bulk_insert(
+                        conn, copy["target_table"], columns,
+                        [tuple(_portable(value) for value in row) for row in rows], types
+                    )
+                # Only committed batches move the resume point
+                if key_positions:
+                    range_["last_key"] = tuple(rows[-1][position] for position in key_positions)
+                range_["rows"] += len(rows)
+                with self._lock:
+                    copy["rows_copied"] += len(rows)
+                if copy["status"] != "running":
+                    range_["status"] = "pending"
+                    return
+        range_["status"] = "done"
+    
+    def resume(self, copy_id: str, source, target) -> Dict[str, Any]:
+        """Continue a failed or cancelled copy from the last committed batch of each range"""
+        with self._lock:
+            copy = self._copies.get(copy_id)
+            if copy is None:
+                raise KeyError(copy_id)
+            if copy["status"] not in ("failed", "cancelled"):
+                raise ValueError(f"Copy {copy_id} is {copy['status']}")
+            copy.update(
+                status="running", error=None, finished_at=None,
+                run_started_at=time.time(), run_start_rows=copy["rows_copied"]
+            )
+            for range_ in copy["ranges"]:
+                if range_["status"] == "running":
+                    range_["status"] = "pending"
+        self._pool.submit(self._run, copy, source, target)
+        return self.snapshot(copy)
+    
+    def cancel(self, copy_id: str) -> bool:
+        """Stop a running copy after its in-flight batches; it can be resumed later"""
+        with self._lock:
+            copy = self._copies.get(copy_id)
+            if copy is None or copy["status"] in FINISHED_STATES:
+                return False
+            copy["status"] = "cancelled"
+        return True
+    
+    def snapshot(self, copy: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of a progress record with per-range state and throughput"""
+        entry = {key: value for key, value in copy.items() if key != "ranges"}
+        entry["ranges"] = [dict(range_) for range_ in copy["ranges"]]
+        entry["ranges_done"] = sum(1 for range_ in copy["ranges"] if range_["status"] == "done")
+        elapsed = (entry["finished_at"] or time.time()) - entry["run_started_at"]
+        entry["elapsed"] = round((entry["finished_at"] or time.time()) - entry["started_at"], 3)
+        entry["rows_per_second"] = (
+            round((entry["rows_copied"] - entry["run_start_rows"]) / elapsed, 1) if elapsed > 0 else 0.0
+        )
+        return entry
+    
+    def get(self, copy_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            copy = self._copies.get(copy_id)
+        return self.snapshot(copy) if copy else None
+    
+    def list(self, connection_id: str = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            copies = list(self._copies.values())
+        return [
+            self.snapshot(copy) for copy in copies
+            if connection_id is None or connection_id in (copy["source_connection_id"], copy["target_connection_id"])
+        ]
+    
+    def shutdown(self):
+        """Stop running copies at their next batch"""
+        with self._lock:
+            for copy in self._copies.values():
+                if copy["status"] == "running":
+                    copy["status"] = "cancelled"
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+# Global table copier instance
+table_copier = TableCopier()
\ No newline at end of file
@@ -0,0 +1,181 @@
+"""
+Keyset (seek) pagination over table rows
+"""
+from sqlalchemy import table, column, select, and_, or_
+from typing import List, Dict, Any, Optional, Tuple
+from utils.serialization import dumps
+from datetime import date, datetime, time
+from decimal import Decimal
+import base64
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+FILTER_OPERATORS = {
+    "eq": lambda col, value: col == value,
+    "ne": lambda col, value: col != value,
+    "lt": lambda col, value: col < value,
+    "lte": lambda col, value: col <= value,
+    "gt": lambda col, value: col > value,
+    "gte": lambda col, value: col >= value,
+    "like": lambda col, value: col.like(value),
+    "is_null": lambda col, value: col.is_(None),
+    "not_null": lambda col, value: col.is_not(None),
+}
+
+class InvalidCursorError(ValueError):
+    """Raised when a page cursor is malformed or belongs to another query"""
+
+def encode_cursor(data: Dict[str, Any]) -> str:
+    """Pack cursor state into an opaque URL-safe token"""
+    return base64.urlsafe_b64encode(dumps(data).encode()).decode().rstrip("=")
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    """Unpack a token produced by encode_cursor"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise InvalidCursorError("Invalid page cursor")
+
+def restore_value(type_, value: Any) -> Any:
+    """Turn a JSON value back into the Python type a column binds as"""
+    if value is None or not isinstance(value, str):
+        return value
+    try:
+        python_type = type_.python_type
+    except (NotImplementedError, AttributeError):
+        return value
+    try:
+        if python_type in (datetime, date, time):
+            return python_type.fromisoformat(value)
+        if python_type is Decimal:
+            return Decimal(value)
+    except ValueError:
+        pass
+    return value
+
+class TablePager:
+    """Pages through a table by seeking past the last key instead of using OFFSET"""
+    
+    def __init__(self, service):
+        self.service = service
+    
+    @staticmethod
+    def _unique_keys(structure: Dict[str, Any], columns: Dict[str, Any]) -> List[List[str]]:
+        """Primary key first, then unique indexes over non-nullable columns"""
+        keys = []
+        if structure["primary_keys"]:
+            keys.append(list(structure["primary_keys"]))
+        for index in structure["indexes"]:
+            names = index.get("column_names") or []
+            if not index.get("unique") or not names or any(name not in columns for name in names):
+                continue
+            if all(not columns[name].get("nullable", True) for name in names):
+                keys.append(list(names))
+        return keys
+    
+    @staticmethod
+    def _indexed_columns(structure: Dict[str, Any]) -> set:
+        indexed = set(structure["primary_keys"])
+        for index in structure["indexes"]:
+            indexed.update(name for name in index.get("column_names") or [] if name)
+        return indexed
+    
+    def _choose_key(self, structure: Dict[str, Any], columns: Dict[str, Any],
+                    sort_by: Optional[str]) -> Tuple[List[str], bool]:
+        """Return (ordering columns, whether they form a usable seek key)"""
+        unique_keys = self._unique_keys(structure, columns)
+        unique_key = unique_keys[0] if unique_keys else []
+        
+        if not sort_by:
+            return unique_key, bool(unique_key)
+        
+        # A nullable sort column has no total order to seek on
+        ordering = [sort_by] + [name for name in unique_key if name != sort_by]
+        seekable = bool(unique_key) and not columns[sort_by].get("nullable", True)
+        return ordering, seekable
+    
+    @staticmethod
+    def _seek_condition(key_columns: List, values: List[Any], descending: bool):
+        """Expand (a, b) > (x, y) into OR-ed prefixes so every dialect can use the index"""
+        clauses = []
+        for i, col in enumerate(key_columns):
+            equal_prefix = [key_columns[j] == values[j] for j in range(i)]
+            past = col < values[i] if descending else col > values[i]
+            clauses.append(and_(*equal_prefix, past))
+        return or_(*clauses)
+    
+    def get_page(self, table_name: str, page_size: int = 100, cursor: str = None,
+                 sort_by: str = None, descending: bool = False,
+                 filters: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Fetch one page of rows and the cursor for the next one"""
+        structure = self.service.get_table_structure(table_name)
+        columns = {col["name"]: col for col in structure["columns"]}
+        indexed = self._indexed_columns(structure)
+        filters = filters or []
+        
+        if sort_by and sort_by not in columns:
+            raise ValueError(f"Unknown column '{sort_by}'")
+        if sort_by and sort_by not in indexed:
+            raise ValueError(f"Column '{sort_by}' is not indexed and cannot be sorted on")
+        
+        tbl = table(table_name, *[column(name, col["type"]) for name, col in columns.items()])
+        stmt = select(*tbl.c)
+        
+        for item in filters:
+            name, op = item["column"], item.get("op", "eq")
+            if name not in columns:
+                raise ValueError(f"Unknown column '{name}'")
+            if name not in indexed:
+                raise ValueError(f"Column '{name}' is not indexed and cannot be filtered on")
+            if op not in FILTER_OPERATORS:
+                raise ValueError(f"Unsupported filter operator '{op}'")
+            value = restore_value(columns[name]["type"], item.get("value"))
+            stmt = stmt.where(FILTER_OPERATORS[op](tbl.c[name], value))
+        
+        ordering, seekable = self._choose_key(structure, columns, sort_by)
+        order_columns = [tbl.c[name] for name in ordering]
+        stmt = stmt.order_by(*[col.desc() if descending else col.asc() for col in order_columns])
+        
+        # Tokens are only valid for the query shape that issued them
+        fingerprint = hashlib.sha1(
+            dumps([table_name, sort_by, descending, filters]).encode()
+        ).hexdigest()[:16]
+        state = decode_cursor(cursor) if cursor else {}
+        if state and state.get("q") != fingerprint:
+            raise InvalidCursorError("Page cursor does not match this table and ordering")
+        
+        offset = 0
+        if seekable and state.get("k") is not None:
+            values = [restore_value(columns[name]["type"], value) for name, value in zip(ordering, state["k"])]
+            stmt = stmt.where(self._seek_condition(order_columns, values, descending))
+        elif not seekable:
+            offset = int(state.get("o", 0))
+            stmt = stmt.offset(offset)
+        stmt = stmt.limit(page_size + 1)
+        
+        with self.service.connection() as conn:
+            result = conn.execute(stmt)
+            rows = result.fetchall()
+        
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        
+        next_cursor = None
+        if has_more:
+            if seekable:
+                last = rows[-1]._mapping
+                next_cursor = encode_cursor({"q": fingerprint, "k": [last[name] for name in ordering]})
+            else:
+                next_cursor = encode_cursor({"q": fingerprint, "o": offset + page_size})
+        
+        return {
+            "columns": list(columns),
+            "rows": [dict(row._mapping) for row in rows],
+            "next_cursor": next_cursor,
+            "pagination": "keyset" if seekable else "offset",
+            "key_columns": ordering if seekable else [],
+        }
\ No newline at end of file
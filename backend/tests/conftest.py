@@ -0,0 +1,52 @@
+"""
+Shared fixtures: the app served by TestClient against throwaway SQLite files
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Keep connection profiles and spooled results out of the real home and temp dirs
+os.environ["DBM_CONNECTION_DB"] = ""
+os.environ["DBM_SPOOL_DIR"] = tempfile.mkdtemp(prefix="dbm_test_spool_")
+
+from fastapi.testclient import TestClient
+from services.connection_manager import connection_manager
+import main
+import pytest
+import sqlite3
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def sqlite_file(tmp_path):
+    """A database file with an items table of 100 rows"""
+    path = tmp_path / "test.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, qty INTEGER)")
+        conn.executemany("INSERT INTO items VALUES (?, ?, ?)", [(i, f"item{i}", i % 7) for i in range(1, 101)])
+    return path
+
+@pytest.fixture
+def open_sqlite(client):
+    """Create connections through the API; they are closed after the test"""
+    opened = []
+    
+    def _open(connection_id, path, **fields):
+        response = client.post("/api/connections/create", json={
+            "connection_id": connection_id,
+            "name": connection_id,
+            "db_type": "sqlite",
+            "database": str(path),
+            **fields,
+        })
+        assert response.status_code == 200, response.text
+        opened.append(connection_id)
+        return connection_manager.get_connection(connection_id)
+    
+    yield _open
+    for connection_id in opened:
+        connection_manager.close_connection(connection_id)
\ No newline at end of file
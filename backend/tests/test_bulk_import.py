@@ -0,0 +1,91 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+from services.mysql_service import MySQLService
+from services.postgresql_service import PostgreSQLService
+from sqlalchemy import JSON, Numeric, String, Uuid
+from sqlalchemy.dialects import mysql, sqlite
+import pytest
+import sqlite3
+import uuid
+
+@pytest.fixture
+def typed_file(tmp_path):
+    path = tmp_path / "typed.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE prices (id INTEGER PRIMARY KEY, amount NUMERIC(10, 2) NOT NULL, "
+            "day DATE, opens TIME, seen DATETIME, active BOOLEAN, note VARCHAR(5), tags JSON)"
+        )
+    return path
+
+def _rows(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT id, amount, day, opens, seen, active, note, tags FROM prices ORDER BY id").fetchall()
+
+def test_csv_into_numeric_date_and_time_columns(client, typed_file, open_sqlite):
+    open_sqlite("b1", typed_file)
+    body = (
+        "id,amount,day,opens,seen,active,note,tags\n"
+        "1,12.50,2024-02-29,08:30:00,2024-02-29T08:30:00,yes,hello,\"[1, 2]\"\n"
+        "2,0.10,,,,,,\n"
+    )
+    response = client.post("/api/tables/b1/prices/import", content=body)
+    assert response.status_code == 200, response.text
+    assert _rows(typed_file) == [
+        (1, 12.5, "2024-02-29", "08:30:00.000000", "2024-02-29 08:30:00.000000", 1, "hello", "[1, 2]"),
+        # Empty CSV fields are NULL except in text columns
+        (2, 0.1, None, None, None, None, "", None),
+    ]
+
+def test_ndjson_import(client, typed_file, open_sqlite):
+    open_sqlite("b2", typed_file)
+    body = '{"id": 1, "amount": 3.25, "opens": "23:59:59", "tags": {"a": 1}}\n\n{"id": 2, "amount": 4}\n'
+    response = client.post("/api/tables/b2/prices/import", params={"format": "ndjson"}, content=body)
+    assert response.status_code == 200, response.text
+    assert [row[:4] + row[7:] for row in _rows(typed_file)] == [
+        (1, 3.25, None, "23:59:59.000000", '{"a": 1}'), (2, 4, None, None, None)
+    ]
+
+@pytest.mark.parametrize("body, detail", [
+    ("id,day\n1,2024-01-01\n", "Required columns missing from input: ['amount']"),
+    ("id,amount\n1,abc\n", "Line 2: not a number: 'abc'"),
+    ("id,amount\n1,\n", "Line 2: column 'amount' cannot be null"),
+    ("id,amount,note\n1,1,toolong\n", "Line 2: longer than 5 characters"),
+    ("id,amount\n1\n", "Line 2: expected 2 fields, got 1"),
+])
+def test_validation_errors_name_the_line(client, typed_file, open_sqlite, body, detail):
+    open_sqlite("b3", typed_file)
+    response = client.post("/api/tables/b3/prices/import", content=body)
+    assert response.status_code == 400
+    assert response.json()["detail"] == detail
+    assert _rows(typed_file) == []
+
+def test_bind_processors_fall_back_for_other_values(open_sqlite, typed_file):
+    service = open_sqlite("b4", typed_file)
+    value = uuid.UUID("12345678-1234-5678-1234-567812345678")
+    numeric, text, uuid_, json_ = service.bind_processors(sqlite.dialect(), [Numeric(), String(), Uuid(), JSON()])
+    assert numeric(Decimal("1.50")) == 1.5
+    assert text(Decimal("1.50")) == "1.50"
+    assert text(time(1, 2)) == "01:02:00"
+    assert uuid_(value) == "12345678123456781234567812345678"
+    assert uuid_("already text") == "already text"
+    assert json_([1, 2]) == "[1, 2]"
+    # MySQL drivers bind Decimal and time natively; only the UUID column needs hex
+    service = MySQLService("mysql+pymysql://user@localhost/app")
+    numeric, uuid_ = service.bind_processors(mysql.pymysql.dialect(), [Numeric(), Uuid()])
+    assert numeric(Decimal("1.50")) == Decimal("1.50")
+    assert uuid_(value) == "12345678123456781234567812345678"
+
+@pytest.mark.parametrize("value, encoded", [
+    (None, "\\N"),
+    (True, "t"),
+    ("tab\there\nnew\\line\r", "tab\\there\\nnew\\\\line\\r"),
+    (b"\x00\xff", "\\\\x00ff"),
+    ({"a": "b\tc"}, '{"a": "b\\\\tc"}'),
+    (datetime(2024, 1, 2, 3, 4, 5), "2024-01-02T03:04:05"),
+    (date(2024, 1, 2), "2024-01-02"),
+    (Decimal("1.10"), "1.10"),
+    ("\\N", "\\\\N"),
+])
+def test_copy_text_escaping(value, encoded):
+    assert PostgreSQLService._copy_value(value) == encoded
\ No newline at end of file
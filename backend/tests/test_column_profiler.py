@@ -0,0 +1,86 @@
+from collections import Counter
+from services.column_profiler import HeavyHitters, HyperLogLog, profile_cache
+import pytest
+
+@pytest.mark.parametrize("distinct", [0, 1, 100, 5000, 200000])
+def test_hyperloglog_estimates(distinct):
+    sketch = HyperLogLog()
+    sketch.update(range(distinct))
+    # Repeats do not count
+    sketch.update(range(distinct // 2))
+    assert sketch.estimate() == pytest.approx(distinct, rel=0.03, abs=1)
+
+def test_hyperloglog_strings():
+    sketch = HyperLogLog()
+    sketch.update(f"user-{i}@example.com" for i in range(50000))
+    assert sketch.estimate() == pytest.approx(50000, rel=0.03)
+
+def test_heavy_hitters_keep_exact_counts_within_capacity():
+    hitters = HeavyHitters(capacity=5)
+    hitters.update(Counter("aaabbc"))
+    hitters.update(Counter("aab"))
+    assert hitters.top(2) == [("a", 5, 0), ("b", 3, 0)]
+    assert hitters.floor == 0
+
+def test_heavy_hitters_merge_bounds_the_error():
+    hitters = HeavyHitters(capacity=3)
+    hitters.update(Counter({"a": 10, "b": 6, "c": 4, "d": 2}))
+    # d is dropped; a value first seen later may have had that many
+    assert hitters.floor == 2 and set(hitters.counters) == {"a", "b", "c"}
+    hitters.update(Counter({"e": 5, "a": 1}))
+    assert hitters.top(3) == [("a", 11, 0), ("e", 7, 2), ("b", 6, 0)]
+    # Frequent values rare in the first chunks still surface
+    for _ in range(5):
+        hitters.update(Counter({"z": 20, "q": 1}))
+    value, count, error = hitters.top(1)[0]
+    assert value == "z" and count - error <= 100 <= count
+
+def _profile(client, connection_id, **params):
+    response = client.get(f"/api/tables/{connection_id}/items/profile", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_profile(client, sqlite_file, open_sqlite):
+    open_sqlite("pr1", sqlite_file)
+    profile = _profile(client, "pr1", columns="id,qty", top_k=3)
+    assert (profile["method"], profile["rows_scanned"], profile["cached"]) == ("full", 100, False)
+    id_, qty = profile["columns"]
+    assert (id_["min"], id_["max"], id_["nulls"]) == (1, 100, 0)
+    assert id_["distinct_estimate"] == pytest.approx(100, abs=2)
+    assert qty["distinct_estimate"] == 7
+    assert [(top["value"], top["count"]) for top in qty["top_values"][:2]] == [(1, 15), (2, 15)]
+    assert qty["top_values"][2]["count"] == 14
+    assert _profile(client, "pr1", columns="id,qty", top_k=3)["cached"] is True
+    assert client.get("/api/tables/pr1/items/profile", params={"columns": "nope"}).status_code == 400
+    assert client.get("/api/tables/pr1/missing/profile").status_code == 404
+
+def test_write_through_a_sibling_connection_invalidates_the_profile(client, sqlite_file, open_sqlite):
+    profile_cache.invalidate()
+    first = open_sqlite("pr2", sqlite_file)
+    # Same database, but its own pool and so its own engine
+    second = open_sqlite("pr3", sqlite_file, pool={"pool_size": 2})
+    assert first.engine_id != second.engine_id
+    assert _profile(client, "pr2", columns="qty")["cached"] is False
+    assert _profile(client, "pr2", columns="qty")["cached"] is True
+    
+    response = client.post("/api/queries/execute", json={
+        "connection_id": "pr3", "query": "UPDATE items SET qty = 42 WHERE id <= 50"
+    })
+    assert response.status_code == 200, response.text
+    profile = _profile(client, "pr2", columns="qty")
+    assert profile["cached"] is False
+    assert profile["columns"][0]["top_values"][0] == {"value": 42, "count": 50, "error": 0, "frequency": 0.5}
+
+def test_connections_sharing_an_engine_share_profiles(client, sqlite_file, open_sqlite):
+    profile_cache.invalidate()
+    open_sqlite("pr4", sqlite_file)
+    sibling = open_sqlite("pr5", sqlite_file)
+    lookups = []
+    get_table_stats = sibling.get_table_stats
+    sibling.get_table_stats = lambda table_names=None, exact=False: (
+        lookups.append(table_names) or get_table_stats(table_names, exact)
+    )
+    assert _profile(client, "pr4")["cached"] is False
+    assert _profile(client, "pr5")["cached"] is True
+    # Statistics of the profiled table only, never the listing of every table
+    assert lookups == [["items"]]
\ No newline at end of file
@@ -0,0 +1,51 @@
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from utils.serialization import dumps, value_type
+import json
+import pytest
+import uuid
+
+COLUMNAR = "application/vnd.dbm.columnar+json"
+
+@pytest.mark.parametrize("value, name", [
+    (None, None), (True, "boolean"), (3, "integer"), (1.5, "float"), (Decimal("1.5"), "decimal"),
+    (datetime(2024, 1, 2, 3, 4), "datetime"), (date(2024, 1, 2), "date"), (time(3, 4), "time"),
+    (timedelta(seconds=90), "interval"), (b"\x00", "binary"), ({"a": 1}, "json"),
+    (uuid.UUID(int=1), "uuid"), ("x", "string"),
+])
+def test_value_type(value, name):
+    assert value_type(value) == name
+
+def test_dumps_driver_values():
+    value = [Decimal("1.10"), date(2024, 1, 2), timedelta(minutes=1), b"\xff", uuid.UUID(int=1), 2 ** 70]
+    assert json.loads(dumps(value)) == [
+        "1.10", "2024-01-02", 60.0, "ff", "00000000-0000-0000-0000-000000000001", 2 ** 70
+    ]
+
+def test_columnar_response(client, sqlite_file, open_sqlite):
+    open_sqlite("c1", sqlite_file)
+    response = client.post(
+        "/api/queries/execute",
+        json={"connection_id": "c1", "query": "SELECT id, name, NULL AS empty FROM items ORDER BY id", "limit": 25, "chunk_size": 10},
+        headers={"Accept": COLUMNAR}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(COLUMNAR)
+    body = response.json()
+    assert body["columns"] == ["id", "name", "empty"]
+    assert [chunk["length"] for chunk in body["chunks"]] == [10, 10, 5]
+    first = body["chunks"][0]["data"]
+    assert first[0] == list(range(1, 11)) and first[1][0] == "item1" and first[2] == [None] * 10
+    assert body["types"] == ["integer", "string", None]
+    assert body["rows_count"] == 25 and "error" not in body
+
+def test_columnar_matches_row_format(client, sqlite_file, open_sqlite):
+    open_sqlite("c2", sqlite_file)
+    request = {"connection_id": "c2", "query": "SELECT * FROM items WHERE qty = 3", "chunk_size": 4}
+    rows = client.post("/api/queries/execute", json=request).json()["rows"]
+    columnar = client.post("/api/queries/execute", json=request, headers={"Accept": COLUMNAR}).json()
+    rebuilt = [
+        dict(zip(columnar["columns"], values))
+        for chunk in columnar["chunks"] for values in zip(*chunk["data"])
+    ]
+    assert rebuilt == rows
\ No newline at end of file
@@ -0,0 +1,90 @@
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from fastapi.testclient import TestClient
+from utils.middleware import CompressionMiddleware, GzipEncoder, choose_encoding, is_compressible
+import gzip
+import pytest
+import zlib
+
+@pytest.mark.parametrize("header, encoding", [
+    ("gzip, deflate", "gzip"),
+    ("gzip;q=0", None),
+    ("*", "gzip"),
+    ("*;q=0, gzip;q=0.5", "gzip"),
+    ("identity", None),
+    ("", None),
+    ("gzip;q=oops", None),
+])
+def test_choose_encoding(header, encoding):
+    assert choose_encoding(header) == encoding
+
+@pytest.mark.parametrize("content_type, compressible", [
+    ("application/json", True),
+    ("text/csv; charset=utf-8", True),
+    ("application/vnd.dbm.columnar+json", True),
+    ("application/gzip", False),
+    ("image/png", False),
+])
+def test_is_compressible(content_type, compressible):
+    assert is_compressible(content_type) is compressible
+
+def test_gzip_encoder_flushes_each_chunk():
+    encoder = GzipEncoder()
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # Each flushed piece decodes on its own, so clients see rows as they arrive
+    assert decompressor.decompress(encoder.compress(b"first,", final=False)) == b"first,"
+    assert decompressor.decompress(encoder.compress(b"last", final=True)) == b"last"
+    assert decompressor.eof
+
+def _app():
+    async def large(request):
+        return PlainTextResponse("x" * 5000)
+    
+    async def small(request):
+        return PlainTextResponse("tiny")
+    
+    async def stream(request):
+        async def parts():
+            for index in range(3):
+                yield f"part {index}\n".encode()
+        return StreamingResponse(parts(), media_type="application/x-ndjson")
+    
+    async def precompressed(request):
+        return PlainTextResponse(gzip.compress(b"done" * 500), media_type="application/gzip")
+    
+    app = Starlette(routes=[Route(f"/{endpoint.__name__}", endpoint) for endpoint in (large, small, stream, precompressed)])
+    return CompressionMiddleware(app, minimum_size=1024)
+
+@pytest.fixture(scope="module")
+def raw_client():
+    return TestClient(_app())
+
+def test_large_body_is_compressed(raw_client):
+    response = raw_client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.text == "x" * 5000
+
+def test_small_and_unaccepted_bodies_pass_through(raw_client):
+    assert "content-encoding" not in raw_client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in raw_client.get("/large", headers={"Accept-Encoding": "identity"}).headers
+
+def test_streamed_body_is_compressed_whatever_its_size(raw_client):
+    response = raw_client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == "part 0\npart 1\npart 2\n"
+
+def test_binary_types_are_left_alone(raw_client):
+    response = raw_client.get("/precompressed", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert gzip.decompress(response.content) == b"done" * 500
+
+def test_api_responses_are_compressed(client, sqlite_file, open_sqlite):
+    open_sqlite("z1", sqlite_file)
+    response = client.post(
+        "/api/queries/execute", json={"connection_id": "z1", "query": "SELECT * FROM items"},
+        headers={"Accept-Encoding": "gzip"}
+    )
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()["rows"]) == 100
\ No newline at end of file
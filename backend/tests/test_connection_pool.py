@@ -0,0 +1,39 @@
+from services.mysql_service import MySQLService
+from services.postgresql_service import PostgreSQLService
+from services.sqlite_service import SQLiteService
+from sqlalchemy.pool import NullPool
+import time
+
+def test_engine_options_from_settings():
+    service = PostgreSQLService("postgresql://u:p@localhost/app", {"max_overflow": 0, "pool_timeout": 5})
+    assert service.get_engine_options() == {
+        "pool_size": 5, "max_overflow": 0, "pool_recycle": 1800, "pool_pre_ping": True, "pool_timeout": 5,
+    }
+    assert MySQLService("mysql+pymysql://u:p@localhost/app").get_engine_options()["pool_recycle"] == 3600
+    # Unset recycle means never
+    assert SQLiteService("sqlite:///x.db").get_engine_options()["pool_recycle"] == -1
+
+def test_pool_size_zero_disables_pooling():
+    assert SQLiteService("sqlite:///x.db", {"pool_size": 0}).get_engine_options() == {"poolclass": NullPool}
+
+def test_pool_status_endpoint(client, sqlite_file, open_sqlite):
+    open_sqlite("pool1", sqlite_file, pool={"pool_size": 3, "pool_timeout": 2})
+    before = client.get("/api/connections/pool1/pool").json()["checkouts"]
+    response = client.post("/api/queries/execute", json={"connection_id": "pool1", "query": "SELECT COUNT(*) FROM items"})
+    assert response.status_code == 200, response.text
+    status = client.get("/api/connections/pool1/pool").json()
+    assert status["pool_class"] == "QueuePool"
+    assert status["size"] == 3 and status["checked_out"] == 0 and status["idle"] >= 1
+    assert status["checkouts"] > before
+    assert status["settings"]["pool_timeout"] == 2
+    assert client.get("/api/connections/missing/pool").status_code == 404
+
+def test_idle_connections_are_replaced(sqlite_file, open_sqlite):
+    service = open_sqlite("pool2", sqlite_file, pool={"pool_size": 1, "idle_timeout": 1})
+    with service.connection() as conn:
+        first = conn.connection.dbapi_connection
+    with service.connection() as conn:
+        assert conn.connection.dbapi_connection is first
+    time.sleep(1.1)
+    with service.connection() as conn:
+        assert conn.connection.dbapi_connection is not first
\ No newline at end of file
@@ -0,0 +1,102 @@
+from services.connection_manager import ConnectionManager
+from services.connection_store import ConnectionStore
+from cryptography.fernet import Fernet
+import asyncio
+import os
+import pytest
+import sqlite3
+import stat
+import subprocess
+import sys
+import threading
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two managers sharing one store file, as two worker processes would"""
+    path = str(tmp_path / "profiles" / "connections.db")
+    managers = [ConnectionManager(ConnectionStore(path), profile_recheck=0) for _ in range(2)]
+    yield managers
+    for manager in managers:
+        manager.close_all()
+
+def _create(manager, connection_id, database, password=None):
+    return manager.create_connection(
+        connection_id, "sqlite", host="", port=None, username=None, password=password,
+        database=str(database), name=connection_id
+    )
+
+def test_profile_restored_in_another_worker(workers, sqlite_file):
+    first, second = workers
+    _create(first, "p1", sqlite_file)
+    service = second.get_connection("p1")
+    assert service is not None
+    assert service.execute_query("SELECT count(*) FROM items") == [(100,)]
+    assert [profile["connection_id"] for profile in second.list_profiles()] == ["p1"]
+
+def test_delete_and_update_propagate(workers, sqlite_file, tmp_path):
+    first, second = workers
+    _create(first, "p2", sqlite_file)
+    restored = second.get_connection("p2")
+    
+    other = tmp_path / "other.db"
+    sqlite3.connect(other).close()
+    _create(first, "p2", other)
+    rebuilt = second.get_connection("p2")
+    assert rebuilt is not restored and rebuilt.get_tables() == []
+    
+    first.close_connection("p2")
+    assert second.get_connection("p2") is None
+    assert "p2" not in second.connections
+
+def test_passwords_encrypted_with_a_private_key_file(tmp_path):
+    path = str(tmp_path / "connections.db")
+    store = ConnectionStore(path)
+    store.save("p3", {"db_type": "postgresql"}, "s3cret")
+    
+    assert stat.S_IMODE(os.stat(path + ".key").st_mode) == 0o600
+    with sqlite3.connect(path) as db:
+        secret, profile = db.execute("SELECT secret, profile FROM connection_profiles").fetchone()
+    assert b"s3cret" not in secret and "s3cret" not in profile
+    # A second worker reads the same key file
+    assert ConnectionStore(path).load("p3")["password"] == "s3cret"
+    
+    with pytest.raises(ValueError, match="cannot be decrypted"):
+        ConnectionStore(path, secret_key=Fernet.generate_key().decode()).load("p3")
+
+def test_explicit_secret_key_writes_no_key_file(tmp_path):
+    path = str(tmp_path / "connections.db")
+    key = Fernet.generate_key().decode()
+    ConnectionStore(path, secret_key=key).save("p4", {}, "pw")
+    assert not os.path.exists(path + ".key")
+    assert ConnectionStore(path, secret_key=key).load("p4")["password"] == "pw"
+
+def test_store_is_opt_in(tmp_path):
+    env = {key: value for key, value in os.environ.items() if key != "DBM_CONNECTION_DB"}
+    env["HOME"] = str(tmp_path)
+    output = subprocess.run(
+        [sys.executable, "-c", "from services.connection_manager import connection_manager; print(connection_manager.store)"],
+        cwd=BACKEND, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == "None"
+    assert os.listdir(tmp_path) == []
+
+def test_async_lookup_reads_the_store_off_the_event_loop(workers, sqlite_file, monkeypatch):
+    first, second = workers
+    _create(first, "p5", sqlite_file)
+    threads = []
+    get_version = second.store.get_version
+    
+    def recording_get_version(connection_id):
+        threads.append(threading.current_thread())
+        return get_version(connection_id)
+    
+    monkeypatch.setattr(second.store, "get_version", recording_get_version)
+    
+    async def lookup():
+        return await second.get_connection_async("p5"), threading.current_thread()
+    
+    service, loop_thread = asyncio.run(lookup())
+    assert service is not None
+    assert threads and loop_thread not in threads
\ No newline at end of file
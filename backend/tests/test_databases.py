@@ -0,0 +1,7 @@
+def test_sqlite_lists_its_single_database(client, sqlite_file, open_sqlite):
+    open_sqlite("d1", sqlite_file)
+    databases = client.get("/api/databases/d1/list").json()
+    assert len(databases) == 1
+    assert databases[0]["name"] == "main"
+    assert databases[0]["tables_count"] == 1
+    assert databases[0]["size"].endswith("MB")
\ No newline at end of file
@@ -0,0 +1,44 @@
+from services.engine_registry import EngineRegistry, engine_registry
+from sqlalchemy import create_engine
+
+def test_make_key_normalizes_equivalent_urls():
+    a = EngineRegistry.make_key("postgresql://u:p@DB.example.com/app?b=2&a=1", {"pool_size": 5}, {})
+    b = EngineRegistry.make_key("postgresql://u:p@db.example.com/app?a=1&b=2", {"pool_size": 5}, {})
+    assert a == b
+    assert a != EngineRegistry.make_key("postgresql://u:p@db.example.com/app?a=1&b=2", {"pool_size": 6}, {})
+    assert a != EngineRegistry.make_key("postgresql://other:p@db.example.com/app?a=1&b=2", {"pool_size": 5}, {})
+
+def test_refcount_disposes_on_last_release():
+    registry = EngineRegistry()
+    created = []
+    
+    def factory():
+        created.append(create_engine("sqlite://"))
+        return created[-1]
+    
+    first = registry.acquire(("k",), factory)
+    second = registry.acquire(("k",), factory)
+    assert first is second and len(created) == 1
+    assert registry.get_refs(("k",)) == 2
+    assert registry.release(("k",)) is False
+    assert registry.release(("k",)) is True
+    assert registry.get_refs(("k",)) == 0
+    assert registry.release(("k",)) is False
+
+def test_connections_to_one_file_share_an_engine(client, sqlite_file, open_sqlite):
+    first = open_sqlite("e1", sqlite_file)
+    second = open_sqlite("e2", sqlite_file)
+    assert first.engine is second.engine
+    assert client.get("/api/connections/e1/pool").json()["shared_by"] == 2
+    engines = {item["engine_id"]: item for item in client.get("/api/connections/engines").json()}
+    assert engines[first.engine_id]["refs"] == 2
+    
+    assert client.delete("/api/connections/e1").status_code == 200
+    assert engine_registry.get_refs(second._engine_key) == 1
+    response = client.post("/api/queries/execute", json={"connection_id": "e2", "query": "SELECT count(*) AS n FROM items"})
+    assert response.json()["rows"] == [{"n": 100}]
+
+def test_different_pool_settings_get_their_own_engine(sqlite_file, open_sqlite):
+    first = open_sqlite("e3", sqlite_file)
+    second = open_sqlite("e4", sqlite_file, pool={"pool_size": 2})
+    assert first.engine is not second.engine
\ No newline at end of file
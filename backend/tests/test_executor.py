@@ -0,0 +1,44 @@
+from services.executor import QueryExecutor
+import asyncio
+import threading
+import time
+
+def test_calls_per_connection_are_capped():
+    executor = QueryExecutor(max_workers=8, default_limit=2)
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+    
+    def work():
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        time.sleep(0.02)
+        with lock:
+            running["now"] -= 1
+    
+    async def run_all():
+        await asyncio.gather(*[executor.run("a", work) for _ in range(6)])
+    
+    asyncio.run(run_all())
+    executor.shutdown()
+    assert running["peak"] == 2
+
+def test_grouped_connections_share_one_cap():
+    executor = QueryExecutor(max_workers=8)
+    executor.set_limit("a", 1, group="engine:1")
+    executor.set_limit("b", 5, group="engine:1")
+    assert executor.get_stats("b")["limit"] == 1
+    executor.remove("a")
+    assert executor.get_stats("b")["limit"] == 1
+    executor.remove("b")
+    assert "engine:1" not in executor._limits
+    executor.shutdown()
+
+def test_create_and_close_connection(client, sqlite_file):
+    response = client.post("/api/connections/create", json={
+        "connection_id": "c1", "name": "c1", "db_type": "sqlite", "database": str(sqlite_file)
+    })
+    assert response.status_code == 200
+    assert client.get("/api/connections/c1/status").status_code == 200
+    assert client.delete("/api/connections/c1").status_code == 200
+    assert client.get("/api/connections/c1/status").status_code == 404
\ No newline at end of file
@@ -0,0 +1,95 @@
+from datetime import date
+from decimal import Decimal
+from services.exporter import export_chunks, export_filename, format_available
+import csv
+import gzip
+import io
+import json
+import pytest
+
+COLUMNS = ["id", "name", "meta"]
+CHUNKS = [[(1, "a,b", {"k": 1}), (2, 'say "hi"', None)], [(3, "line\nbreak", [1, 2])]]
+
+def test_csv_quotes_and_renders_documents():
+    data = b"".join(export_chunks(COLUMNS, iter(CHUNKS), "csv"))
+    assert list(csv.reader(io.StringIO(data.decode()))) == [
+        COLUMNS, ["1", "a,b", '{"k":1}'], ["2", 'say "hi"', ""], ["3", "line\nbreak", "[1,2]"]
+    ]
+
+def test_csv_delimiter_and_typed_values():
+    data = b"".join(export_chunks(["d", "n"], iter([[(date(2024, 1, 2), Decimal("1.50"))]]), "csv", delimiter=";"))
+    assert data.decode() == "d;n\n2024-01-02;1.50\n"
+
+def test_ndjson_one_object_per_row():
+    data = b"".join(export_chunks(COLUMNS, iter(CHUNKS), "ndjson"))
+    assert [json.loads(line) for line in data.decode().splitlines()] == [
+        {"id": 1, "name": "a,b", "meta": {"k": 1}},
+        {"id": 2, "name": 'say "hi"', "meta": None},
+        {"id": 3, "name": "line\nbreak", "meta": [1, 2]},
+    ]
+
+def test_gzip_stream_is_one_member():
+    plain = b"".join(export_chunks(COLUMNS, iter(CHUNKS), "ndjson"))
+    compressed = b"".join(export_chunks(COLUMNS, iter(CHUNKS), "ndjson", compress=True))
+    assert gzip.decompress(compressed) == plain
+
+def test_encoding_is_lazy():
+    consumed = []
+    
+    def chunks():
+        for chunk in CHUNKS:
+            consumed.append(chunk)
+            yield chunk
+    
+    encoded = export_chunks(COLUMNS, chunks(), "csv")
+    assert consumed == []
+    next(encoded)
+    assert len(consumed) == 1
+
+def test_unknown_format():
+    with pytest.raises(ValueError, match="Unsupported export format"):
+        export_chunks(COLUMNS, iter(CHUNKS), "xml")
+
+@pytest.mark.parametrize("name, fmt, compress, filename", [
+    ("orders", "csv", False, "orders.csv"),
+    ("my table/../x", "ndjson", True, "my_table_.._x.ndjson.gz"),
+    ("", "arrow", False, "export.arrows"),
+])
+def test_export_filename(name, fmt, compress, filename):
+    assert export_filename(name, fmt, compress) == filename
+
+def test_arrow_round_trip():
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+    data = b"".join(export_chunks(COLUMNS, iter(CHUNKS), "arrow"))
+    table = pyarrow.ipc.open_stream(pa.BufferReader(data)).read_all()
+    assert table.column("id").to_pylist() == [1, 2, 3]
+    assert table.column("meta").to_pylist() == ['{"k":1}', None, "[1,2]"]
+
+def test_table_export_endpoint(client, sqlite_file, open_sqlite):
+    open_sqlite("x1", sqlite_file)
+    response = client.post("/api/queries/export", json={
+        "connection_id": "x1", "table_name": "items", "gzip": True, "chunk_size": 7
+    })
+    assert response.status_code == 200, response.text
+    assert response.headers["content-disposition"] == 'attachment; filename="items.csv.gz"'
+    rows = list(csv.reader(io.StringIO(gzip.decompress(response.content).decode())))
+    assert rows[0] == ["id", "name", "qty"] and len(rows) == 101
+
+@pytest.mark.parametrize("payload, status", [
+    ({"table_name": "missing"}, 404),
+    ({"query": "DELETE FROM items"}, 400),
+    ({"query": "SELECT 1", "table_name": "items"}, 400),
+])
+def test_export_rejections(client, sqlite_file, open_sqlite, payload, status):
+    open_sqlite("x2", sqlite_file)
+    response = client.post("/api/queries/export", json={"connection_id": "x2", **payload})
+    assert response.status_code == status
+
+def test_columnar_formats_need_pyarrow(client, sqlite_file, open_sqlite):
+    if format_available("arrow"):
+        pytest.skip("pyarrow is installed")
+    open_sqlite("x3", sqlite_file)
+    response = client.post("/api/queries/export", json={"connection_id": "x3", "table_name": "items", "format": "parquet"})
+    assert response.status_code == 400
+    assert "pyarrow" in response.json()["detail"]
\ No newline at end of file
@@ -0,0 +1,75 @@
+from services.connection_manager import connection_manager
+from services.health_monitor import CircuitOpenError, HealthMonitor
+from sqlalchemy import exc
+import pytest
+import time
+
+class FlakyService:
+    engine_id = None
+    
+    def __init__(self, error=None):
+        self.up = True
+        self.error = error or exc.OperationalError(None, None, Exception("server unreachable"))
+    
+    def ping(self, unpooled=False):
+        if not self.up:
+            raise self.error
+
+def _probe(monitor, connection_id):
+    key = monitor._connection_targets[connection_id]
+    target = monitor._targets[key]
+    monitor._probe(key, target)
+    return target
+
+def test_breaker_opens_then_lets_one_trial_through():
+    monitor = HealthMonitor(failure_threshold=2, reset_timeout=0.05)
+    monitor._stopped.set()
+    service = FlakyService()
+    monitor.track("h1", service)
+    service.up = False
+    _probe(monitor, "h1")
+    monitor.check("h1")
+    _probe(monitor, "h1")
+    with pytest.raises(CircuitOpenError, match="server unreachable"):
+        monitor.check("h1")
+    
+    time.sleep(0.06)
+    monitor.check("h1")
+    with pytest.raises(CircuitOpenError):
+        monitor.check("h1")
+    service.up = True
+    monitor.record_success("h1")
+    monitor.check("h1")
+    assert monitor.get_status("h1")["state"] == "closed"
+
+def test_shared_target_survives_closing_its_first_connection(client, sqlite_file, open_sqlite):
+    open_sqlite("a1", sqlite_file)
+    open_sqlite("a2", sqlite_file)
+    monitor = connection_manager.health_monitor
+    assert monitor._connection_targets["a1"] == monitor._connection_targets["a2"]
+    
+    assert client.delete("/api/connections/a1").status_code == 200
+    for _ in range(monitor.failure_threshold + 1):
+        target = _probe(monitor, "a2")
+    assert target["state"] == "closed" and target["active"] is True
+    assert client.get("/api/tables/a2/list").status_code == 200
+
+def test_errors_that_say_nothing_about_the_server_skip_the_probe():
+    monitor = HealthMonitor(failure_threshold=1)
+    monitor._stopped.set()
+    service = FlakyService(exc.TimeoutError("QueuePool limit of size 1 overflow 0 reached"))
+    monitor.track("h2", service)
+    service.up = False
+    target = _probe(monitor, "h2")
+    assert (target["state"], target["active"], target["failures"]) == ("closed", True, 0)
+    assert not target["probing"] and target["next_probe"] > time.monotonic()
+    monitor.check("h2")
+
+def test_exhausted_pool_does_not_open_the_breaker(client, sqlite_file, open_sqlite):
+    service = open_sqlite("a3", sqlite_file, pool={"pool_size": 1, "max_overflow": 0, "pool_timeout": 0.2})
+    monitor = connection_manager.health_monitor
+    with service.connection():
+        for _ in range(monitor.failure_threshold + 1):
+            target = _probe(monitor, "a3")
+    assert (target["state"], target["active"], target["failures"]) == ("closed", True, 0)
+    assert client.get("/api/tables/a3/list").status_code == 200
\ No newline at end of file
@@ -0,0 +1,77 @@
+from services.job_queue import JobQueue, SpoolReader, SpoolWriter, job_queue
+import os
+import threading
+import time
+
+def _wait(queue, job_id):
+    deadline = time.monotonic() + 5
+    while queue.get_job(job_id)["status"] in ("queued", "running"):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return queue.get_job(job_id)
+
+def test_spool_round_trip(tmp_path):
+    writer = SpoolWriter(str(tmp_path))
+    writer.write_rows([(1, "a"), (2, None)])
+    writer.write_rows([(3, "line\nbreak")])
+    writer.close()
+    reader = SpoolReader(str(tmp_path))
+    assert reader.read(0, 10) == [[1, "a"], [2, None], [3, "line\nbreak"]]
+    assert reader.read(1, 1) == [[2, None]]
+    assert reader.read(3, 10) == []
+
+def test_job_runs_and_pages(client, sqlite_file, open_sqlite):
+    open_sqlite("j1", sqlite_file)
+    response = client.post("/api/jobs", json={"connection_id": "j1", "query": "SELECT id FROM items ORDER BY id"})
+    assert response.status_code == 200, response.text
+    job_id = response.json()["job_id"]
+    assert _wait(job_queue, job_id)["status"] == "completed"
+    
+    page = client.get(f"/api/jobs/{job_id}/results", params={"offset": 90, "limit": 20}).json()
+    assert [row[0] for row in page["rows"]] == list(range(91, 101))
+    assert page["next_offset"] is None
+    
+    assert client.delete(f"/api/jobs/{job_id}").status_code == 200
+    assert client.get(f"/api/jobs/{job_id}").status_code == 404
+
+def test_submit_runs_off_the_event_loop(client, sqlite_file, open_sqlite, monkeypatch):
+    open_sqlite("j2", sqlite_file)
+    threads = []
+    submit = job_queue.submit
+    
+    def recording_submit(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return submit(*args, **kwargs)
+    
+    monkeypatch.setattr(job_queue, "submit", recording_submit)
+    response = client.post("/api/jobs", json={"connection_id": "j2", "query": "SELECT 1"})
+    assert response.status_code == 200
+    assert threads and threads[0] is not threading.main_thread()
+    _wait(job_queue, response.json()["job_id"])
+
+def test_shutdown_keeps_other_processes_spools(tmp_path, sqlite_file, open_sqlite):
+    open_sqlite("j3", sqlite_file)
+    other = tmp_path / "spool" / "4242-other"
+    other.mkdir(parents=True)
+    (other / "rows.jsonl").write_text("[1]\n")
+    
+    queue = JobQueue(spool_dir=str(tmp_path / "spool"))
+    job = queue.submit("j3", "SELECT id FROM items")
+    _wait(queue, job["job_id"])
+    assert queue.read_results(job["job_id"], 0, 5)["rows"] == [[1], [2], [3], [4], [5]]
+    
+    queue.shutdown()
+    assert not os.path.exists(queue.spool_dir)
+    assert (other / "rows.jsonl").exists()
+
+def test_quota_evicts_oldest_finished(tmp_path, sqlite_file, open_sqlite):
+    open_sqlite("j4", sqlite_file)
+    queue = JobQueue(spool_dir=str(tmp_path))
+    first = _wait(queue, queue.submit("j4", "SELECT * FROM items")["job_id"])
+    # Room for one spool but not two
+    queue.spool_quota = queue._spool_usage() * 3 // 2
+    second = _wait(queue, queue.submit("j4", "SELECT * FROM items")["job_id"])
+    assert queue.get_job(first["job_id"]) is None
+    assert second["rows_written"] == 100
+    assert queue.read_results(second["job_id"])["rows_written"] == 100
+    queue.shutdown()
\ No newline at end of file
@@ -0,0 +1,48 @@
+from services.metadata_cache import MetadataCache
+import threading
+import time
+
+def test_loads_once_until_expiry():
+    cache = MetadataCache(ttl=0.05)
+    calls = []
+    load = lambda: calls.append(1) or len(calls)
+    assert cache.get_or_load("k", load) == 1
+    assert cache.get_or_load("k", load) == 1
+    time.sleep(0.06)
+    assert cache.get_or_load("k", load) == 2
+    assert cache.get_stats()["hits"] == 1
+
+def test_least_recently_used_entry_is_evicted():
+    cache = MetadataCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get_stats()["evictions"] == 1
+
+def test_invalidation_during_a_load_is_not_overwritten():
+    cache = MetadataCache()
+    started, release = threading.Event(), threading.Event()
+    
+    def slow_load():
+        started.set()
+        release.wait()
+        return "stale"
+    
+    loader = threading.Thread(target=cache.get_or_load, args=("k", slow_load))
+    loader.start()
+    started.wait()
+    generation = cache.generation
+    cache.invalidate()
+    release.set()
+    loader.join()
+    assert cache.generation == generation + 1
+    assert cache.get("k") is None
+
+def test_ddl_invalidates_the_table_list(client, sqlite_file, open_sqlite):
+    open_sqlite("m1", sqlite_file)
+    assert [table["name"] for table in client.get("/api/tables/m1/list").json()] == ["items"]
+    client.post("/api/queries/execute", json={"connection_id": "m1", "query": "CREATE TABLE extra (id INTEGER)"})
+    assert sorted(table["name"] for table in client.get("/api/tables/m1/list").json()) == ["extra", "items"]
\ No newline at end of file
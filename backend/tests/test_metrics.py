@@ -0,0 +1,42 @@
+from services.metrics import Counter, Histogram
+from utils.middleware import router_label
+import pytest
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("h", "doc", ("kind",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, kind="a")
+    assert histogram.render()[2:] == [
+        'h_bucket{kind="a",le="0.1"} 2',
+        'h_bucket{kind="a",le="1.0"} 3',
+        'h_bucket{kind="a",le="+Inf"} 4',
+        'h_sum{kind="a"} 2.65',
+        'h_count{kind="a"} 4',
+    ]
+
+def test_counter_escapes_label_values():
+    counter = Counter("c", "doc", ("name",))
+    counter.inc(2, name='a"b\\c\nd')
+    counter.inc(name='a"b\\c\nd')
+    assert counter.render()[2] == 'c{name="a\\"b\\\\c\\nd"} 3'
+
+@pytest.mark.parametrize("path, label", [
+    ("/api/queries/execute", "queries"),
+    ("/api/tables/c1/items/profile", "tables"),
+    ("/api/unknown/x", "other"),
+    ("/metrics", "other"),
+])
+def test_router_label(path, label):
+    assert router_label(path) == label
+
+def test_metrics_endpoint(client, sqlite_file, open_sqlite):
+    open_sqlite("m1", sqlite_file)
+    client.post("/api/queries/execute", json={"connection_id": "m1", "query": "SELECT * FROM items", "limit": 10})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'dbm_http_request_duration_seconds_count{router="queries",method="POST",status="200"}' in body
+    assert 'dbm_db_statement_duration_seconds_bucket{connection_id="m1",le="+Inf"}' in body
+    assert 'dbm_rows_streamed_total{connection_id="m1"} ' in body
+    assert 'dbm_pool_size{connection_id="m1"}' in body
\ No newline at end of file
@@ -0,0 +1,85 @@
+from services.query_cache import QueryResultCache, estimate_size, is_cacheable, read_tables, written_table
+from services.sqlite_service import SQLiteService
+import pytest
+import time
+
+def _key(query, database="db", namespace="c1"):
+    return QueryResultCache.make_key(database, namespace, query)
+
+def test_byte_budget_evicts_least_recently_used():
+    cache = QueryResultCache(max_bytes=2000)
+    for name in ("a", "b", "c", "d"):
+        assert cache.put(_key(f"SELECT * FROM {name}"), ["x"], [], 450)
+    cache.get(_key("SELECT * FROM a"))
+    cache.put(_key("SELECT * FROM e"), ["x"], [], 450)
+    assert cache.get(_key("SELECT * FROM b")) is None
+    assert cache.get(_key("SELECT * FROM a")) is not None
+    stats = cache.get_stats()
+    assert stats["bytes"] == 1800 and stats["evictions"] == 1 and stats["evicted_bytes"] == 450
+
+def test_entries_over_a_quarter_of_the_budget_are_refused():
+    cache = QueryResultCache(max_bytes=1000)
+    assert not cache.put(_key("SELECT 1"), ["x"], [], 251)
+    assert cache.get_stats()["entries"] == 0
+
+def test_entries_expire():
+    cache = QueryResultCache(default_ttl=0.05)
+    cache.put(_key("SELECT 1"), ["x"], [(1,)], 10)
+    time.sleep(0.06)
+    assert cache.get(_key("SELECT 1")) is None
+    assert cache.get_stats()["bytes"] == 0
+
+def test_invalidation_reaches_every_connection_to_the_database():
+    cache = QueryResultCache()
+    cache.put(_key("SELECT * FROM a", namespace="c1"), ["x"], [], 10)
+    cache.put(_key("SELECT * FROM a", namespace="c2"), ["x"], [], 10)
+    cache.put(_key("SELECT * FROM b", namespace="c2"), ["x"], [], 10)
+    cache.put(_key("SELECT * FROM a", database="other"), ["x"], [], 10)
+    cache.invalidate("db", "UPDATE a SET x = 1")
+    assert cache.get(_key("SELECT * FROM a", namespace="c1")) is None
+    assert cache.get(_key("SELECT * FROM a", namespace="c2")) is None
+    assert cache.get(_key("SELECT * FROM b", namespace="c2")) is not None
+    assert cache.get(_key("SELECT * FROM a", database="other")) is not None
+
+def test_table_extraction():
+    assert read_tables('SELECT * FROM "a" JOIN s.b ON 1 = 1') == {"a", "b"}
+    assert read_tables("SELECT * FROM a, b") is None
+    assert written_table("DELETE FROM `Items` WHERE id = 1") == "items"
+    assert written_table("WITH d AS (DELETE FROM a RETURNING *) SELECT * FROM d") is None
+    assert not is_cacheable("WITH d AS (DELETE FROM a RETURNING *) SELECT * FROM d")
+    assert estimate_size([(1, "a")]) > 0
+
+@pytest.mark.parametrize("query, is_read", [
+    ("SELECT 1", True),
+    ("WITH t AS (SELECT 1) SELECT * FROM t", True),
+    ("WITH d AS (DELETE FROM a RETURNING *) SELECT * FROM d", False),
+    ("with u as (update a set x = 1 returning x) select * from u", False),
+    ("WITH t AS (SELECT updated_at FROM a) SELECT * FROM t", True),
+    ("INSERT INTO a VALUES (1)", False),
+])
+def test_data_modifying_ctes_are_writes(query, is_read):
+    assert SQLiteService("sqlite://").is_read_query(query) is is_read
+
+def test_database_key_ignores_how_the_file_was_opened(sqlite_file):
+    plain = SQLiteService(f"sqlite:///{sqlite_file}")
+    read_only = SQLiteService(f"sqlite:///file:{sqlite_file}?mode=ro&uri=true")
+    assert plain.database_key == read_only.database_key
+    assert SQLiteService("sqlite://").database_key != SQLiteService("sqlite://").database_key
+
+def _total(client, connection_id):
+    body = client.post("/api/queries/execute", json={
+        "connection_id": connection_id, "query": "SELECT SUM(qty) AS total FROM items", "cache": True
+    }).json()
+    return body["rows"][0]["total"], body["cached"]
+
+def test_write_through_a_sibling_connection_invalidates(client, sqlite_file, open_sqlite):
+    open_sqlite("x1", sqlite_file)
+    open_sqlite("x2", sqlite_file)
+    open_sqlite("x3", sqlite_file, sqlite_mode="readonly")
+    before, _ = _total(client, "x1")
+    assert _total(client, "x1") == (before, True)
+    _total(client, "x3")
+    
+    client.post("/api/queries/execute", json={"connection_id": "x2", "query": "UPDATE items SET qty = qty + 1"})
+    assert _total(client, "x1") == (before + 100, False)
+    assert _total(client, "x3") == (before + 100, False)
\ No newline at end of file
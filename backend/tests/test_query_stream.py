@@ -0,0 +1,68 @@
+from api.queries import QueryExecuteRequest, execute_query
+from services.connection_manager import connection_manager
+from services.sqlite_service import SQLiteService
+from starlette.requests import Request
+import asyncio
+import json
+import pytest
+
+@pytest.mark.parametrize("query, expected", [
+    ("SELECT * FROM t;", "SELECT * FROM t\nLIMIT 10"),
+    ("SELECT * FROM t LIMIT 5", "SELECT * FROM t LIMIT 5"),
+    ("SELECT * FROM t FOR UPDATE", "SELECT * FROM t\nLIMIT 10 FOR UPDATE"),
+    ("SELECT * FROM t FOR UPDATE OF t SKIP LOCKED", "SELECT * FROM t\nLIMIT 10 FOR UPDATE OF t SKIP LOCKED"),
+    ("SELECT * FROM t LIMIT 3 FOR SHARE", "SELECT * FROM t LIMIT 3 FOR SHARE"),
+    ("SELECT * FROM t LOCK IN SHARE MODE", "SELECT * FROM t\nLIMIT 10 LOCK IN SHARE MODE"),
+    ("SELECT * FROM t ORDER BY id OFFSET 20", "SELECT * FROM t ORDER BY id\nLIMIT 10 OFFSET 20"),
+    ("SELECT * FROM t FETCH FIRST 5 ROWS ONLY", "SELECT * FROM t FETCH FIRST 5 ROWS ONLY"),
+    ("UPDATE t SET a = 1", "UPDATE t SET a = 1"),
+])
+def test_apply_limit(query, expected):
+    assert SQLiteService("sqlite://").apply_limit(query, 10) == expected
+
+def test_offset_only_query_runs_with_limit(client, sqlite_file, open_sqlite):
+    open_sqlite("s1", sqlite_file)
+    response = client.post("/api/queries/execute", json={
+        "connection_id": "s1", "query": "SELECT id FROM items ORDER BY id OFFSET 95", "limit": 3
+    })
+    assert response.status_code == 200, response.text
+    assert [row["id"] for row in response.json()["rows"]] == [96, 97, 98]
+
+def test_execute_streams_json_and_ndjson(client, sqlite_file, open_sqlite):
+    open_sqlite("s1", sqlite_file)
+    request = {"connection_id": "s1", "query": "SELECT id, name FROM items ORDER BY id", "chunk_size": 30}
+    body = client.post("/api/queries/execute", json=request).json()
+    assert body["columns"] == ["id", "name"]
+    assert body["rows_count"] == 100
+    assert body["rows"][0] == {"id": 1, "name": "item1"}
+    
+    response = client.post("/api/queries/execute", json=request, headers={"Accept": "application/x-ndjson"})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["type"] for line in lines] == ["columns", "rows", "rows", "rows", "rows", "summary"]
+    assert lines[-1]["rows_count"] == 100
+    assert connection_manager.list_queries("s1") == []
+
+def test_sql_error_maps_to_400(client, sqlite_file, open_sqlite):
+    open_sqlite("s1", sqlite_file)
+    response = client.post("/api/queries/execute", json={"connection_id": "s1", "query": "SELECT nope FROM items"})
+    assert response.status_code == 400
+    assert connection_manager.list_queries("s1") == []
+
+def test_unread_stream_is_closed_by_the_background_task(sqlite_file, open_sqlite):
+    service = open_sqlite("s_unread", sqlite_file)
+    
+    async def respond_without_reading():
+        request = Request({"type": "http", "headers": []})
+        response = await execute_query(
+            QueryExecuteRequest(connection_id="s_unread", query="SELECT * FROM items", chunk_size=10), request
+        )
+        # The statement is running and holds a pooled connection
+        assert len(connection_manager.list_queries("s_unread")) == 1
+        assert service.engine.pool.checkedout() == 1
+        # A client that disconnects before the first chunk never starts the body
+        await response.background()
+        await response.background()
+    
+    asyncio.run(respond_without_reading())
+    assert connection_manager.list_queries("s_unread") == []
+    assert service.engine.pool.checkedout() == 0
\ No newline at end of file
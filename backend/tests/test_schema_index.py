@@ -0,0 +1,89 @@
+from services.schema_index import ConnectionIndex, SchemaIndex, trigrams
+import sqlite3
+import time
+
+SNAPSHOT = {
+    "customers": {"columns": [{"name": "id", "type": "INTEGER"}, {"name": "customer_name", "type": "TEXT"}]},
+    "orders": {"columns": [{"name": "id", "type": "INTEGER"}, {"name": "customer_id", "type": "INTEGER"}]},
+    "invoices": {"columns": [{"name": "Customer_ID", "type": "BIGINT"}, {"name": "total", "type": "NUMERIC"}]},
+}
+
+def _index():
+    return ConnectionIndex("c", SNAPSHOT)
+
+def test_trigrams():
+    assert trigrams("ab") == {"  a", " ab", "ab "}
+    assert trigrams("abcd", padded=False) == {"abc", "bcd"}
+
+def test_names_are_folded_and_shared():
+    index = _index()
+    assert (index.tables, index.columns) == (3, 6)
+    assert [(entry["table"], entry["name"], entry["type"]) for entry in index.entries["customer_id"]] == [
+        ("orders", "customer_id", "INTEGER"), ("invoices", "Customer_ID", "BIGINT"),
+    ]
+    assert len(index.entries["id"]) == 2
+
+def test_prefix_substring_and_fuzzy():
+    index = _index()
+    assert index.prefix("customer") == {"customer_id": 0.9, "customer_name": 0.9, "customers": 0.9}
+    assert index.prefix("orders") == {"orders": 1.0}
+    assert set(index.substring("omer")) == {"customer_id", "customer_name", "customers"}
+    # Queries shorter than a trigram scan every name
+    assert set(index.substring("ot")) == {"total"}
+    assert set(index.fuzzy("custmer_id")) >= {"customer_id"}
+    assert "total" not in index.fuzzy("custmer_id")
+    assert index.fuzzy("zzzz") == {}
+
+def _built(snapshot=SNAPSHOT, connection_id="c"):
+    index = SchemaIndex()
+    index._indexes[connection_id] = ConnectionIndex(connection_id, snapshot)
+    # Searching must not start the background builder in these tests
+    index._stopped.set()
+    return index
+
+def test_search_ranks_and_filters():
+    index = _built()
+    results = index.search("Customer")
+    assert [result["name"] for result in results[:4]] == ["customers", "customer_id", "Customer_ID", "customer_name"]
+    assert results[0]["kind"] == "table" and results[0]["score"] == 0.9
+    assert {result["kind"] for result in index.search("customer", kind="column")} == {"column"}
+    assert [result["table"] for result in index.search("customer_id", mode="prefix", limit=1)] == ["orders"]
+    assert index.search("customer", connection_id="other") == []
+    assert index.search("   ") == []
+
+def test_auto_falls_back_to_fuzzy():
+    index = _built()
+    assert index.search("invioces", mode="substring") == []
+    assert [result["name"] for result in index.search("invioces")][:1] == ["invoices"]
+
+def test_search_endpoint_builds_in_the_background(client, sqlite_file, open_sqlite):
+    open_sqlite("ix", sqlite_file)
+    client.post("/api/tables/search/refresh", params={"connection_id": "ix"})
+    for _ in range(100):
+        body = client.get("/api/tables/search", params={"q": "item", "connection_id": "ix"}).json()
+        if body["results"]:
+            break
+        time.sleep(0.05)
+    assert [(result["table"], result["kind"], result["score"]) for result in body["results"]] == [
+        ("items", "table", 0.9)
+    ]
+
+def test_schema_changes_mark_the_index_stale(sqlite_file, open_sqlite):
+    service = open_sqlite("ix2", sqlite_file)
+    index = SchemaIndex()
+    index._stopped.set()
+    assert "ix2" in index._stale_connections()
+    index._build("ix2")
+    assert "ix2" not in index._stale_connections()
+    assert index.search("qty", connection_id="ix2")[0]["table"] == "items"
+    
+    with sqlite3.connect(sqlite_file) as conn:
+        conn.execute("CREATE TABLE warehouses (id INTEGER PRIMARY KEY, warehouse_code TEXT)")
+    service.invalidate_metadata()
+    assert "ix2" in index._stale_connections()
+    index._build("ix2")
+    assert [result["table"] for result in index.search("warehouse_code", kind="column", connection_id="ix2")] == ["warehouses"]
+
+def test_search_endpoint_rejects_unknown_modes(client):
+    assert client.get("/api/tables/search", params={"q": "x", "mode": "regex"}).status_code == 400
+    assert client.get("/api/tables/search", params={"q": "x", "kind": "view"}).status_code == 400
\ No newline at end of file
@@ -0,0 +1,26 @@
+import sqlite3
+
+def test_snapshot_with_foreign_keys_and_etag(client, sqlite_file, open_sqlite):
+    with sqlite3.connect(sqlite_file) as conn:
+        conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, item_id INTEGER REFERENCES items(id))")
+    open_sqlite("sn1", sqlite_file)
+    response = client.get("/api/tables/sn1/snapshot")
+    assert response.status_code == 200
+    snapshot = response.json()
+    assert snapshot["table_count"] == 2
+    assert snapshot["tables"]["items"]["primary_keys"] == ["id"]
+    assert snapshot["foreign_key_graph"] == [{
+        "name": None, "table": "orders", "columns": ["item_id"],
+        "referred_table": "items", "referred_columns": ["id"]
+    }]
+    
+    etag = response.headers["etag"]
+    assert client.get("/api/tables/sn1/snapshot", headers={"If-None-Match": etag}).status_code == 304
+
+def test_ddl_changes_the_etag(client, sqlite_file, open_sqlite):
+    open_sqlite("sn2", sqlite_file)
+    etag = client.get("/api/tables/sn2/snapshot").headers["etag"]
+    client.post("/api/queries/execute", json={"connection_id": "sn2", "query": "ALTER TABLE items ADD COLUMN note TEXT"})
+    response = client.get("/api/tables/sn2/snapshot", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "note" in [col["name"] for col in response.json()["tables"]["items"]["columns"]]
\ No newline at end of file
@@ -0,0 +1,86 @@
+from services.slow_query_log import SlowQueryLog, fingerprint, params_shape, percentile, slow_query_log
+import pytest
+import sqlite3
+import time
+
+class FakeService:
+    connection_id = "fake"
+    engine = None
+    
+    def get_query_type(self, query):
+        return query.split()[0].upper()
+
+@pytest.mark.parametrize("query, shape", [
+    ("SELECT * FROM t WHERE id = 42 AND name = 'it''s'", "SELECT * FROM t WHERE id = ? AND name = ?"),
+    ("SELECT * FROM t WHERE id IN (1, 2, 3)", "SELECT * FROM t WHERE id IN (?+)"),
+    ("SELECT * FROM t WHERE a = :a AND b = %(b)s AND c = $1;", "SELECT * FROM t WHERE a = ? AND b = ? AND c = ?"),
+    ("SELECT  col1,\n t2.x FROM t2", "SELECT col1, t2.x FROM t2"),
+])
+def test_fingerprint(query, shape):
+    assert fingerprint(query) == shape
+
+def test_params_shape_hides_values():
+    assert params_shape({"id": 1, "name": "x"}) == {"id": "int", "name": "str"}
+    assert params_shape([{"id": 1}, {"id": 2}]) == {"rows": 2, "row": {"id": "int"}}
+    assert params_shape(None) is None
+
+def test_percentile_nearest_rank():
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 0.5) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.5) == 0.0
+
+def test_ring_buffer_and_summary():
+    log = SlowQueryLog(threshold=0.1, max_entries=3)
+    service = FakeService()
+    log.record(service, "SELECT 1", None, 0.05)
+    for duration in (0.2, 0.3, 0.4):
+        log.record(service, f"SELECT * FROM t WHERE id = {int(duration * 10)}", None, duration, rows=1)
+    log.record(service, "DELETE FROM t", None, 1.0, rows=-1)
+    
+    entries = log.get_entries("fake")
+    # Oldest evicted, under-threshold never logged, newest first
+    assert [entry["duration"] for entry in entries] == [1.0, 0.4, 0.3]
+    assert entries[0]["rows"] is None
+    summary = log.summarize("fake")
+    assert [(item["statement"], item["count"]) for item in summary] == [
+        ("DELETE FROM t", 1), ("SELECT * FROM t WHERE id = ?", 2)
+    ]
+    assert summary[1]["p50"] == 0.3 and summary[1]["max"] == 0.4
+    log.shutdown()
+
+def test_per_connection_threshold_and_persistence(tmp_path):
+    log = SlowQueryLog(threshold=10, db_path=str(tmp_path / "slow.db"))
+    service = FakeService()
+    log.configure("fake", threshold=0.0)
+    log.record(service, "SELECT 1", None, 0.01)
+    deadline = time.monotonic() + 5
+    while True:
+        with sqlite3.connect(tmp_path / "slow.db") as db:
+            try:
+                rows = db.execute("SELECT connection_id, statement FROM slow_queries").fetchall()
+            except sqlite3.OperationalError:
+                rows = []
+        if rows or time.monotonic() > deadline:
+            break
+        time.sleep(0.01)
+    assert rows == [("fake", "SELECT ?")]
+    log.shutdown()
+
+def test_slow_log_endpoint_captures_plans(client, sqlite_file, open_sqlite):
+    open_sqlite("sl1", sqlite_file, slow_query_threshold=0, explain_slow_queries=True)
+    client.post("/api/queries/execute", json={"connection_id": "sl1", "query": "SELECT * FROM items WHERE id = 5"})
+    deadline = time.monotonic() + 5
+    while not slow_query_log.get_entries("sl1")[0]["plan"]:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    
+    response = client.get("/api/queries/slow-log", params={"connection_id": "sl1"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["threshold"] == 0 and body["explain"] is True
+    assert body["entries"][0]["statement"] == "SELECT * FROM items WHERE id = ? LIMIT ?"
+    summary = client.get("/api/queries/slow-log/summary", params={"connection_id": "sl1"}).json()
+    assert summary["statements"][0]["plan"]
+    assert client.delete("/api/queries/slow-log", params={"connection_id": "sl1"}).status_code == 200
+    assert client.get("/api/queries/slow-log", params={"connection_id": "sl1"}).json()["entries"] == []
\ No newline at end of file
@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
+from services.sqlite_service import BULK_LOAD_PRAGMAS, DEFAULT_SQLITE_MMAP_SIZE
+import os
+import sqlite3
+
+def _pragma(conn, name):
+    return conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+
+def test_file_connections_are_tuned(sqlite_file, open_sqlite):
+    service = open_sqlite("q1", sqlite_file)
+    with service.connection() as conn:
+        assert _pragma(conn, "journal_mode") == "wal"
+        assert _pragma(conn, "synchronous") == 1
+        assert _pragma(conn, "busy_timeout") > 0
+        assert _pragma(conn, "mmap_size") == DEFAULT_SQLITE_MMAP_SIZE
+    assert service.read_only is False
+
+def test_read_only_mode(client, sqlite_file, open_sqlite):
+    service = open_sqlite("q2", sqlite_file, sqlite_mode="readonly")
+    assert service.read_only and service.database_path == os.path.abspath(sqlite_file)
+    with service.connection() as conn:
+        # Read-only connections never switch the file's journal mode
+        assert _pragma(conn, "journal_mode") == "delete"
+    rows = client.post("/api/queries/execute", json={"connection_id": "q2", "query": "SELECT count(*) AS n FROM items"})
+    assert rows.json()["rows"] == [{"n": 100}]
+    response = client.post("/api/queries/execute", json={"connection_id": "q2", "query": "DELETE FROM items"})
+    assert response.status_code == 400
+    assert "readonly" in response.json()["detail"]
+
+def test_path_with_spaces_survives_the_uri(tmp_path, open_sqlite):
+    path = tmp_path / "my data #1.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE t (x)")
+    service = open_sqlite("q3", path, sqlite_mode="immutable")
+    assert service.database_path == str(path)
+    assert service.get_tables() == ["t"]
+
+def test_concurrent_writers_queue_instead_of_failing(sqlite_file, open_sqlite):
+    service = open_sqlite("q4", sqlite_file)
+    
+    def write(worker):
+        for index in range(20):
+            service.execute_query(f"INSERT INTO items (name, qty) VALUES ('w{worker}-{index}', {index})")
+    
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(write, range(4)))
+    assert service.execute_query("SELECT count(*) FROM items") == [(180,)]
+
+def test_bulk_pragmas_are_restored(sqlite_file, open_sqlite):
+    service = open_sqlite("q5", sqlite_file, pool={"pool_size": 1})
+    with service.connection() as conn:
+        before = {name: _pragma(conn, name) for name in BULK_LOAD_PRAGMAS}
+        with service.bulk_load_session(conn):
+            assert {name: _pragma(conn, name) for name in BULK_LOAD_PRAGMAS} == BULK_LOAD_PRAGMAS
+        assert {name: _pragma(conn, name) for name in BULK_LOAD_PRAGMAS} == before
\ No newline at end of file
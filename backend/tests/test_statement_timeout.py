@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+from services.base_service import QueryCancelledError, QueryTimeoutError
+import pytest
+import time
+
+ENDLESS = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c"
+
+class ManualTimer:
+    """Stands in for threading.Timer; the test decides when it fires"""
+    created = []
+    
+    def __init__(self, interval, function):
+        self.function = function
+        self.daemon = False
+        ManualTimer.created.append(self)
+    
+    def start(self):
+        pass
+    
+    def cancel(self):
+        pass
+
+def test_timeout_maps_to_504(client, sqlite_file, open_sqlite):
+    open_sqlite("t1", sqlite_file)
+    response = client.post("/api/queries/execute", json={"connection_id": "t1", "query": ENDLESS, "timeout": 0.2})
+    assert response.status_code == 504
+    assert response.json()["detail"] == "Statement exceeded its timeout of 0.2s"
+
+def test_connection_default_timeout(client, sqlite_file, open_sqlite):
+    service = open_sqlite("t2", sqlite_file, statement_timeout=0.2)
+    with pytest.raises(QueryTimeoutError):
+        service.execute_query(ENDLESS)
+    assert service.execute_query("SELECT count(*) FROM items") == [(100,)]
+
+def test_cancel_raises_cancelled(sqlite_file, open_sqlite):
+    service = open_sqlite("t3", sqlite_file)
+    with ThreadPoolExecutor(1) as pool:
+        future = pool.submit(service.execute_query, ENDLESS, query_id="q-slow", timeout=30)
+        deadline = time.monotonic() + 5
+        while "q-slow" not in service._running:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        # interrupt() only stops a statement that has started stepping
+        time.sleep(0.2)
+        assert service.cancel_query("q-slow")
+        with pytest.raises(QueryCancelledError, match="q-slow"):
+            future.result(timeout=5)
+    assert not service._cancelled
+
+def test_late_timer_does_not_interrupt_next_statement(sqlite_file, open_sqlite, monkeypatch):
+    service = open_sqlite("t4", sqlite_file)
+    monkeypatch.setattr("services.sqlite_service.threading.Timer", ManualTimer)
+    ManualTimer.created.clear()
+    
+    with service.connection() as conn:
+        with service.with_statement_timeout(conn, 1):
+            conn.exec_driver_sql("SELECT 1").fetchall()
+        result = conn.exec_driver_sql("SELECT id FROM items")
+        assert result.fetchone() == (1,)
+        # The timer fires late, as it can just before cancel() runs, while the next statement steps
+        ManualTimer.created[0].function()
+        assert len(result.fetchall()) == 99
+
+def test_sql_errors_stay_400(client, sqlite_file, open_sqlite):
+    open_sqlite("t5", sqlite_file)
+    response = client.post("/api/queries/execute", json={"connection_id": "t5", "query": "SELECT nope FROM items"})
+    assert response.status_code == 400
\ No newline at end of file
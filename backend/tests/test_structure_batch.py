@@ -0,0 +1,53 @@
+import sqlite3
+import time
+
+def _batch(client, items, **fields):
+    response = client.post("/api/tables/structures", json={"items": items, **fields})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def _errors(body):
+    return {(error["connection_id"], error["table_name"]): error["status"] for error in body["errors"]}
+
+def test_structures_across_connections(client, sqlite_file, tmp_path, open_sqlite):
+    other = tmp_path / "other.db"
+    with sqlite3.connect(other) as conn:
+        conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, item_id INTEGER REFERENCES items (id))")
+    open_sqlite("s1", sqlite_file)
+    open_sqlite("s2", other)
+    body = _batch(client, [
+        {"connection_id": "s1", "tables": ["items", "missing"]},
+        {"connection_id": "s2", "tables": ["orders"]},
+        # Repeated items for one connection are merged
+        {"connection_id": "s1", "tables": ["items"]},
+        {"connection_id": "nope", "tables": ["items"]},
+    ])
+    assert list(body["results"]) == ["s1", "s2"]
+    assert [col["name"] for col in body["results"]["s1"]["items"]["columns"]] == ["id", "name", "qty"]
+    assert body["results"]["s1"]["items"]["primary_keys"] == ["id"]
+    assert body["results"]["s2"]["orders"]["foreign_keys"][0]["referred_table"] == "items"
+    assert _errors(body) == {("s1", "missing"): 404, ("nope", "items"): 404}
+
+def test_failed_batch_is_retried_per_table(client, sqlite_file, open_sqlite):
+    service = open_sqlite("s3", sqlite_file)
+    
+    def fail(table_names):
+        raise RuntimeError("catalog query failed")
+    
+    service.get_table_structures = fail
+    body = _batch(client, [{"connection_id": "s3", "tables": ["items", "missing"]}])
+    assert list(body["results"]["s3"]) == ["items"]
+    assert _errors(body) == {("s3", "missing"): 500}
+
+def test_slow_connection_does_not_hold_up_the_others(client, sqlite_file, tmp_path, open_sqlite):
+    open_sqlite("s4", sqlite_file)
+    slow = open_sqlite("s5", tmp_path / "slow.db")
+    slow.get_table_structures = lambda table_names: time.sleep(1) or {}
+    started = time.monotonic()
+    body = _batch(client, [
+        {"connection_id": "s5", "tables": ["a", "b"]},
+        {"connection_id": "s4", "tables": ["items"]},
+    ], timeout=0.2)
+    assert time.monotonic() - started < 0.9
+    assert list(body["results"]) == ["s4"]
+    assert _errors(body) == {("s5", "a"): 504, ("s5", "b"): 504}
\ No newline at end of file
@@ -0,0 +1,60 @@
+from datetime import time as time_of_day
+from decimal import Decimal
+from sqlalchemy import Column, Integer, MetaData, Table
+from sqlalchemy.dialects import postgresql
+import sqlite3
+import time
+import uuid
+
+def _wait(client, copy_id):
+    for _ in range(200):
+        copy = client.get(f"/api/tables/copies/{copy_id}").json()
+        if copy["status"] in ("completed", "failed", "cancelled"):
+            return copy
+        time.sleep(0.05)
+    raise AssertionError(f"Copy {copy_id} did not finish")
+
+def _start(client, **fields):
+    response = client.post("/api/tables/copy", json={"table_name": "items", "workers": 3, "batch_size": 10, **fields})
+    assert response.status_code == 200, response.text
+    return _wait(client, response.json()["copy_id"])
+
+def test_copy_between_sqlite_files(client, sqlite_file, tmp_path, open_sqlite):
+    open_sqlite("c_src", sqlite_file)
+    open_sqlite("c_dst", tmp_path / "target.db")
+    copy = _start(client, source_connection_id="c_src", target_connection_id="c_dst")
+    assert copy["status"] == "completed", copy["error"]
+    assert copy["rows_copied"] == 100
+    assert copy["ranges_done"] == len(copy["ranges"]) > 1
+    with sqlite3.connect(tmp_path / "target.db") as conn:
+        assert conn.execute("SELECT id, name, qty FROM items ORDER BY id").fetchall() == [
+            (i, f"item{i}", i % 7) for i in range(1, 101)
+        ]
+
+def test_copy_binds_values_for_the_target_column_types(client, sqlite_file, tmp_path, open_sqlite):
+    source = open_sqlite("c_pg", sqlite_file)
+    open_sqlite("c_lite", tmp_path / "target.db")
+    # A PostgreSQL table, as reflected, and the values psycopg2 returns for it
+    reflected = Table(
+        "items", MetaData(), Column("id", Integer, primary_key=True), Column("price", postgresql.NUMERIC(10, 2)),
+        Column("opens", postgresql.TIME()), Column("token", postgresql.UUID(as_uuid=True))
+    )
+    source.get_table_structure = lambda table_name: {
+        "columns": [{"name": column.name, "type": column.type, "nullable": True} for column in reflected.columns],
+        "primary_keys": ["id"],
+    }
+    tokens = {i: uuid.uuid4() for i in range(1, 101)}
+    
+    def stream_query(sql, params=None, chunk_size=None):
+        low, high = params["low"], params["high"]
+        yield {"rows": [(i, Decimal(i) / 4, time_of_day(8, i % 60), tokens[i]) for i in range(low, high + 1)]}
+    
+    source.stream_query = stream_query
+    copy = _start(client, source_connection_id="c_pg", target_connection_id="c_lite")
+    assert copy["status"] == "completed", copy["error"]
+    with sqlite3.connect(tmp_path / "target.db") as conn:
+        rows = conn.execute("SELECT id, price, opens, token FROM items ORDER BY id").fetchall()
+    assert len(rows) == 100
+    assert rows[5] == (6, 1.5, "08:06:00.000000", tokens[6].hex)
+    # Uuid columns outside PostgreSQL are CHAR(32), which 36-character strings overflow on MySQL
+    assert all(len(row[3]) == 32 for row in rows)
\ No newline at end of file
@@ -0,0 +1,59 @@
+from datetime import date, datetime
+from decimal import Decimal
+from services.table_pager import InvalidCursorError, decode_cursor, encode_cursor, restore_value
+from sqlalchemy import Date, DateTime, Integer, Numeric
+import pytest
+import sqlite3
+
+def test_cursor_round_trip():
+    state = {"q": "abc", "k": [42, "name with spaces/+", None]}
+    token = encode_cursor(state)
+    assert "=" not in token
+    assert decode_cursor(token) == state
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("not a cursor!")
+
+def test_restore_value_by_column_type():
+    assert restore_value(DateTime(), "2024-01-02T03:04:05") == datetime(2024, 1, 2, 3, 4, 5)
+    assert restore_value(Date(), "2024-01-02") == date(2024, 1, 2)
+    assert restore_value(Numeric(), "1.50") == Decimal("1.50")
+    assert restore_value(Integer(), 7) == 7
+
+def _pages(client, **request):
+    cursor, ids = None, []
+    while True:
+        page = client.post("/api/queries/table-data", json={**request, "cursor": cursor}).json()
+        ids.extend(row["id"] for row in page["rows"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return page, ids
+
+def test_keyset_pages_cover_the_table_once(client, sqlite_file, open_sqlite):
+    open_sqlite("p1", sqlite_file)
+    page, ids = _pages(client, connection_id="p1", table_name="items", page_size=30)
+    assert page["pagination"] == "keyset"
+    assert ids == list(range(1, 101))
+    
+    _, ids = _pages(client, connection_id="p1", table_name="items", page_size=30, descending=True)
+    assert ids == list(range(100, 0, -1))
+
+def test_tables_without_a_key_fall_back_to_offset(client, tmp_path, open_sqlite):
+    path = tmp_path / "nokey.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE log (id INTEGER, message TEXT)")
+        conn.executemany("INSERT INTO log VALUES (?, ?)", [(i, "m") for i in range(25)])
+    open_sqlite("p2", path)
+    page, ids = _pages(client, connection_id="p2", table_name="log", page_size=10)
+    assert page["pagination"] == "offset"
+    assert sorted(ids) == list(range(25))
+
+def test_cursor_from_another_ordering_is_rejected(client, sqlite_file, open_sqlite):
+    open_sqlite("p3", sqlite_file)
+    first = client.post("/api/queries/table-data", json={"connection_id": "p3", "table_name": "items", "page_size": 10})
+    response = client.post("/api/queries/table-data", json={
+        "connection_id": "p3", "table_name": "items", "page_size": 10,
+        "descending": True, "cursor": first.json()["next_cursor"]
+    })
+    assert response.status_code == 400
\ No newline at end of file
@@ -0,0 +1,41 @@
+import services.sqlite_service as sqlite_service
+import sqlite3
+
+def _analyzed(path):
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE other (v TEXT)")
+        conn.execute("ANALYZE")
+    return path
+
+def test_listing_reports_estimates(client, sqlite_file, open_sqlite):
+    open_sqlite("st1", _analyzed(sqlite_file))
+    tables = {table["name"]: table for table in client.get("/api/tables/st1/list").json()}
+    assert tables["items"]["row_count"] == 100
+    assert tables["items"]["size"].endswith("MB")
+    assert tables["items"]["row_count_exact"] is False
+
+def test_exact_mode_counts_rows(client, sqlite_file, open_sqlite):
+    open_sqlite("st2", sqlite_file)
+    tables = {table["name"]: table for table in client.get("/api/tables/st2/list?exact=true").json()}
+    assert tables["items"]["row_count"] == 100
+    assert tables["items"]["row_count_exact"] is True
+
+def test_listing_is_cached_next_to_the_table_list(sqlite_file, open_sqlite):
+    service = open_sqlite("st3", _analyzed(sqlite_file))
+    first = service.get_table_stats()
+    misses = service.metadata_cache.misses
+    assert service.get_table_stats() is first
+    assert service.metadata_cache.misses == misses
+
+def test_large_files_skip_dbstat_unless_exact(sqlite_file, open_sqlite, monkeypatch):
+    service = open_sqlite("st4", _analyzed(sqlite_file))
+    monkeypatch.setattr(sqlite_service, "DEFAULT_SQLITE_DBSTAT_MAX_BYTES", 0)
+    estimate = service.get_table_stats()
+    assert estimate["items"] == {"row_count": 100, "size_bytes": None}
+    assert service.get_table_stats(exact=True)["items"]["size_bytes"] > 0
+
+def test_named_tables_are_looked_up_alone(sqlite_file, open_sqlite):
+    service = open_sqlite("st5", _analyzed(sqlite_file))
+    stats = service.get_table_stats(["items", "missing"])
+    assert list(stats) == ["items"]
+    assert stats["items"]["row_count"] == 100
\ No newline at end of file
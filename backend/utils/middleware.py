@@ -0,0 +1,176 @@
+"""
+ASGI middleware
+"""
+from starlette.datastructures import Headers, MutableHeaders
+from services.metrics import http_request_seconds
+from typing import Callable, Dict, Optional
+import os
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_COMPRESS_MIN_SIZE = int(os.getenv("DBM_COMPRESS_MIN_SIZE", "1024"))
+DEFAULT_GZIP_LEVEL = int(os.getenv("DBM_GZIP_LEVEL", "6"))
+COMPRESSIBLE_TYPES = {
+    "application/json", "application/x-ndjson", "application/javascript", "application/xml",
+    "application/vnd.apache.arrow.stream", "image/svg+xml",
+}
+
+KNOWN_ROUTERS = {"connections", "databases", "tables", "queries", "jobs"}
+
+def router_label(path: str) -> str:
+    """Map a request path to its router, keeping label cardinality bounded"""
+    parts = path.split("/")
+    if len(parts) > 2 and parts[1] == "api" and parts[2] in KNOWN_ROUTERS:
+        return parts[2]
+    return "other"
+
+class MetricsMiddleware:
+    """Records request latency per router, including streamed response bodies"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        started = time.perf_counter()
+        status = {"code": 500}
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_request_seconds.observe(
+                time.perf_counter() - started,
+                router=router_label(scope["path"]),
+                method=scope["method"],
+                status=str(status["code"])
+            )
+
+class GzipEncoder:
+    def __init__(self, level: int = DEFAULT_GZIP_LEVEL):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    
+    def compress(self, data: bytes, final: bool) -> bytes:
+        flush_mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return self._compressor.compress(data) + self._compressor.flush(flush_mode)
+
+class ZstdEncoder:
+    def __init__(self, level: int = 3):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    
+    def compress(self, data: bytes, final: bool) -> bytes:
+        flush_mode = zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return self._compressor.compress(data) + self._compressor.flush(flush_mode)
+
+class BrotliEncoder:
+    def __init__(self, quality: int = 4):
+        self._compressor = brotli.Compressor(quality=quality)
+    
+    def compress(self, data: bytes, final: bool) -> bytes:
+        compressed = self._compressor.process(data)
+        return compressed + (self._compressor.finish() if final else self._compressor.flush())
+
+# Content codings in order of preference; the faster ones need optional packages
+ENCODERS: Dict[str, Callable] = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = ZstdEncoder
+if brotli is not None:
+    ENCODERS["br"] = BrotliEncoder
+ENCODERS["gzip"] = GzipEncoder
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the preferred content coding the client accepts"""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    candidates = [
+        name for name in ENCODERS if accepted.get(name, accepted.get("*", 0.0)) > 0
+    ]
+    return max(candidates, key=lambda name: accepted.get(name, accepted.get("*", 0.0)), default=None)
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    return media_type.startswith("text/") or media_type.endswith("+json") or media_type in COMPRESSIBLE_TYPES
+
+class CompressionMiddleware:
+    """
+    Compresses responses with the best coding the client accepts. Streamed
+    bodies are compressed and flushed chunk by chunk, never buffered; single
+    bodies under the minimum size go out as they are
+    """
+    
+    def __init__(self, app, minimum_size: int = DEFAULT_COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        
+        state = {"start": None, "encoder": None, "passthrough": False}
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["start"] = message
+                return
+            if message["type"] != "http.response.body" or state["passthrough"]:
+                await send(message)
+                return
+            
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            start = state["start"]
+            if start is not None:
+                state["start"] = None
+                headers = MutableHeaders(raw=start["headers"])
+                if ("content-encoding" in headers or not is_compressible(headers.get("content-type", ""))
+                        or (not more_body and len(body) < self.minimum_size)):
+                    state["passthrough"] = True
+                    await send(start)
+                    await send(message)
+                    return
+                del headers["content-length"]
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                start["headers"] = headers.raw
+                state["encoder"] = ENCODERS[encoding]()
+                await send(start)
+            
+            await send({
+                "type": "http.response.body",
+                "body": state["encoder"].compress(body, final=not more_body),
+                "more_body": more_body,
+            })
+        
+        await self.app(scope, receive, send_wrapper)
\ No newline at end of file
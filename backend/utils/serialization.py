@@ -0,0 +1,63 @@
+"""
+JSON helpers for database values
+"""
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Optional
+import json
+import uuid
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def json_default(value: Any) -> Any:
+    """Convert driver types the json module cannot encode"""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    return str(value)
+
+def dumps(value: Any) -> str:
+    """Serialize a value to compact JSON, through orjson when it is installed"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, default=json_default, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            # orjson refuses integers wider than 64 bits; the json module does not
+            pass
+    return json.dumps(value, default=json_default, separators=(",", ":"))
+
+def value_type(value: Any) -> Optional[str]:
+    """Portable type name for a driver value, or None for NULL"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, Decimal):
+        return "decimal"
+    if isinstance(value, datetime):
+        return "datetime"
+    if isinstance(value, date):
+        return "date"
+    if isinstance(value, time):
+        return "time"
+    if isinstance(value, timedelta):
+        return "interval"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "binary"
+    if isinstance(value, (dict, list)):
+        return "json"
+    if isinstance(value, uuid.UUID):
+        return "uuid"
+    return "string"
\ No newline at end of file